@@ -0,0 +1,48 @@
+from typing import Any, Dict, List, Optional
+
+from solana.rpc.types import MemcmpOpts
+
+from idl_codec import Decoder, IdlCompiler, b58encode
+
+ACCOUNT_DISCRIMINATOR_SIZE = 8
+
+
+class AccountDecoder:
+    def __init__(self, compiler: Optional[IdlCompiler] = None):
+        self.compiler = compiler or IdlCompiler()
+        self.discriminators: Dict[str, bytes] = {}
+        self.names: Dict[bytes, str] = {}
+        self.decoders: Dict[bytes, Decoder] = {}
+        # Full account sizes, discriminator included; every DAMM2 account is fixed size.
+        self.sizes: Dict[str, Optional[int]] = {}
+        for account in self.compiler.idl["accounts"]:
+            name = account["name"]
+            discriminator = bytes(account["discriminator"])
+            self.decoders[discriminator] = self.compiler.decoder(name)
+            self.discriminators[name] = discriminator
+            self.names[discriminator] = name
+            size = self.compiler.fixed_sizes[name]
+            self.sizes[name] = None if size is None else ACCOUNT_DISCRIMINATOR_SIZE + size
+        self.classes = self.compiler.classes
+
+    def decode(self, name: str, data: bytes) -> Any:
+        discriminator = self.discriminators[name]
+        if data[:ACCOUNT_DISCRIMINATOR_SIZE] != discriminator:
+            raise ValueError(f"Account data is not a {name} account")
+        size = self.sizes[name]
+        if size is not None and len(data) < size:
+            raise ValueError(f"{name} account data too short: {len(data)} bytes")
+        return self.decoders[discriminator](data, ACCOUNT_DISCRIMINATOR_SIZE)
+
+    def decode_any(self, data: bytes) -> Optional[Any]:
+        name = self.names.get(bytes(data[:ACCOUNT_DISCRIMINATOR_SIZE]))
+        if name is None:
+            return None
+        return self.decode(name, data)
+
+    def filters(self, name: str) -> List[Any]:
+        # get_program_accounts filters matching only accounts of this type.
+        filters: List[Any] = [MemcmpOpts(0, b58encode(self.discriminators[name]))]
+        if self.sizes[name] is not None:
+            filters.insert(0, self.sizes[name])
+        return filters
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Processed
+from solana.rpc.types import TokenAccountOpts
+
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+from common_utils import report_confirmation
+from confirmation import await_signature
+
+_async_clients: Dict[str, AsyncClient] = {}
+
+async def get_async_client(rpc: str, max_connections: int = 256, timeout: float = 10) -> AsyncClient:
+    client = _async_clients.get(rpc)
+    if client is None:
+        client = AsyncClient(rpc, timeout=timeout)
+        # The provider takes no pool limits, so close the session it built
+        # and install one pooled keep-alive session per endpoint, shared by
+        # every trade on the loop.
+        await client._provider.session.aclose()
+        client._provider.session = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        _async_clients[rpc] = client
+    return client
+
+async def close_async_clients() -> None:
+    clients = list(_async_clients.values())
+    _async_clients.clear()
+    await asyncio.gather(*(client.close() for client in clients))
+
+async def get_token_balance(client: AsyncClient, pub_key: Pubkey, mint: Pubkey) -> int | None:
+    response = await client.get_token_accounts_by_owner_json_parsed(
+        pub_key,
+        TokenAccountOpts(mint=mint),
+        commitment=Processed
+    )
+
+    if response.value:
+        accounts = response.value
+        if accounts:
+            token_amount = accounts[0].account.data.parsed['info']['tokenAmount']['amount']
+            if token_amount:
+                return int(token_amount)
+    return None
+
+async def confirm_txn(
+    client: AsyncClient,
+    txn_sig: Signature,
+    last_valid_block_height: Optional[int] = None,
+    timeout: float = 90,
+    ws_url: Optional[str] = None,
+) -> bool:
+    result = await await_signature(
+        client,
+        txn_sig,
+        last_valid_block_height,
+        timeout=timeout,
+        ws_url=ws_url,
+    )
+    return report_confirmation(result)
@@ -0,0 +1,285 @@
+import asyncio
+from typing import Optional
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Processed
+from solana.rpc.types import TokenAccountOpts, TxOpts
+
+from spl.token.async_client import AsyncToken
+from spl.token.instructions import (
+    CloseAccountParams,
+    close_account,
+    create_associated_token_account,
+    get_associated_token_address,
+)
+
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from blockhash_cache import AsyncBlockhashCache, RecentBlockhash, to_recent_blockhash
+from async_common_utils import confirm_txn, get_token_balance
+from async_pool_utils import fetch_pool_state
+from constants import *
+from meteora_damm2 import create_quote_token_account_ixs, create_swap_ix
+from pool_state import Pool
+from priority_fees import PriorityFeeEstimator
+from swap_estimate import get_minimum_amount_out, get_pool_current_point, get_pool_swap_amount
+
+
+async def get_recent_blockhash(
+    client: AsyncClient,
+    blockhash_cache: Optional[AsyncBlockhashCache] = None,
+) -> RecentBlockhash:
+    if blockhash_cache:
+        return await blockhash_cache.get()
+    return to_recent_blockhash(await client.get_latest_blockhash())
+
+
+async def buy(
+    client: AsyncClient,
+    payer_keypair: Keypair,
+    pool_str: str,
+    quote_in: float = 0.1,
+    unit_budget: int = 100_000,
+    unit_price: int = 1_000_000,
+    base_mint: Optional[str] = None,
+    slippage_bps: int = 500,
+    skip_preflight: bool = False,
+    blockhash_cache: Optional[AsyncBlockhashCache] = None,
+    ws_url: Optional[str] = None,
+    fee_estimator: Optional[PriorityFeeEstimator] = None,
+) -> bool:
+    try:
+        print(f"Starting buy transaction for pool: {pool_str}")
+        quote_amount_in = int(quote_in * 10**9)
+        payer = payer_keypair.pubkey()
+
+        # The token account check needs the base mint; when the caller already
+        # knows it, it runs alongside the pool fetch instead of after it.
+        print("Fetching pool state, rent and blockhash...")
+        base_mint_pubkey = Pubkey.from_string(base_mint) if base_mint else None
+        calls = [
+            fetch_pool_state(client, pool_str),
+            AsyncToken.get_min_balance_rent_for_exempt_for_account(client),
+            get_recent_blockhash(client, blockhash_cache),
+        ]
+        if base_mint_pubkey:
+            calls.append(
+                client.get_token_accounts_by_owner(payer, TokenAccountOpts(base_mint_pubkey), Processed)
+            )
+        results = await asyncio.gather(*calls)
+        pool_state: Pool = results[0]
+        if fee_estimator:
+            unit_price = fee_estimator.estimate(pool_state, default=unit_price)
+            print("Priority fee (micro-lamports/CU):", unit_price)
+        quote_rent = results[1]
+        recent_blockhash: RecentBlockhash = results[2]
+        blockhash = recent_blockhash.blockhash
+
+        print("Quoting swap locally...")
+        quote = get_pool_swap_amount(
+            pool_state,
+            quote_amount_in,
+            False,
+            get_pool_current_point(pool_state, recent_blockhash.slot),
+        )
+        min_base_amount_out = get_minimum_amount_out(quote.amount_out, slippage_bps)
+        print(f"Expected base out: {quote.amount_out}, minimum: {min_base_amount_out}")
+
+        print("Checking for existing base token account...")
+        if base_mint_pubkey == pool_state.token_a_mint:
+            base_account_check = results[3]
+        else:
+            base_account_check = await client.get_token_accounts_by_owner(
+                payer,
+                TokenAccountOpts(pool_state.token_a_mint),
+                Processed,
+            )
+        if base_account_check.value:
+            base_token_account = base_account_check.value[0].pubkey
+            base_account_ix = None
+            print("Existing base token account found:", base_token_account)
+        else:
+            base_token_account = get_associated_token_address(payer, pool_state.token_a_mint)
+            base_account_ix = create_associated_token_account(payer, payer, pool_state.token_a_mint)
+            print("Will create base token ATA:", base_token_account)
+
+        print("Creating and initializing quote token account...")
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            create_quote_token_account_ixs(
+                payer,
+                pool_state.token_b_mint,
+                quote_rent + quote_amount_in,
+            )
+        )
+
+        print("Creating swap instruction...")
+        swap_instr = create_swap_ix(
+            pool_state,
+            payer,
+            quote_token_account,
+            base_token_account,
+            quote_amount_in,
+            min_base_amount_out,
+        )
+
+        instructions = [
+            set_compute_unit_limit(unit_budget),
+            set_compute_unit_price(unit_price),
+            *quote_account_ixs,
+        ]
+        if base_account_ix:
+            instructions.append(base_account_ix)
+        instructions.extend([swap_instr, close_quote_token_account_ix])
+
+        print("Compiling transaction message...")
+        compiled_message = MessageV0.try_compile(payer, instructions, [], blockhash)
+        print("Sending transaction...")
+        txn_sig = (
+            await client.send_transaction(
+                txn=VersionedTransaction(compiled_message, [payer_keypair]),
+                opts=TxOpts(skip_preflight=skip_preflight),
+            )
+        ).value
+        print("Transaction Signature:", txn_sig)
+
+        print("Confirming transaction...")
+        confirmed = await confirm_txn(
+            client, txn_sig, recent_blockhash.last_valid_block_height, ws_url=ws_url
+        )
+        print("Transaction confirmed:", confirmed)
+        return confirmed
+
+    except Exception as e:
+        print("Error occurred during transaction:", e)
+        return False
+
+
+async def sell(
+    client: AsyncClient,
+    payer_keypair: Keypair,
+    pool_str: str,
+    percentage: int = 100,
+    unit_budget: int = 100_000,
+    unit_price: int = 1_000_000,
+    base_mint: Optional[str] = None,
+    slippage_bps: int = 500,
+    skip_preflight: bool = False,
+    blockhash_cache: Optional[AsyncBlockhashCache] = None,
+    ws_url: Optional[str] = None,
+    fee_estimator: Optional[PriorityFeeEstimator] = None,
+) -> bool:
+    try:
+        print(f"Starting sell transaction for pool: {pool_str}")
+
+        if not (1 <= percentage <= 100):
+            print("Percentage must be between 1 and 100.")
+            return False
+
+        payer = payer_keypair.pubkey()
+
+        print("Fetching pool state, rent and blockhash...")
+        base_mint_pubkey = Pubkey.from_string(base_mint) if base_mint else None
+        calls = [
+            fetch_pool_state(client, pool_str),
+            AsyncToken.get_min_balance_rent_for_exempt_for_account(client),
+            get_recent_blockhash(client, blockhash_cache),
+        ]
+        if base_mint_pubkey:
+            calls.append(get_token_balance(client, payer, base_mint_pubkey))
+        results = await asyncio.gather(*calls)
+        pool_state: Pool = results[0]
+        if fee_estimator:
+            unit_price = fee_estimator.estimate(pool_state, default=unit_price)
+            print("Priority fee (micro-lamports/CU):", unit_price)
+        quote_rent = results[1]
+        recent_blockhash: RecentBlockhash = results[2]
+        blockhash = recent_blockhash.blockhash
+
+        print("Retrieving base token balance...")
+        if base_mint_pubkey == pool_state.token_a_mint:
+            base_balance = results[3]
+        else:
+            base_balance = await get_token_balance(client, payer, pool_state.token_a_mint)
+        if not base_balance:
+            print("Base token balance is zero. Nothing to sell.")
+            return False
+
+        base_amount_in = int(base_balance * (percentage / 100))
+
+        print("Quoting swap locally...")
+        quote = get_pool_swap_amount(
+            pool_state,
+            base_amount_in,
+            True,
+            get_pool_current_point(pool_state, recent_blockhash.slot),
+        )
+        min_quote_amount_out = get_minimum_amount_out(quote.amount_out, slippage_bps)
+        print(f"Expected quote out: {quote.amount_out}, minimum: {min_quote_amount_out}")
+
+        base_token_account = get_associated_token_address(payer, pool_state.token_a_mint)
+
+        print("Creating and initializing quote token account...")
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            create_quote_token_account_ixs(
+                payer,
+                pool_state.token_b_mint,
+                quote_rent,
+            )
+        )
+
+        print("Creating swap instruction...")
+        swap_ix = create_swap_ix(
+            pool_state,
+            payer,
+            base_token_account,
+            quote_token_account,
+            base_amount_in,
+            min_quote_amount_out,
+        )
+
+        instructions = [
+            set_compute_unit_limit(unit_budget),
+            set_compute_unit_price(unit_price),
+            *quote_account_ixs,
+            swap_ix,
+            close_quote_token_account_ix,
+        ]
+
+        if percentage == 100:
+            print("Preparing to close base token account (100% sell)...")
+            instructions.append(
+                close_account(
+                    CloseAccountParams(
+                        program_id=TOKEN_PROGRAM_ID,
+                        account=base_token_account,
+                        dest=payer,
+                        owner=payer,
+                    )
+                )
+            )
+
+        print("Compiling transaction message...")
+        compiled_msg = MessageV0.try_compile(payer, instructions, [], blockhash)
+        print("Sending transaction...")
+        sig = (
+            await client.send_transaction(
+                txn=VersionedTransaction(compiled_msg, [payer_keypair]),
+                opts=TxOpts(skip_preflight=skip_preflight),
+            )
+        ).value
+        print("Transaction Signature:", sig)
+
+        print("Confirming transaction...")
+        confirmed = await confirm_txn(
+            client, sig, recent_blockhash.last_valid_block_height, ws_url=ws_url
+        )
+        print("Transaction confirmed:", confirmed)
+        return confirmed
+
+    except Exception as e:
+        print("Error occurred during transaction:", e)
+        return False
@@ -0,0 +1,80 @@
+import asyncio
+from typing import List, Optional
+
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey  # type: ignore
+
+from solana.rpc.commitment import Processed
+from solana.rpc.types import MemcmpOpts
+
+from constants import METEORA_DAMM2_PROGRAM
+from pool_state import POOL_ACCOUNT_SIZE, Pool, decode_pool
+from pool_utils import MULTIPLE_ACCOUNTS_CHUNK, PoolCandidate, rank_pool_candidates
+
+
+async def fetch_pool_state(client: AsyncClient, pool_str: str) -> Pool:
+    pool_pubkey = Pubkey.from_string(pool_str)
+    info = await client.get_account_info_json_parsed(pool_pubkey)
+    raw_data = info.value.data
+    return decode_pool(pool_pubkey, raw_data)
+
+
+async def fetch_pool_states(client: AsyncClient, pool_pubkeys: List[Pubkey]) -> List[Optional[Pool]]:
+    chunks = [
+        pool_pubkeys[i:i + MULTIPLE_ACCOUNTS_CHUNK]
+        for i in range(0, len(pool_pubkeys), MULTIPLE_ACCOUNTS_CHUNK)
+    ]
+    responses = await asyncio.gather(
+        *(client.get_multiple_accounts(chunk, commitment=Processed) for chunk in chunks)
+    )
+    states: List[Optional[Pool]] = []
+    for chunk, resp in zip(chunks, responses):
+        for pk, account in zip(chunk, resp.value):
+            if account is None:
+                states.append(None)
+            else:
+                states.append(decode_pool(pk, account.data))
+    return states
+
+
+async def fetch_pool_candidates(
+    client: AsyncClient,
+    base_mint: str,
+    quote_mint: str = "So11111111111111111111111111111111111111112",
+) -> List[PoolCandidate]:
+    f_base = MemcmpOpts(offset=168, bytes=base_mint)
+    f_quote = MemcmpOpts(offset=200, bytes=quote_mint)
+
+    resp = await client.get_program_accounts(
+        METEORA_DAMM2_PROGRAM,
+        commitment=Processed,
+        filters=[POOL_ACCOUNT_SIZE, f_base, f_quote],
+    )
+
+    states: List[Pool] = []
+    missing: List[Pubkey] = []
+    for acct in resp.value:
+        data = acct.account.data
+        if isinstance(data, bytes) and len(data) >= POOL_ACCOUNT_SIZE:
+            states.append(decode_pool(acct.pubkey, data))
+        else:
+            missing.append(acct.pubkey)
+
+    if missing:
+        states.extend(s for s in await fetch_pool_states(client, missing) if s is not None)
+
+    return rank_pool_candidates(states)
+
+
+async def fetch_pool_from_rpc(
+    client: AsyncClient,
+    base_mint: str,
+    quote_mint: str = "So11111111111111111111111111111111111111112",
+) -> Optional[str]:
+    try:
+        candidates = await fetch_pool_candidates(client, base_mint, quote_mint)
+        if not candidates:
+            return None
+        return str(candidates[0].pool)
+    except:
+        return None
@@ -0,0 +1,68 @@
+import os
+from dataclasses import fields, is_dataclass
+import timeit
+
+from construct import Container
+from solders.pubkey import Pubkey  # type: ignore
+
+from account_decoder import AccountDecoder
+from idl_codec import IdlRecord
+from pool_state import POOL_ACCOUNT_SIZE, POOL_LAYOUT, Pool, decode_pool
+
+# Configuration
+iterations = 20_000
+parity_samples = 1_000
+pool_pubkey = Pubkey.from_string("cpamdpZCGKUy5JxQXB4dcpGPiikHawvSWAd6mEn1sGG")
+
+decoder = AccountDecoder()
+
+def random_account(name):
+    return decoder.discriminators[name] + os.urandom(decoder.sizes[name] - 8)
+
+def normalize(value):
+    # construct returns lists for every array and bytes for pubkeys.
+    if isinstance(value, (IdlRecord, Container)):
+        items = value._asdict().items() if isinstance(value, IdlRecord) else value.items()
+        return {k: normalize(v) for k, v in items if not k.startswith("_io")}
+    if is_dataclass(value):
+        return {f.name: normalize(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, Pubkey):
+        return list(bytes(value))
+    if isinstance(value, bytes):
+        return list(value)
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+# Parity check against the hand-written Pool layouts
+if decoder.sizes["Pool"] != POOL_ACCOUNT_SIZE:
+    raise SystemExit(f"Pool size mismatch: {decoder.sizes['Pool']} != {POOL_ACCOUNT_SIZE}")
+pool_fields = [name for name in decoder.classes["Pool"]._fields if name in Pool.__slots__]
+for _ in range(parity_samples):
+    raw_data = random_account("Pool")
+    pool = decoder.decode("Pool", raw_data)
+    if normalize(pool) != normalize(POOL_LAYOUT.parse(raw_data)):
+        raise SystemExit("Pool decoder mismatch against POOL_LAYOUT")
+    fast = decode_pool(pool_pubkey, raw_data)
+    mismatches = [
+        name for name in pool_fields
+        if normalize(getattr(pool, name)) != normalize(getattr(fast, name))
+    ]
+    if mismatches:
+        raise SystemExit(f"Pool decoder mismatch against decode_pool on fields: {mismatches}")
+print(f"Parity check passed on {parity_samples} random Pool accounts")
+
+# Discriminator validation
+try:
+    decoder.decode("Position", random_account("Pool"))
+    raise SystemExit("Pool data was accepted as a Position")
+except ValueError:
+    pass
+print("Discriminator check passed")
+
+pool_data = random_account("Pool")
+print(f"{'Pool (construct)':<30} {iterations / timeit.timeit(lambda: POOL_LAYOUT.parse(pool_data), number=iterations):>12,.0f} decodes/s")
+for name in decoder.discriminators:
+    raw_data = random_account(name)
+    elapsed = timeit.timeit(lambda: decoder.decode(name, raw_data), number=iterations)
+    print(f"{name + ' (' + str(decoder.sizes[name]) + ' bytes)':<30} {iterations / elapsed:>12,.0f} decodes/s")
@@ -0,0 +1,58 @@
+import base64
+import json
+import os
+import random
+import time
+
+from event_decoder import EVENT_IX_TAG, PROGRAM_DATA_PREFIX, EventDecoder
+
+# Configuration
+# JSONL written by EventStream(record_path=...); a synthetic corpus is used if missing.
+corpus_path = "event_corpus.jsonl"
+synthetic_lines = 50_000
+rounds = 5
+
+decoder = EventDecoder()
+
+def load_corpus(path):
+    lines = []
+    with open(path) as f:
+        for row in f:
+            lines += [line for line in json.loads(row)["logs"] if line.startswith(PROGRAM_DATA_PREFIX)]
+    return lines
+
+def synthetic_corpus(count):
+    # Mostly swaps, like mainnet traffic, plus the other fixed-size events.
+    fixed = []
+    for event in decoder.compiler.idl["events"]:
+        decoder.compiler.decoder(event["name"])
+        size = decoder.compiler.fixed_sizes[event["name"]]
+        if size is not None:
+            fixed.append((bytes(event["discriminator"]), size, event["name"]))
+    swap = next(entry for entry in fixed if entry[2] == "EvtSwap")
+    lines = []
+    for _ in range(count):
+        disc, size, _ = swap if random.random() < 0.8 else random.choice(fixed)
+        lines.append(PROGRAM_DATA_PREFIX + base64.b64encode(disc + os.urandom(size)).decode())
+    return lines
+
+if os.path.exists(corpus_path):
+    lines = load_corpus(corpus_path)
+    print(f"Loaded {len(lines)} Program data lines from {corpus_path}")
+else:
+    lines = synthetic_corpus(synthetic_lines)
+    print(f"No corpus at {corpus_path}, using {len(lines)} synthetic lines")
+
+cpi_payloads = [EVENT_IX_TAG + base64.b64decode(line[len(PROGRAM_DATA_PREFIX):]) for line in lines]
+
+def bench(name, fn, items):
+    best = float("inf")
+    decoded = 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        decoded = sum(1 for item in items if fn(item) is not None)
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:<18} {decoded:>8} decoded {len(items) / best:>12,.0f} events/s")
+
+bench("log lines", decoder.decode_log, lines)
+bench("cpi data", decoder.decode_cpi, cpi_payloads)
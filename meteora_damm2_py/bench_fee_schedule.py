@@ -0,0 +1,107 @@
+import random
+import timeit
+from collections import Counter
+from decimal import Decimal, getcontext
+
+from swap_estimate import (
+    BASIS_POINT_MAX,
+    FeeSchedulerMode,
+    get_base_fee_numerator,
+    get_base_fee_table,
+    get_fee_numerator,
+)
+
+# Configuration
+schedules = 300
+max_periods = 500
+quotes = 20_000
+seed = 7
+# The program rejects schedules whose final fee is below this.
+min_fee_numerator = 100_000
+
+getcontext().prec = 50
+rng = random.Random(seed)
+
+def decimal_base_fee_numerator(cliff, period, reduction):
+    # The previous Decimal implementation, kept here as the reference.
+    bps = Decimal(1) - Decimal(reduction) / BASIS_POINT_MAX
+    factor = bps ** period
+    return int((Decimal(cliff) * factor).to_integral_value(rounding="ROUND_FLOOR"))
+
+def decimal_fee_numerator(current_point, activation_point, number_of_period, period_freq, cliff, reduction):
+    if period_freq == 0 or current_point < activation_point:
+        return cliff
+    period = min(number_of_period, (current_point - activation_point) // period_freq)
+    return decimal_base_fee_numerator(cliff, period, reduction)
+
+# Differential check of the exponential schedule against the Decimal output
+diffs = Counter()
+max_relative = 0.0
+checked = 0
+skipped = 0
+worst = None
+while checked < schedules * max_periods // 2:
+    cliff = rng.choice([2_500_000, 10_000_000, 50_000_000, 250_000_000, 500_000_000, rng.randint(1, 500_000_000)])
+    reduction = rng.choice([1, 10, 50, 100, 500, 1_000, 5_000, rng.randint(1, BASIS_POINT_MAX - 1)])
+    number_of_period = rng.randint(0, max_periods)
+    try:
+        table = get_base_fee_table(FeeSchedulerMode.Exponential, cliff, number_of_period, reduction)
+    except OverflowError:
+        skipped += 1
+        continue
+    if table[-1] < min_fee_numerator:
+        skipped += 1
+        continue
+    for period in range(number_of_period + 1):
+        expected = decimal_base_fee_numerator(cliff, period, reduction)
+        diff = table[period] - expected
+        diffs[diff] += 1
+        checked += 1
+        if diff and expected:
+            relative = abs(diff) / expected
+            if relative > max_relative:
+                max_relative, worst = relative, (cliff, reduction, period, expected, table[period])
+
+print(
+    f"Checked {checked} (schedule, period) pairs against the Decimal implementation "
+    f"({skipped} schedules skipped as invalid on-chain)"
+)
+for diff, count in sorted(diffs.items()):
+    print(f"  integer - decimal = {diff:+d}: {count} ({count / checked:.2%})")
+if worst:
+    cliff, reduction, period, expected, actual = worst
+    print(
+        f"Largest relative divergence {max_relative:.3e}: cliff {cliff}, reduction {reduction} bps, "
+        f"period {period}, decimal {expected}, integer {actual}"
+    )
+
+# The table must agree with computing each period directly
+for period in (0, 1, 17, max_periods):
+    direct = get_base_fee_numerator(FeeSchedulerMode.Exponential, 250_000_000, period, 120)
+    if get_base_fee_table(FeeSchedulerMode.Exponential, 250_000_000, max_periods, 120)[period] != direct:
+        raise SystemExit(f"Fee table mismatch at period {period}")
+
+# Per-quote cost: Decimal pow against the table lookup
+activation_point = 1_000_000
+number_of_period, period_freq, cliff, reduction = 120, 60, 250_000_000, 120
+points = [activation_point + rng.randint(0, number_of_period * period_freq * 2) for _ in range(quotes)]
+
+decimal_time = timeit.timeit(
+    lambda: [
+        decimal_fee_numerator(p, activation_point, number_of_period, period_freq, cliff, reduction)
+        for p in points
+    ],
+    number=1,
+)
+table_time = timeit.timeit(
+    lambda: [
+        get_fee_numerator(
+            p, activation_point, number_of_period, period_freq,
+            FeeSchedulerMode.Exponential, cliff, reduction,
+        )
+        for p in points
+    ],
+    number=1,
+)
+print(f"decimal pow  {quotes / decimal_time:>12,.0f} fee numerators/s")
+print(f"table lookup {quotes / table_time:>12,.0f} fee numerators/s")
@@ -0,0 +1,70 @@
+from solders.address_lookup_table_account import AddressLookupTableAccount  # type: ignore
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from constants import MAX_TRANSACTION_ACCOUNTS, MAX_TRANSACTION_SIZE, WSOL_MINT
+from lookup_tables import CONSTANT_ADDRESSES, pool_addresses
+from meteora_damm2 import create_quote_token_account_ixs, create_swap_ix
+from pool_state import POOL_ACCOUNT_SIZE, POOL_HOT_OFFSET, POOL_HOT_STRUCT, decode_pool
+
+# Configuration
+max_swaps = 40
+
+payer_keypair = Keypair()
+payer = payer_keypair.pubkey()
+blockhash = Hash.new_unique()
+base_mint = Pubkey.new_unique()
+
+def synthetic_pool(token_a_mint, token_b_mint):
+    data = bytearray(POOL_ACCOUNT_SIZE)
+    keys = [bytes(token_a_mint), bytes(token_b_mint)] + [bytes(Pubkey.new_unique()) for _ in range(4)]
+    POOL_HOT_STRUCT.pack_into(data, POOL_HOT_OFFSET, *keys, *([0] * 15), *([0] * 6))
+    return decode_pool(Pubkey.new_unique(), bytes(data))
+
+def swap_transaction(pools, lookup_tables):
+    # A split buy: temporary WSOL account, then one swap per pool into the base account.
+    quote_account, open_ixs, close_ix = create_quote_token_account_ixs(payer, WSOL_MINT, 10**9)
+    base_account = Pubkey.new_unique()
+    instructions = [set_compute_unit_limit(1_400_000), set_compute_unit_price(1_000_000), *open_ixs]
+    instructions += [create_swap_ix(p, payer, quote_account, base_account, 10**8, 1) for p in pools]
+    instructions.append(close_ix)
+    message = MessageV0.try_compile(payer, instructions, lookup_tables, blockhash)
+    accounts = len(message.account_keys) + sum(
+        len(lookup.writable_indexes) + len(lookup.readonly_indexes)
+        for lookup in message.address_table_lookups
+    )
+    return len(bytes(VersionedTransaction(message, [payer_keypair]))), accounts
+
+def report(title, pools):
+    table = AddressLookupTableAccount(
+        Pubkey.new_unique(),
+        list(dict.fromkeys(CONSTANT_ADDRESSES + [a for p in pools for a in pool_addresses(p)])),
+    )
+    print(title)
+    print(f"  {'swaps':>5} {'legacy bytes':>13} {'ALT bytes':>10} {'saved':>6} {'accounts':>9}")
+    limits = {}
+    for count in range(1, max_swaps + 1):
+        legacy_size, _ = swap_transaction(pools[:count], [])
+        alt_size, accounts = swap_transaction(pools[:count], [table])
+        for name, size in (("legacy", legacy_size), ("alt", alt_size)):
+            if size <= MAX_TRANSACTION_SIZE and accounts <= MAX_TRANSACTION_ACCOUNTS:
+                limits[name] = count
+        if count in (1, 2, 3, 4, 6, 8, 12, 16):
+            print(f"  {count:>5} {legacy_size:>13} {alt_size:>10} {legacy_size - alt_size:>6} {accounts:>9}")
+    print(
+        f"  Max swaps per transaction: {limits.get('legacy', 0)} without a table, "
+        f"{limits.get('alt', 0)} with one (limits: {MAX_TRANSACTION_SIZE} bytes, {MAX_TRANSACTION_ACCOUNTS} accounts)"
+    )
+
+report(
+    "Split order across pools of one pair",
+    [synthetic_pool(base_mint, WSOL_MINT) for _ in range(max_swaps)],
+)
+report(
+    "Swaps across pools of different pairs",
+    [synthetic_pool(Pubkey.new_unique(), WSOL_MINT) for _ in range(max_swaps)],
+)
@@ -0,0 +1,153 @@
+import time
+
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from common_utils import percentile
+from multi_sender import MultiSender
+from stand_in import StandInSender
+
+# Configuration
+sends = 200
+# Injected latency per stand-in endpoint, in seconds.
+fast_delay = 0.01
+medium_delay = 0.05
+slow_delay = 0.15
+
+payer = Keypair()
+
+def new_txn():
+    message = MessageV0.try_compile(payer.pubkey(), [], [], Hash.new_unique())
+    return VersionedTransaction(message, [payer])
+
+def check(name, ok):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        raise SystemExit(f"Check failed: {name}")
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def settled(*senders):
+    # Waits for the sender to record every send, not just for the servers to answer.
+    return wait_for(lambda: all(s.sent == s.accepted + s.failed for m in senders for s in m.stats.values()))
+
+def raises(send):
+    try:
+        send()
+    except RuntimeError as e:
+        return str(e)
+    return None
+
+fast = StandInSender(delay=fast_delay)
+medium = StandInSender(delay=medium_delay)
+slow = StandInSender(delay=slow_delay)
+rejecting = StandInSender(error="BlockhashNotFound")
+down = StandInSender(status=503)
+servers = [fast, medium, slow, rejecting, down]
+name = {s.url: n for s, n in zip(servers, ["fast", "medium", "slow", "rejecting", "down"])}
+
+print("First ack wins")
+sender = MultiSender([s.url for s in reversed(servers)], timeout=2)
+txn = new_txn()
+started = time.perf_counter()
+result = sender.send(txn)
+elapsed = time.perf_counter() - started
+check("fastest endpoint wins", result.endpoint == fast.url)
+check("signature returned", result.signature == txn.signatures[0])
+check("returns before slower endpoints answer", elapsed < medium_delay and slow.answered == 0)
+check("sent to every untried endpoint", all(s.requests == 1 for s in servers))
+check("slower sends keep running", wait_for(lambda: sender.stats[slow.url].ewma_ms is not None))
+check("failed sends recorded", wait_for(lambda: sender.stats[rejecting.url].failed and sender.stats[down.url].failed))
+check("each failure recorded once", sender.stats[rejecting.url].failed == 1 and sender.stats[down.url].failed == 1)
+check("only the winner counted", [sender.stats[s.url].wins for s in servers] == [1, 0, 0, 0, 0])
+
+print("EWMA ranking")
+for _ in range(5):
+    sender.send(new_txn())
+settled(sender)
+ranked = sender.ranked_endpoints()
+check("ranked by latency", ranked[:3] == [fast.url, medium.url, slow.url])
+check("failing endpoints ranked last", set(ranked[3:]) == {rejecting.url, down.url})
+fast.delay = slow_delay * 2
+overtaken_after = 0
+while sender.ranked_endpoints()[0] == fast.url:
+    sender.send(new_txn())
+    settled(sender)
+    overtaken_after += 1
+check(f"slowed endpoint overtaken after {overtaken_after} sends", 0 < overtaken_after <= 5)
+check("next fastest now first", sender.ranked_endpoints()[0] == medium.url)
+check("winner follows the latency", sender.send(new_txn()).endpoint == medium.url)
+fast.delay = fast_delay
+while sender.ranked_endpoints()[0] != fast.url:
+    sender.send(new_txn())
+    settled(sender)
+check("recovered endpoint ranked first again", sender.send(new_txn()).endpoint == fast.url)
+settled(sender)
+
+print("Intermittent failures")
+medium.error = "BlockhashNotFound"
+for _ in range(5):
+    raises(lambda: sender.send(new_txn()))
+    settled(sender)
+medium.error = None
+ranked = sender.ranked_endpoints()
+check("failure penalty ranks a flaky endpoint behind a slower one", ranked.index(medium.url) > ranked.index(slow.url))
+sender.close()
+
+print("Fan-out limit")
+sender = MultiSender([s.url for s in servers], timeout=2, max_fanout=2)
+sampled = 0
+while any(s.sent == 0 for s in sender.stats.values()):
+    raises(lambda: sender.send(new_txn()))
+    settled(sender)
+    sampled += 1
+check(f"untried endpoints sampled within {sampled} sends", sampled == 3)
+before = [s.requests for s in servers]
+for _ in range(5):
+    sender.send(new_txn())
+settled(sender)
+sent = [s.requests - b for s, b in zip(servers, before)]
+check("only the two best endpoints sent to", sent == [5, 5, 0, 0, 0])
+sender.close()
+
+print("Errors")
+sender = MultiSender([rejecting.url, down.url], timeout=2)
+error = raises(lambda: sender.send(new_txn()))
+check("raises when every endpoint fails", error is not None and rejecting.url in error and down.url in error)
+sender.close()
+sender = MultiSender([slow.url], timeout=slow_delay / 3)
+started = time.perf_counter()
+error = raises(lambda: sender.send(new_txn()))
+check("raises on timeout", error is not None and "timed out" in error)
+check("timeout ends the wait", time.perf_counter() - started < slow_delay)
+settled(sender)
+sender.close()
+
+print("Latency")
+sender = MultiSender([s.url for s in servers], timeout=2)
+single = MultiSender([medium.url], timeout=2)
+fanned, alone = [], []
+for i in range(sends):
+    # Each endpoint in turn stalls, as a congested node would.
+    stalled = servers[i % 3]
+    stalled.delay = slow_delay * 2
+    fanned.append(sender.send(new_txn()).latency_ms)
+    alone.append(single.send(new_txn()).latency_ms)
+    stalled.delay = [fast_delay, medium_delay, slow_delay][i % 3]
+settled(sender)
+print(f"  fan-out send ms p50/p99: {percentile(fanned, 50):.0f}/{percentile(fanned, 99):.0f}")
+print(f"  single endpoint ms p50/p99: {percentile(alone, 50):.0f}/{percentile(alone, 99):.0f}")
+print(f"  wins: {', '.join(f'{name[e]} {s.wins}' for e, s in sender.stats.items())}")
+sender.close()
+single.close()
+
+for server in servers:
+    server.stop()
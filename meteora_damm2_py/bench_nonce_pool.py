@@ -0,0 +1,172 @@
+import base64
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from solana.rpc.api import Client
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.system_program import ID as SYSTEM_PROGRAM_ID  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from nonce_pool import NONCE_ACCOUNT_STRUCT, NONCE_INITIALIZED, NoncePool
+from presigned_trades import PresignedTrader
+
+# Configuration
+max_size = 8
+settle_timeout = 0.2
+
+# System program instruction tags.
+ADVANCE_NONCE = 4
+INITIALIZE_NONCE = 6
+
+class StandInRpc:
+    # Just enough JSON-RPC for a NoncePool: system instructions that create or
+    # advance a nonce are applied when sent, and every transaction confirms.
+    def __init__(self):
+        # Address -> (authority, nonce) of every initialized nonce account.
+        self.nonces = {}
+        self.advanced = []
+        self._lock = threading.Lock()
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with outer._lock:
+                    result = outer.answer(body)
+                data = json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def advance(self, address):
+        # As a landed transaction, or anyone else holding the authority, would.
+        with self._lock:
+            authority, _ = self.nonces[str(address)]
+            self.nonces[str(address)] = (authority, Hash.new_unique())
+
+    def close(self, address):
+        with self._lock:
+            del self.nonces[str(address)]
+
+    def account(self, address):
+        entry = self.nonces.get(address)
+        if entry is None:
+            return None
+        authority, nonce = entry
+        data = NONCE_ACCOUNT_STRUCT.pack(1, NONCE_INITIALIZED, bytes(authority), bytes(nonce), 5000)
+        return {
+            "data": [base64.b64encode(data).decode(), "base64"],
+            "executable": False,
+            "lamports": 1_447_680,
+            "owner": str(SYSTEM_PROGRAM_ID),
+            "rentEpoch": 0,
+            "space": len(data),
+        }
+
+    def apply(self, txn):
+        keys = txn.message.account_keys
+        for ix in txn.message.instructions:
+            if keys[ix.program_id_index] != SYSTEM_PROGRAM_ID:
+                continue
+            tag = struct.unpack_from("<I", bytes(ix.data))[0]
+            address = str(keys[ix.accounts[0]])
+            if tag == INITIALIZE_NONCE:
+                self.nonces[address] = (Pubkey.from_bytes(bytes(ix.data)[4:36]), Hash.new_unique())
+            elif tag == ADVANCE_NONCE:
+                self.advanced.append(address)
+                authority, _ = self.nonces[address]
+                self.nonces[address] = (authority, Hash.new_unique())
+
+    def answer(self, body):
+        method, params = body["method"], body.get("params", [])
+        context = {"slot": 1}
+        if method == "getMultipleAccounts":
+            return {"context": context, "value": [self.account(a) for a in params[0]]}
+        if method == "getMinimumBalanceForRentExemption":
+            return 1_447_680
+        if method == "getLatestBlockhash":
+            return {"context": context, "value": {"blockhash": str(Hash.new_unique()), "lastValidBlockHeight": 10**6}}
+        if method == "sendTransaction":
+            txn = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+            self.apply(txn)
+            return str(txn.signatures[0])
+        if method == "getSignatureStatuses":
+            status = {"slot": 1, "confirmations": None, "err": None, "confirmationStatus": "confirmed", "status": {"Ok": None}}
+            return {"context": context, "value": [status for _ in params[0]]}
+        if method == "getBlockHeight":
+            return 1
+        raise ValueError(f"Stand-in does not serve {method}")
+
+def check(name, ok):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        raise SystemExit(f"Check failed: {name}")
+
+rpc = StandInRpc()
+pool = NoncePool(Client(rpc.url), Keypair(), max_size=max_size, settle_timeout=settle_timeout)
+
+print("Create")
+pool.refresh()
+check("every index vacant at first", pool.vacant == list(range(max_size)))
+check("refill creates what is missing", pool.refill(4) == 4)
+pool.refresh()
+check("created accounts come up free", len(pool.free) == 4 and pool.vacant == list(range(4, max_size)))
+check("refill stops at the target", pool.refill(4) == 0)
+
+print("Sent nonces")
+sent = pool.acquire()
+pool.mark_sent(sent)
+pool.refresh()
+check("unmoved nonce stays pending", sent.address in pool.pending)
+rpc.advance(sent.address)
+pool.refresh()
+check("moved nonce goes back to free", sent.address not in pool.pending and sent.address in pool.free)
+check("new nonce value read", pool.values[sent.address] != sent.nonce)
+
+print("Collisions")
+reserved = pool.acquire()
+rpc.advance(reserved.address)
+collided = pool.refresh()
+check("nonce advanced elsewhere reported", collided == [reserved])
+check("collision counted", pool.collisions == 1)
+check("collided nonce freed", reserved.address not in pool.reserved and reserved.address in pool.free)
+
+print("Settle timeout")
+stuck = pool.acquire()
+pool.mark_sent(stuck)
+pool.refresh()
+check("not voided before the timeout", pool.voided == 0)
+time.sleep(settle_timeout * 1.5)
+pool.refresh()
+check("unsettled nonce voided", pool.voided == 1 and rpc.advanced == [str(stuck.address)])
+pool.refresh()
+check("voided nonce freed", stuck.address not in pool.pending and stuck.address in pool.free)
+
+print("Closed accounts")
+closed = pool.addresses[1]
+rpc.close(closed)
+pool.refresh()
+check("closed account dropped", closed not in pool.values and closed not in pool.free)
+check("closed index vacant", pool.vacant[0] == 1)
+check("closed index recreated", pool.refill(4) == 1 and str(closed) in rpc.nonces)
+pool.refresh()
+check("recreated account free", closed in pool.free and pool.vacant == list(range(4, max_size)))
+
+print("Confirm timeout")
+PresignedTrader(None, pool, confirm_timeout=90)
+check("settle timeout raised to the confirm timeout", pool.settle_timeout == 90)
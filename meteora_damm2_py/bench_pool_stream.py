@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from solders.pubkey import Pubkey  # type: ignore
+
+from pool_cache import PoolCache
+from pool_state import POOL_ACCOUNT_SIZE, POOL_HOT_OFFSET, POOL_HOT_STRUCT
+from pool_stream import PoolStream
+from stand_in import StandInWs
+
+# Configuration
+updates = 5_000
+# Longer than the cache's 400 ms staleness window.
+quiet_period = 1.0
+
+POOL_DISCRIMINATOR = bytes([241, 154, 109, 4, 17, 177, 109, 188])
+U64 = (1 << 64) - 1
+
+def synthetic_pool_data(sqrt_price):
+    data = bytearray(POOL_ACCOUNT_SIZE)
+    data[:8] = POOL_DISCRIMINATOR
+    POOL_HOT_STRUCT.pack_into(
+        data, POOL_HOT_OFFSET, *[bytes(Pubkey.new_unique()) for _ in range(6)],
+        *([0] * 12), sqrt_price & U64, sqrt_price >> 64, 0, *([0] * 6),
+    )
+    return bytes(data)
+
+def check(name, ok):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        raise SystemExit(f"Check failed: {name}")
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+async def main():
+    server = await StandInWs().start()
+    pool_a, pool_b = str(Pubkey.new_unique()), str(Pubkey.new_unique())
+    cache = PoolCache(None)
+    stream = PoolStream(server.url, pool_cache=cache, reconnect_delay=0.05)
+    seen = []
+    stream.on_change(lambda pool, slot: seen.append(slot))
+    await stream.subscribe(pool_a)
+    task = asyncio.create_task(stream.run())
+
+    print("Subscribe and update")
+    check("subscribed on connect", await wait_for(lambda: server.subscribers(pool_a) == 1))
+    await server.update(pool_a, 10, synthetic_pool_data(2**64))
+    check("update decoded", await wait_for(lambda: stream.slot(pool_a) == 10))
+    check("pool cache filled", cache.peek(pool_a) is not None and cache.peek(pool_a).slot == 10)
+    check("callback ran", seen == [10])
+    await server.update(pool_a, 9, synthetic_pool_data(2**63))
+    await server.update(pool_a, 11, synthetic_pool_data(2**65))
+    check("older slot ignored", await wait_for(lambda: stream.slot(pool_a) == 11) and seen == [10, 11])
+    await server.update(pool_a, 12, b"short")
+    await server.update(pool_a, 12, synthetic_pool_data(2**65 + 1))
+    check("bad notification skipped", await wait_for(lambda: stream.slot(pool_a) == 12) and stream.reconnects == 0)
+
+    print("Quiet pool stays fresh")
+    data = synthetic_pool_data(2**66)
+    await server.update(pool_a, 13, data)
+    started = time.monotonic()
+    slot = 13
+    while time.monotonic() - started < quiet_period:
+        slot += 1
+        await server.update(pool_a, slot, data)
+        await asyncio.sleep(0.1)
+    await wait_for(lambda: stream.slot(pool_a) == slot)
+    entry = cache.peek(pool_a)
+    check("unchanged data refreshes cache slot", entry.slot == slot)
+    check("unchanged data keeps entry fresh", cache.is_fresh(entry))
+    check("unchanged data skips decode", stream.updates == 4)
+
+    print("Reconnect and resubscribe")
+    await stream.subscribe(pool_b)
+    check("subscribe while connected", await wait_for(lambda: server.subscribers(pool_b) == 1))
+    await server.drop()
+    check("reconnected", await wait_for(lambda: stream.reconnects == 1 and server.connections == 2))
+    check(
+        "every pool resubscribed",
+        await wait_for(lambda: server.subscribers(pool_a) == 1 and server.subscribers(pool_b) == 1),
+    )
+    await server.update(pool_b, slot + 1, synthetic_pool_data(2**64))
+    check("update after reconnect", await wait_for(lambda: stream.slot(pool_b) == slot + 1))
+    await stream.unsubscribe(pool_b)
+    check("unsubscribed", await wait_for(lambda: server.subscribers(pool_b) == 0))
+    await asyncio.sleep(0.2)
+    check("unsubscribe keeps the connection", stream.reconnects == 1 and server.connections == 2)
+
+    print("Throughput")
+    frames = [synthetic_pool_data(2**64 + i) for i in range(updates)]
+    started = time.perf_counter()
+    for i, frame in enumerate(frames):
+        await server.update(pool_a, slot + 2 + i, frame)
+    await wait_for(lambda: stream.slot(pool_a) == slot + 1 + updates, timeout=60)
+    elapsed = time.perf_counter() - started
+    print(f"  {updates / elapsed:,.0f} notifications/s decoded into the cache")
+
+    await stream.stop()
+    await task
+    await server.stop()
+
+asyncio.run(main())
@@ -0,0 +1,88 @@
+import heapq
+import random
+import time
+
+from solders.pubkey import Pubkey  # type: ignore
+
+from pool_state import POOL_ACCOUNT_SIZE, POOL_FEES_OFFSET, POOL_FEES_STRUCT, POOL_HOT_OFFSET, POOL_HOT_STRUCT, decode_pool
+from router import best_single_route, split_route
+from swap_estimate import get_pool_swap_amount
+
+# Configuration
+pool_counts = [1, 2, 4, 8, 16, 32, 64, 128]
+orders = 200
+reference_steps = 400
+sol_amounts = [1, 10, 100, 1_000]
+seed = 11
+
+rng = random.Random(seed)
+POOL_DISCRIMINATOR = bytes([241, 154, 109, 4, 17, 177, 109, 188])
+U64 = (1 << 64) - 1
+SQRT_MIN_PRICE = 4295048016
+SQRT_MAX_PRICE = 79226673521066979257578248091
+
+def synthetic_pool(sqrt_price, liquidity, cliff_fee_numerator):
+    data = bytearray(POOL_ACCOUNT_SIZE)
+    data[:8] = POOL_DISCRIMINATOR
+    mints = [bytes(Pubkey.new_unique()) for _ in range(6)]
+    POOL_HOT_STRUCT.pack_into(
+        data, POOL_HOT_OFFSET, *mints,
+        liquidity & U64, liquidity >> 64, 0, 0, 0, 0, 0, 0,
+        SQRT_MIN_PRICE, 0, SQRT_MAX_PRICE & U64, SQRT_MAX_PRICE >> 64,
+        sqrt_price & U64, sqrt_price >> 64, 0,
+        0, 0, 0, 0, 0, 0,
+    )
+    fees = [cliff_fee_numerator, 0] + [0] * 42
+    POOL_FEES_STRUCT.pack_into(data, POOL_FEES_OFFSET, *fees)
+    return decode_pool(Pubkey.new_unique(), bytes(data))
+
+def synthetic_pools(count):
+    # Same pair, prices within a few percent, liquidity and fee tiers that vary.
+    base_sqrt_price = int(2**64 * 0.001 ** 0.5)
+    return [
+        synthetic_pool(
+            int(base_sqrt_price * rng.uniform(0.98, 1.02)),
+            int(2**64 * rng.uniform(1e13, 5e14)),
+            rng.choice([250_000, 1_000_000, 2_500_000, 10_000_000]),
+        )
+        for _ in range(count)
+    ]
+
+def reference_route(pools, amount_in, a_to_b):
+    # Brute force: hand out the order in small steps, each to the pool whose
+    # exact quote gains the most from it.
+    step = amount_in // reference_steps
+    allocated = [0] * len(pools)
+    outs = [0] * len(pools)
+    heap = [(-get_pool_swap_amount(p, step, a_to_b, 0).amount_out, i) for i, p in enumerate(pools)]
+    heapq.heapify(heap)
+    for _ in range(reference_steps):
+        _, i = heapq.heappop(heap)
+        allocated[i] += step
+        outs[i] = get_pool_swap_amount(pools[i], allocated[i], a_to_b, 0).amount_out
+        gain = get_pool_swap_amount(pools[i], allocated[i] + step, a_to_b, 0).amount_out - outs[i]
+        heapq.heappush(heap, (-gain, i))
+    return sum(outs)
+
+print("Fill quality on 8 pools (base out per buy, against the best single pool and a brute-force split)")
+pools = synthetic_pools(8)
+for sol in sol_amounts:
+    amount_in = sol * 10**9
+    split = split_route(pools, amount_in, False, max_legs=8, min_leg_bps=0)
+    single = best_single_route(pools, amount_in, False)
+    reference = reference_route(pools, amount_in, False)
+    print(
+        f"  {sol:>5} SOL: split {split.amount_out} over {len(split.legs)} legs, "
+        f"single {single.amount_out} ({(split.amount_out / single.amount_out - 1) * 100:+.3f}%), "
+        f"brute force {reference} ({(split.amount_out / reference - 1) * 100:+.4f}%)"
+    )
+
+print("Routing time per order")
+for count in pool_counts:
+    pools = synthetic_pools(count)
+    amounts = [rng.randint(1, 1_000) * 10**9 for _ in range(orders)]
+    started = time.perf_counter()
+    for amount_in in amounts:
+        split_route(pools, amount_in, False)
+    elapsed = time.perf_counter() - started
+    print(f"  {count:>4} pools: {elapsed / orders * 1e6:>8.1f} us/order")
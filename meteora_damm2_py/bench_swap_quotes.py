@@ -0,0 +1,37 @@
+import random
+import timeit
+
+from swap_estimate import get_swap_amount, get_swap_amounts
+
+# Configuration
+amount_count = 5_000
+sqrt_price = 18_446_744_073_709_551_616 * 3
+liquidity = 10**24
+trade_fee_numerator = 2_500_000
+collect_fee_mode = 0
+repeats = 5
+
+amounts = [random.randint(1, 10**12) for _ in range(amount_count)]
+
+for a_to_b in (True, False):
+    scalar = [
+        get_swap_amount(a, sqrt_price, liquidity, trade_fee_numerator, a_to_b, collect_fee_mode)
+        for a in amounts
+    ]
+    batch = get_swap_amounts(amounts, sqrt_price, liquidity, trade_fee_numerator, a_to_b, collect_fee_mode)
+    if scalar != batch:
+        raise SystemExit(f"Batch quotes diverge from get_swap_amount (a_to_b={a_to_b})")
+
+    scalar_time = timeit.timeit(
+        lambda: [
+            get_swap_amount(a, sqrt_price, liquidity, trade_fee_numerator, a_to_b, collect_fee_mode)
+            for a in amounts
+        ],
+        number=repeats,
+    )
+    batch_time = timeit.timeit(
+        lambda: get_swap_amounts(amounts, sqrt_price, liquidity, trade_fee_numerator, a_to_b, collect_fee_mode),
+        number=repeats,
+    )
+    total = amount_count * repeats
+    print(f"a_to_b={a_to_b!s:<5} scalar {total / scalar_time:>12,.0f} quotes/s   batch {total / batch_time:>12,.0f} quotes/s")
@@ -0,0 +1,233 @@
+import base64
+import contextlib
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from solana.rpc.api import Client
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from blockhash_cache import BlockhashCache
+from meteora_damm2 import buy
+from pool_cache import PoolCache
+from pool_state import POOL_ACCOUNT_SIZE, POOL_FEES_OFFSET, POOL_FEES_STRUCT, POOL_HOT_OFFSET, POOL_HOT_STRUCT
+from trade_executor import TokenBucket, TradeExecutor
+
+# Configuration
+wallets = 64
+duration = 10.0
+# Trades offered per second, above what the endpoint's limit can carry.
+offered_rate = 80
+# The stand-in answers 429 above this many requests per second, like a paid RPC plan.
+server_rate = 200
+server_latency_ms = 20
+# Executor limits, kept just under the server's.
+client_rate = 180
+max_concurrency = 32
+max_workers = 64
+max_queue = 400
+# Jobs queued for a single wallet ahead of everyone else's, on a small pool.
+burst_jobs = 50
+burst_workers = 8
+
+POOL_DISCRIMINATOR = bytes([241, 154, 109, 4, 17, 177, 109, 188])
+U64 = (1 << 64) - 1
+SQRT_MIN_PRICE = 4295048016
+SQRT_MAX_PRICE = 79226673521066979257578248091
+
+def synthetic_pool_data():
+    data = bytearray(POOL_ACCOUNT_SIZE)
+    data[:8] = POOL_DISCRIMINATOR
+    liquidity, sqrt_price = 2**64 * 10**14, int(2**64 * 0.001 ** 0.5)
+    POOL_HOT_STRUCT.pack_into(
+        data, POOL_HOT_OFFSET, *[bytes(Pubkey.new_unique()) for _ in range(6)],
+        liquidity & U64, liquidity >> 64, 0, 0, 0, 0, 0, 0,
+        SQRT_MIN_PRICE, 0, SQRT_MAX_PRICE & U64, SQRT_MAX_PRICE >> 64,
+        sqrt_price & U64, sqrt_price >> 64, 0,
+        0, 0, 0, 0, 0, 0,
+    )
+    POOL_FEES_STRUCT.pack_into(data, POOL_FEES_OFFSET, 2_500_000, 0, *([0] * 42))
+    return bytes(data)
+
+class StandInRpc:
+    # Just enough JSON-RPC for a buy: every transaction confirms on the first status poll.
+    def __init__(self, rate, latency_ms):
+        self.pool = Pubkey.new_unique()
+        self.pool_data = synthetic_pool_data()
+        self.limit = TokenBucket(rate)
+        self.latency = latency_ms / 1000
+        self.requests = 0
+        self.throttled = 0
+        self.sent = 0
+        self.slot = 1
+        self._lock = threading.Lock()
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(outer.latency)
+                with outer._lock:
+                    outer.requests += 1
+                if outer.limit.acquire(timeout=0) is None:
+                    with outer._lock:
+                        outer.throttled += 1
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0.2")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": outer.answer(body)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def answer(self, body):
+        method, params = body["method"], body.get("params", [])
+        context = {"slot": self.slot}
+        if method == "getAccountInfo":
+            data = self.pool_data
+            config = params[1] if len(params) > 1 else {}
+            if config.get("dataSlice"):
+                offset, length = config["dataSlice"]["offset"], config["dataSlice"]["length"]
+                data = data[offset:offset + length]
+            value = {
+                "data": [base64.b64encode(data).decode(), "base64"],
+                "executable": False,
+                "lamports": 10**9,
+                "owner": str(Pubkey.default()),
+                "rentEpoch": 0,
+                "space": len(data),
+            }
+            return {"context": context, "value": value}
+        if method == "getTokenAccountsByOwner":
+            return {"context": context, "value": []}
+        if method == "getMinimumBalanceForRentExemption":
+            return 2039280
+        if method == "getLatestBlockhash":
+            return {"context": context, "value": {"blockhash": str(Hash.new_unique()), "lastValidBlockHeight": 10**6}}
+        if method == "sendTransaction":
+            with self._lock:
+                self.sent += 1
+            txn = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+            return str(txn.signatures[0])
+        if method == "getSignatureStatuses":
+            status = {"slot": self.slot, "confirmations": None, "err": None, "confirmationStatus": "confirmed", "status": {"Ok": None}}
+            return {"context": context, "value": [status for _ in params[0]]}
+        if method == "getBlockHeight":
+            return 1
+        raise ValueError(f"Stand-in does not serve {method}")
+
+    def reset(self, rate):
+        with self._lock:
+            self.limit = TokenBucket(rate)
+            self.requests = self.throttled = self.sent = 0
+
+def offer(submit):
+    # Paced submission at offered_rate for duration seconds.
+    keypairs = [Keypair() for _ in range(wallets)]
+    started = time.monotonic()
+    count = 0
+    while time.monotonic() - started < duration:
+        submit(keypairs[count % wallets])
+        count += 1
+        time.sleep(max(0.0, started + count / offered_rate - time.monotonic()))
+    return count
+
+def report(title, rpc, elapsed, confirmed, offered):
+    print(title)
+    print(
+        f"  offered {offered} trades in {duration:.0f}s, confirmed {confirmed} "
+        f"({confirmed / elapsed:.1f} trades/s over {elapsed:.1f}s)"
+    )
+    print(f"  server saw {rpc.requests} requests ({rpc.requests / elapsed:.0f}/s), answered {rpc.throttled} with 429")
+
+rpc = StandInRpc(server_rate, server_latency_ms)
+pool_str = str(rpc.pool)
+
+# Baseline: one thread per trade against the bare endpoint, no shared limit
+client = Client(rpc.url, timeout=10)
+blockhash_cache = BlockhashCache(client).start()
+pool_cache = PoolCache(client)
+threads = ThreadPoolExecutor(max_workers=max_workers)
+futures = []
+started = time.monotonic()
+with contextlib.redirect_stdout(io.StringIO()):
+    offered = offer(lambda kp: futures.append(
+        threads.submit(buy, client, kp, pool_str, 0.01, pool_cache=pool_cache, blockhash_cache=blockhash_cache)
+    ))
+    confirmed = sum(1 for f in futures if f.result())
+elapsed = time.monotonic() - started
+threads.shutdown()
+blockhash_cache.stop()
+report("Unlimited thread pool", rpc, elapsed, confirmed, offered)
+
+# Executor: token bucket and concurrency cap per endpoint, bounded queue
+rpc.reset(server_rate)
+executor = TradeExecutor(
+    [rpc.url],
+    max_workers=max_workers,
+    rate=client_rate,
+    max_concurrency=max_concurrency,
+    max_queue=max_queue,
+).start()
+futures = []
+started = time.monotonic()
+with contextlib.redirect_stdout(io.StringIO()):
+    offered = offer(lambda kp: futures.append(executor.buy(kp, pool_str, 0.01)))
+    confirmed = sum(1 for f in futures if f is not None and f.result().confirmed)
+elapsed = time.monotonic() - started
+executor.shutdown()
+report("TradeExecutor", rpc, elapsed, confirmed, offered)
+metrics = executor.metrics()
+endpoint = metrics["endpoints"][rpc.url]
+print(
+    f"  completed {metrics['completed']}, confirmed {metrics['confirmed']}, failed {metrics['failed']}, "
+    f"rejected {metrics['rejected']} (queue full)"
+)
+print(f"  queue wait ms p50/p90/p99: {'/'.join(f'{v:.0f}' for v in metrics['queue_ms'].values())}")
+print(f"  run ms p50/p90/p99: {'/'.join(f'{v:.0f}' for v in metrics['run_ms'].values())}")
+print(
+    f"  endpoint: {endpoint['calls']} calls, {endpoint['throttled']} throttled, {endpoint['retries']} retries, "
+    f"max in flight {endpoint['max_in_flight']}, token wait ms p99 {endpoint['wait_ms'][99]:.0f}"
+)
+
+# Burst from one wallet: its jobs wait their turn without holding workers
+rpc.reset(server_rate)
+executor = TradeExecutor(
+    [rpc.url],
+    max_workers=burst_workers,
+    rate=client_rate,
+    max_concurrency=max_concurrency,
+    max_queue=max_queue,
+).start()
+burst_keypair = Keypair()
+with contextlib.redirect_stdout(io.StringIO()):
+    burst = [executor.buy(burst_keypair, pool_str, 0.01) for _ in range(burst_jobs)]
+    others = [executor.buy(Keypair(), pool_str, 0.01) for _ in range(wallets)]
+    burst = [f.result() for f in burst]
+    others = [f.result() for f in others]
+executor.shutdown()
+print("One-wallet burst")
+print(f"  {burst_jobs} jobs for one wallet, then one each for {wallets} others, on {burst_workers} workers")
+print(
+    f"  other wallets done within {max(r.queue_ms + r.run_ms for r in others):.0f} ms, "
+    f"the burst within {max(r.queue_ms + r.run_ms for r in burst):.0f} ms"
+)
+print(f"  burst ran in submission order: {[r.queue_ms for r in burst] == sorted(r.queue_ms for r in burst)}")
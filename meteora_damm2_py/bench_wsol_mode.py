@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from solana.rpc.api import Client
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from constants import WSOL_MINT
+from meteora_damm2 import create_quote_token_account_ixs, create_swap_ix
+from pool_utils import fetch_pool_state
+from wsol_account import PersistentWsol
+
+# Configuration
+# Leave rpc as the placeholder to compare transaction sizes only; set rpc,
+# priv_key and pool_str to a funded wallet and live pool to simulate CU too.
+priv_key = "base58_priv_str_here"
+rpc = "rpc_url_here"
+pool_str = "meteora_damm2_address"
+quote_amount_in = 10_000_000
+quote_rent = 2_039_280
+
+simulate = rpc != "rpc_url_here"
+client = Client(rpc) if simulate else None
+payer_keypair = Keypair.from_base58_string(priv_key) if simulate else Keypair()
+payer = payer_keypair.pubkey()
+if simulate:
+    pool_state = fetch_pool_state(client, pool_str)
+else:
+    pool_state = SimpleNamespace(
+        pool=Pubkey.new_unique(),
+        token_a_vault=Pubkey.new_unique(),
+        token_b_vault=Pubkey.new_unique(),
+        token_a_mint=Pubkey.new_unique(),
+        token_b_mint=WSOL_MINT,
+    )
+base_token_account = Pubkey.new_unique()
+
+
+def build(quote_token_account, quote_account_ixs, close_ix):
+    instructions = [
+        set_compute_unit_limit(200_000),
+        set_compute_unit_price(1_000_000),
+        *quote_account_ixs,
+        create_swap_ix(pool_state, payer, quote_token_account, base_token_account, quote_amount_in, 0),
+    ]
+    if close_ix:
+        instructions.append(close_ix)
+    blockhash = client.get_latest_blockhash().value.blockhash if simulate else Hash.new_unique()
+    return VersionedTransaction(MessageV0.try_compile(payer, instructions, [], blockhash), [payer_keypair])
+
+
+wsol = PersistentWsol(client, payer)
+wsol.exists = True
+wsol.balance = quote_amount_in
+shapes = {
+    "create/close": create_quote_token_account_ixs(payer, WSOL_MINT, quote_rent + quote_amount_in),
+    "wsol": wsol.quote_account_ixs(quote_amount_in),
+}
+wsol.balance = 0
+shapes["wsol + top-up"] = wsol.quote_account_ixs(quote_amount_in)
+
+baseline = None
+for name, (account, ixs, close_ix) in shapes.items():
+    txn = build(account, ixs, close_ix)
+    size = len(bytes(txn))
+    instruction_count = len(txn.message.instructions)
+    line = f"{name:>14}: {size} bytes, {instruction_count} instructions"
+    if simulate:
+        units = client.simulate_transaction(txn).value.units_consumed
+        line += f", {units} CU"
+    if baseline is None:
+        baseline = size
+    else:
+        line += f" ({size - baseline:+d} bytes)"
+    print(line)
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Confirmed
+from solders.hash import Hash  # type: ignore
+
+
+class RecentBlockhash(NamedTuple):
+    blockhash: Hash
+    last_valid_block_height: int
+    slot: int
+    fetched_at: float
+
+    def age_ms(self) -> float:
+        return (time.monotonic() - self.fetched_at) * 1000
+
+
+def to_recent_blockhash(resp) -> RecentBlockhash:
+    return RecentBlockhash(
+        blockhash=resp.value.blockhash,
+        last_valid_block_height=resp.value.last_valid_block_height,
+        slot=resp.context.slot,
+        fetched_at=time.monotonic(),
+    )
+
+
+class BlockhashCache:
+    def __init__(
+        self,
+        client: Client,
+        refresh_interval: float = 2.0,
+        max_age_ms: float = 10_000,
+        commitment: Commitment = Confirmed,
+    ):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.max_age_ms = max_age_ms
+        self.commitment = commitment
+        self.latest: Optional[RecentBlockhash] = None
+        self.refresh_errors = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> RecentBlockhash:
+        latest = to_recent_blockhash(self.client.get_latest_blockhash(self.commitment))
+        self.latest = latest
+        return latest
+
+    def get(self, max_age_ms: Optional[float] = None) -> RecentBlockhash:
+        max_age_ms = self.max_age_ms if max_age_ms is None else max_age_ms
+        latest = self.latest
+        if latest is None or latest.age_ms() > max_age_ms:
+            return self.refresh()
+        return latest
+
+    def start(self) -> "BlockhashCache":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="blockhash-cache", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.refresh_errors += 1
+                print("Blockhash refresh failed:", e)
+            self._stop.wait(self.refresh_interval)
+
+
+class AsyncBlockhashCache:
+    def __init__(
+        self,
+        client: AsyncClient,
+        refresh_interval: float = 2.0,
+        max_age_ms: float = 10_000,
+        commitment: Commitment = Confirmed,
+    ):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.max_age_ms = max_age_ms
+        self.commitment = commitment
+        self.latest: Optional[RecentBlockhash] = None
+        self.refresh_errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> RecentBlockhash:
+        latest = to_recent_blockhash(await self.client.get_latest_blockhash(self.commitment))
+        self.latest = latest
+        return latest
+
+    async def get(self, max_age_ms: Optional[float] = None) -> RecentBlockhash:
+        max_age_ms = self.max_age_ms if max_age_ms is None else max_age_ms
+        latest = self.latest
+        if latest is None or latest.age_ms() > max_age_ms:
+            return await self.refresh()
+        return latest
+
+    def start(self) -> "AsyncBlockhashCache":
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.refresh_errors += 1
+                print("Blockhash refresh failed:", e)
+            await asyncio.sleep(self.refresh_interval)
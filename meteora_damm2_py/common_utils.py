@@ -1,12 +1,37 @@
-import json
-import time
+import warnings
+from typing import Any, List, Optional
 
 from solana.rpc.api import Client
-from solana.rpc.commitment import Confirmed, Processed
+from solana.rpc.commitment import Processed
 from solana.rpc.types import TokenAccountOpts
 
 from solders.pubkey import Pubkey  # type: ignore
 from solders.signature import Signature  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from confirmation import ConfirmationResult, rebroadcast_until_expiry, wait_for_signature
+
+def rpc_request(client: Client, method: str, params: list) -> Any:
+    # For methods solana-py has no wrapper for. The provider's extra_headers
+    # carry the auth on paid RPCs, so they go with the request.
+    provider = client._provider
+    resp = provider.session.post(
+        provider.endpoint_uri,
+        headers={"Content-Type": "application/json", **(provider.extra_headers or {})},
+        json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params},
+    )
+    resp.raise_for_status()
+    body = resp.json()
+    if "error" in body:
+        raise RuntimeError(f"{method} failed: {body['error']}")
+    return body["result"]
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
 
 def get_token_balance(client: Client, pub_key: Pubkey, mint: Pubkey) -> float | None:
     response = client.get_token_accounts_by_owner_json_parsed(
@@ -23,31 +48,46 @@ def get_token_balance(client: Client, pub_key: Pubkey, mint: Pubkey) -> float |
                 return int(token_amount)
     return None
 
-def confirm_txn(client: Client, txn_sig: Signature, max_retries: int = 20, retry_interval: int = 3) -> bool:
-    retries = 1
-    
-    while retries < max_retries:
-        try:
-            txn_res = client.get_transaction(
-                txn_sig, 
-                encoding="json", 
-                commitment=Confirmed, 
-                max_supported_transaction_version=0)
-            
-            txn_json = json.loads(txn_res.value.transaction.meta.to_json())
-            
-            if txn_json['err'] is None:
-                print("Transaction confirmed... try count:", retries)
-                return True
-            
-            print("Error: Transaction not confirmed. Retrying...")
-            if txn_json['err']:
-                print("Transaction failed.")
-                return False
-        except Exception as e:
-            print("Awaiting confirmation... try count:", retries)
-            retries += 1
-            time.sleep(retry_interval)
-    
-    print("Max retries reached. Transaction confirmation failed.")
-    return None
+def confirm_txn(
+    client: Client,
+    txn_sig: Signature,
+    max_retries: Optional[int] = None,
+    retry_interval: Optional[float] = None,
+    *,
+    last_valid_block_height: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> bool:
+    # max_retries and retry_interval are the old polling parameters, still
+    # accepted so existing positional calls keep their meaning.
+    if max_retries is not None or retry_interval is not None:
+        warnings.warn(
+            "confirm_txn max_retries and retry_interval are deprecated, pass timeout instead",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        if timeout is None:
+            timeout = (max_retries or 20) * (retry_interval or 3)
+    result = wait_for_signature(client, txn_sig, last_valid_block_height, timeout=timeout or 90)
+    return report_confirmation(result)
+
+def rebroadcast_txn(
+    client: Client,
+    txn: VersionedTransaction,
+    last_valid_block_height: int,
+    interval_ms: float = 500,
+    timeout: float = 90,
+) -> bool:
+    result = rebroadcast_until_expiry(client, txn, last_valid_block_height, interval_ms, timeout=timeout)
+    return report_confirmation(result)
+
+def report_confirmation(result: ConfirmationResult) -> bool:
+    if result.status in ("confirmed", "finalized"):
+        print(f"Transaction confirmed... processed in {result.processed_ms:.0f} ms, confirmed in {result.confirmed_ms:.0f} ms")
+        return True
+    if result.status == "failed":
+        print("Transaction failed:", result.err)
+    elif result.status == "expired":
+        print("Blockhash expired before the transaction landed.")
+    else:
+        print("Transaction confirmation timed out. Last status:", result.status)
+    return False
@@ -0,0 +1,283 @@
+import asyncio
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Confirmed, Finalized, Processed
+from solana.rpc.types import TxOpts
+from solana.rpc.websocket_api import connect
+from solders.commitment_config import CommitmentLevel  # type: ignore
+from solders.rpc.responses import SignatureNotification, SubscriptionResult  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+from solders.transaction_status import TransactionConfirmationStatus, TransactionStatus  # type: ignore
+
+LEVELS = ("processed", "confirmed", "finalized")
+COMMITMENT_LEVEL = {Processed: 0, Confirmed: 1, Finalized: 2}
+# solders enums are not hashable, so these are keyed by their int values.
+STATUS_LEVEL = {
+    int(TransactionConfirmationStatus.Processed): 0,
+    int(TransactionConfirmationStatus.Confirmed): 1,
+    int(TransactionConfirmationStatus.Finalized): 2,
+}
+WS_LEVEL = {
+    int(CommitmentLevel.Processed): 0,
+    int(CommitmentLevel.Confirmed): 1,
+    int(CommitmentLevel.Finalized): 2,
+}
+# Resends carry their own retry schedule, so the RPC node must not add one.
+REBROADCAST_OPTS = TxOpts(skip_preflight=True, max_retries=0)
+SLOT_MS = 400
+
+
+class ConfirmationResult(NamedTuple):
+    signature: Signature
+    # One of LEVELS, or "failed", "expired" or "timeout".
+    status: str
+    err: Optional[str]
+    processed_ms: Optional[float]
+    confirmed_ms: Optional[float]
+    finalized_ms: Optional[float]
+
+    @property
+    def landed(self) -> bool:
+        return self.status in LEVELS
+
+
+class ConfirmationProgress:
+    def __init__(self, started: float, target: int):
+        self.started = started
+        self.target = target
+        self.times: List[Optional[float]] = [None, None, None]
+        self.err: Optional[str] = None
+
+    def mark(self, level: int, err=None) -> None:
+        now_ms = (time.perf_counter() - self.started) * 1000
+        for i in range(level + 1):
+            if self.times[i] is None:
+                self.times[i] = now_ms
+        if err is not None:
+            self.err = str(err)
+
+    def mark_status(self, status: TransactionStatus) -> None:
+        # Rooted transactions report no confirmation status.
+        if status.confirmation_status is None:
+            level = 2
+        else:
+            level = STATUS_LEVEL[int(status.confirmation_status)]
+        self.mark(level, status.err)
+
+    def done(self) -> bool:
+        return self.err is not None or self.times[self.target] is not None
+
+    def result(self, signature: Signature, status: Optional[str] = None) -> ConfirmationResult:
+        if status is None:
+            if self.err is not None:
+                status = "failed"
+            else:
+                reached = [i for i, t in enumerate(self.times) if t is not None]
+                status = LEVELS[reached[-1]]
+        return ConfirmationResult(signature, status, self.err, *self.times)
+
+
+def wait_for_signature(
+    client: Client,
+    signature: Signature,
+    last_valid_block_height: Optional[int] = None,
+    commitment: Commitment = Confirmed,
+    timeout: float = 90,
+    sent_at: Optional[float] = None,
+    min_interval: float = 0.2,
+    max_interval: float = 2.0,
+    backoff: float = 1.5,
+) -> ConfirmationResult:
+    progress = ConfirmationProgress(sent_at or time.perf_counter(), COMMITMENT_LEVEL[commitment])
+    deadline = time.monotonic() + timeout
+    interval = min_interval
+
+    poll_errors = 0
+
+    while True:
+        time.sleep(interval)
+        try:
+            status = client.get_signature_statuses([signature]).value[0]
+            if status is not None:
+                progress.mark_status(status)
+                if progress.done():
+                    return progress.result(signature)
+                interval = min_interval
+            elif last_valid_block_height is not None:
+                if client.get_block_height(Confirmed).value > last_valid_block_height:
+                    # It may have landed between the two calls.
+                    status = client.get_signature_statuses([signature]).value[0]
+                    if status is None:
+                        return progress.result(signature, "expired")
+                    progress.mark_status(status)
+                    return progress.result(signature)
+                interval = min(interval * backoff, max_interval)
+            else:
+                interval = min(interval * backoff, max_interval)
+        except Exception as e:
+            # A transient error or 429 says nothing about the transaction, so back off and poll again.
+            poll_errors += 1
+            if poll_errors == 1:
+                print("Confirmation poll failed:", e)
+            interval = min(interval * backoff, max_interval)
+
+        if time.monotonic() > deadline:
+            if any(t is not None for t in progress.times):
+                return progress.result(signature)
+            return progress.result(signature, "timeout")
+
+
+def rebroadcast_until_expiry(
+    client: Client,
+    txn: VersionedTransaction,
+    last_valid_block_height: int,
+    interval_ms: float = 500,
+    commitment: Commitment = Confirmed,
+    timeout: float = 90,
+    sent_at: Optional[float] = None,
+    send: Optional[Callable[[bytes], object]] = None,
+    max_height_interval: float = 2.0,
+) -> ConfirmationResult:
+    signature = txn.signatures[0]
+    raw = bytes(txn)
+    if send is None:
+        send = lambda data: client.send_raw_transaction(data, REBROADCAST_OPTS)
+    progress = ConfirmationProgress(sent_at or time.perf_counter(), COMMITMENT_LEVEL[commitment])
+    deadline = time.monotonic() + timeout
+    interval = interval_ms / 1000
+    next_height_check = 0.0
+    send_errors = 0
+    poll_errors = 0
+
+    while True:
+        time.sleep(interval)
+        try:
+            status = client.get_signature_statuses([signature]).value[0]
+            if status is None:
+                now = time.monotonic()
+                if now >= next_height_check:
+                    block_height = client.get_block_height(Confirmed).value
+                    if block_height > last_valid_block_height:
+                        status = client.get_signature_statuses([signature]).value[0]
+                        if status is None:
+                            return progress.result(signature, "expired")
+                        progress.mark_status(status)
+                        return progress.result(signature)
+                    # Blocks take at least about a slot each, so the height only
+                    # needs reading again once the remaining blocks could be gone.
+                    remaining = last_valid_block_height - block_height
+                    next_height_check = now + min(remaining * SLOT_MS / 2000, max_height_interval)
+        except Exception as e:
+            # Unknown status: keep resending until the deadline or a successful height read says otherwise.
+            poll_errors += 1
+            if poll_errors == 1:
+                print("Confirmation poll failed:", e)
+            status = None
+        if status is not None:
+            # Once it has landed only the commitment level is left to wait for.
+            progress.mark_status(status)
+            if progress.done():
+                return progress.result(signature)
+        else:
+            try:
+                send(raw)
+            except Exception as e:
+                send_errors += 1
+                if send_errors == 1:
+                    print("Rebroadcast failed:", e)
+
+        if time.monotonic() > deadline:
+            if any(t is not None for t in progress.times):
+                return progress.result(signature)
+            return progress.result(signature, "timeout")
+
+
+async def _watch_signature(
+    ws_url: str,
+    signature: Signature,
+    progress: ConfirmationProgress,
+    changed: asyncio.Event,
+) -> None:
+    async with connect(ws_url) as ws:
+        for level in range(progress.target + 1):
+            await ws.signature_subscribe(signature, (Processed, Confirmed, Finalized)[level])
+        while not progress.done():
+            for msg in await ws.recv():
+                if isinstance(msg, SubscriptionResult):
+                    continue
+                if not isinstance(msg, SignatureNotification):
+                    continue
+                request = ws.subscriptions.get(msg.subscription)
+                if request is None:
+                    continue
+                progress.mark(WS_LEVEL[int(request.config.commitment)], msg.result.value.err)
+                changed.set()
+
+
+async def await_signature(
+    client: AsyncClient,
+    signature: Signature,
+    last_valid_block_height: Optional[int] = None,
+    commitment: Commitment = Confirmed,
+    timeout: float = 90,
+    ws_url: Optional[str] = None,
+    sent_at: Optional[float] = None,
+    min_interval: float = 0.2,
+    max_interval: float = 2.0,
+    backoff: float = 1.5,
+) -> ConfirmationResult:
+    progress = ConfirmationProgress(sent_at or time.perf_counter(), COMMITMENT_LEVEL[commitment])
+    deadline = time.monotonic() + timeout
+    changed = asyncio.Event()
+    watcher = None
+    poll_errors = 0
+    # With a websocket doing the work, polling only has to catch a dead socket.
+    interval = min_interval
+    if ws_url:
+        watcher = asyncio.create_task(_watch_signature(ws_url, signature, progress, changed))
+        watcher.add_done_callback(lambda t: t.cancelled() or t.exception())
+        interval = max_interval
+
+    try:
+        while True:
+            if progress.done():
+                return progress.result(signature)
+            if time.monotonic() > deadline:
+                if any(t is not None for t in progress.times):
+                    return progress.result(signature)
+                return progress.result(signature, "timeout")
+
+            try:
+                await asyncio.wait_for(changed.wait(), interval)
+                changed.clear()
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                status = (await client.get_signature_statuses([signature])).value[0]
+                if status is not None:
+                    progress.mark_status(status)
+                    interval = max_interval if watcher else min_interval
+                elif last_valid_block_height is not None:
+                    if (await client.get_block_height(Confirmed)).value > last_valid_block_height:
+                        status = (await client.get_signature_statuses([signature])).value[0]
+                        if status is None:
+                            return progress.result(signature, "expired")
+                        progress.mark_status(status)
+                        return progress.result(signature)
+                    interval = min(interval * backoff, max_interval)
+                else:
+                    interval = min(interval * backoff, max_interval)
+            except Exception as e:
+                poll_errors += 1
+                if poll_errors == 1:
+                    print("Confirmation poll failed:", e)
+                interval = min(interval * backoff, max_interval)
+    finally:
+        if watcher is not None:
+            watcher.cancel()
@@ -5,4 +5,8 @@ TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5
 POOL_AUTHORITY = Pubkey.from_string("HLnpSz9h2S4hiLQ43rnSD9XkcUThA7B8hQMKmDaiTLcC")
 REFERRAL_TOKEN_ACC = Pubkey.from_string("cpamdpZCGKUy5JxQXB4dcpGPiikHawvSWAd6mEn1sGG")
 EVENT_AUTH = Pubkey.from_string("3rmHSu74h1ZcmAisVcWerTCiRDQbUrBKmcwptYGjHfet")
-ACCOUNT_SPACE = 165
\ No newline at end of file
+ACCOUNT_SPACE = 165
+WSOL_MINT = Pubkey.from_string("So11111111111111111111111111111111111111112")
+TOKEN_2022_PROGRAM_ID = Pubkey.from_string("TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb")
+MAX_TRANSACTION_SIZE = 1232
+MAX_TRANSACTION_ACCOUNTS = 64
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solders.compute_budget import set_compute_unit_limit  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+DEFAULT_PROFILE_PATH = "cu_profile.json"
+
+
+class TradeShape(NamedTuple):
+    pool: Pubkey
+    a_to_b: bool
+    # The buy creates the base ATA, or the sell closes the base account.
+    account_ix: bool
+    # "temp" for the create/close quote account. For a persistent WSOL account,
+    # "wsol", "wsol_create", "wsol_top_up" or "wsol_create_top_up" by what the
+    # trade adds to it.
+    quote_mode: str = "temp"
+
+    def key(self) -> str:
+        side = "sell" if self.a_to_b else "buy"
+        key = f"{self.pool}:{side}:{int(self.account_ix)}"
+        if self.quote_mode != "temp":
+            key += f":{self.quote_mode}"
+        return key
+
+
+class CuReport(NamedTuple):
+    shape: str
+    units: int
+    limit: int
+    saved_units: int
+    saved_lamports: float
+
+
+def priority_fee_lamports(units: int, unit_price: int) -> float:
+    return units * unit_price / 1_000_000
+
+
+class CuProfiler:
+    def __init__(
+        self,
+        client: Client,
+        path: Optional[str] = DEFAULT_PROFILE_PATH,
+        margin_bps: int = 1_000,
+        profile_units: int = 200_000,
+    ):
+        self.client = client
+        self.path = path
+        self.margin_bps = margin_bps
+        # Limit used for the profiling simulation, so the swap cannot run out.
+        self.profile_units = profile_units
+        self.units: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self) -> None:
+        with open(self.path) as f:
+            saved = json.load(f)
+        with self._lock:
+            self.units.update({key: entry["units"] for key, entry in saved.items()})
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            saved = {key: {"units": units} for key, units in self.units.items()}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def limit(self, shape: TradeShape) -> Optional[int]:
+        units = self.units.get(shape.key())
+        if units is None:
+            return None
+        return self._with_margin(units)
+
+    def _with_margin(self, units: int) -> int:
+        return -(-units * (10_000 + self.margin_bps) // 10_000)
+
+    def record(self, shape: TradeShape, units: int) -> None:
+        # Keep the highest measurement, since a pool's path can cost more over time.
+        key = shape.key()
+        with self._lock:
+            self.units[key] = max(units, self.units.get(key, 0))
+        self.save()
+
+    def profile(self, shape: TradeShape, txn: VersionedTransaction) -> Optional[int]:
+        started = time.perf_counter()
+        result = self.client.simulate_transaction(txn).value
+        if result.err is not None or not result.units_consumed:
+            print("CU profiling simulation failed:", result.err)
+            return None
+        self.record(shape, result.units_consumed)
+        print(
+            f"Profiled {shape.key()}: {result.units_consumed} CU "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return result.units_consumed
+
+    def apply(
+        self,
+        shape: TradeShape,
+        instructions: List[Instruction],
+        payer_keypair: Keypair,
+        blockhash: Hash,
+    ) -> List[Instruction]:
+        # instructions[0] must be the set_compute_unit_limit instruction.
+        limit = self.limit(shape)
+        if limit is None:
+            probe = [set_compute_unit_limit(self.profile_units), *instructions[1:]]
+            message = MessageV0.try_compile(payer_keypair.pubkey(), probe, [], blockhash)
+            if self.profile(shape, VersionedTransaction(message, [payer_keypair])) is None:
+                return instructions
+            limit = self.limit(shape)
+        return [set_compute_unit_limit(limit), *instructions[1:]]
+
+    def report(self, default_units: int = 100_000, unit_price: int = 1_000_000) -> List[CuReport]:
+        rows = []
+        with self._lock:
+            profiled = sorted(self.units.items())
+        for key, units in profiled:
+            limit = self._with_margin(units)
+            saved = default_units - limit
+            rows.append(CuReport(key, units, limit, saved, priority_fee_lamports(saved, unit_price)))
+        return rows
+
+    def print_report(self, default_units: int = 100_000, unit_price: int = 1_000_000) -> None:
+        print(f"CU savings against a flat {default_units} CU limit at {unit_price} micro-lamports/CU")
+        for row in self.report(default_units, unit_price):
+            print(
+                f"{row.shape}: used {row.units}, limit {row.limit}, "
+                f"saved {row.saved_units} CU / {row.saved_lamports:.0f} lamports per trade"
+            )
@@ -0,0 +1,235 @@
+import asyncio
+import base64
+import binascii
+import json
+import struct
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Confirmed
+from solana.rpc.websocket_api import SolanaWsClientProtocol, connect
+from solders.rpc.config import RpcTransactionLogsFilterMentions  # type: ignore
+from solders.rpc.responses import LogsNotification  # type: ignore
+from solders.signature import Signature  # type: ignore
+
+from constants import METEORA_DAMM2_PROGRAM
+from idl_codec import Decoder, IdlCompiler, b58decode
+
+EVENT_DISCRIMINATOR_SIZE = 8
+# Anchor's emit_cpi! prefixes the self-CPI instruction data with this tag.
+EVENT_IX_TAG = bytes.fromhex("e445a52e51cb9a1d")
+PROGRAM_DATA_PREFIX = "Program data: "
+PROGRAM_INVOKE = f"Program {METEORA_DAMM2_PROGRAM} invoke"
+
+EventCallback = Callable[[Any, Signature, int], None]
+
+
+class EventDecoder:
+    def __init__(self, compiler: Optional[IdlCompiler] = None):
+        self.compiler = compiler or IdlCompiler()
+        self.decoders: Dict[bytes, Decoder] = {
+            bytes(event["discriminator"]): self.compiler.decoder(event["name"])
+            for event in self.compiler.idl["events"]
+        }
+        self.classes = self.compiler.classes
+
+    def decode(self, data: bytes) -> Optional[Any]:
+        decode = self.decoders.get(data[:EVENT_DISCRIMINATOR_SIZE])
+        if decode is None:
+            return None
+        try:
+            return decode(data, EVENT_DISCRIMINATOR_SIZE)
+        except struct.error:
+            return None
+
+    def decode_cpi(self, data: bytes) -> Optional[Any]:
+        if data[:EVENT_DISCRIMINATOR_SIZE] != EVENT_IX_TAG:
+            return None
+        return self.decode(data[EVENT_DISCRIMINATOR_SIZE:])
+
+    def decode_log(self, line: str) -> Optional[Any]:
+        if not line.startswith(PROGRAM_DATA_PREFIX):
+            return None
+        try:
+            data = base64.b64decode(line[len(PROGRAM_DATA_PREFIX):])
+        except binascii.Error:
+            return None
+        return self.decode(data)
+
+    def decode_logs(self, logs: List[str]) -> List[Any]:
+        events = []
+        for line in logs:
+            if line.startswith(PROGRAM_DATA_PREFIX):
+                event = self.decode_log(line)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def decode_transaction(self, tx) -> List[Any]:
+        # Takes a get_transaction(..., "json") result and reads emit_cpi! events
+        # from the DAMM2 self-CPIs in the inner instructions.
+        meta = tx.transaction.meta
+        if meta is None or not meta.inner_instructions:
+            return []
+        account_keys = list(tx.transaction.transaction.message.account_keys)
+        if meta.loaded_addresses is not None:
+            account_keys += meta.loaded_addresses.writable + meta.loaded_addresses.readonly
+        events = []
+        for inner in meta.inner_instructions:
+            for ix in inner.instructions:
+                if account_keys[ix.program_id_index] != METEORA_DAMM2_PROGRAM:
+                    continue
+                event = self.decode_cpi(b58decode(ix.data))
+                if event is not None:
+                    events.append(event)
+        return events
+
+
+class EventStream:
+    def __init__(
+        self,
+        ws_url: str,
+        client: Optional[AsyncClient] = None,
+        decoder: Optional[EventDecoder] = None,
+        commitment: Commitment = Confirmed,
+        record_path: Optional[str] = None,
+        reconnect_delay: float = 0.25,
+        max_reconnect_delay: float = 10.0,
+        max_fetches: int = 8,
+        max_pending_fetches: int = 1_000,
+    ):
+        self.ws_url = ws_url
+        # With a client, transactions whose events were emitted by CPI rather
+        # than logged are fetched and decoded from their inner instructions.
+        self.client = client
+        self.decoder = decoder or EventDecoder()
+        self.commitment = commitment
+        self.record_path = record_path
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        # At most max_fetches transactions are fetched at once. Once
+        # max_pending_fetches are waiting, new ones are dropped rather than
+        # piling up RPC calls behind a busy program.
+        self.max_fetches = max_fetches
+        self.max_pending_fetches = max_pending_fetches
+        self.reconnects = 0
+        self.notifications = 0
+        self.events = 0
+        self.fetches = 0
+        self.dropped = 0
+        self._fetch_queue: Optional[asyncio.Queue] = None
+        self._queued: Set[Signature] = set()
+        self._callbacks: List[EventCallback] = []
+        self._record = None
+        self._ws: Optional[SolanaWsClientProtocol] = None
+        self._running = False
+
+    def on_event(self, callback: EventCallback) -> None:
+        self._callbacks.append(callback)
+
+    async def run(self) -> None:
+        self._running = True
+        delay = self.reconnect_delay
+        if self.record_path:
+            self._record = open(self.record_path, "a")
+        workers = []
+        if self.client is not None:
+            self._fetch_queue = asyncio.Queue(self.max_pending_fetches)
+            workers = [asyncio.ensure_future(self._fetch_worker(self._fetch_queue)) for _ in range(self.max_fetches)]
+        try:
+            while self._running:
+                try:
+                    async with connect(self.ws_url) as ws:
+                        self._ws = ws
+                        await ws.logs_subscribe(
+                            RpcTransactionLogsFilterMentions(METEORA_DAMM2_PROGRAM),
+                            self.commitment,
+                        )
+                        delay = self.reconnect_delay
+                        while self._running:
+                            for msg in await ws.recv():
+                                self._handle(msg)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if not self._running:
+                        break
+                    print("Event stream disconnected:", e)
+                finally:
+                    self._ws = None
+                if self._running:
+                    self.reconnects += 1
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self._fetch_queue = None
+            self._queued.clear()
+            if self._record is not None:
+                self._record.close()
+                self._record = None
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+
+    def _handle(self, msg) -> None:
+        if not isinstance(msg, LogsNotification):
+            return
+        value = msg.result.value
+        slot = msg.result.context.slot
+        self.notifications += 1
+        # A failed transaction's events were rolled back with it.
+        if value.err is not None:
+            return
+        if self._record is not None:
+            self._record.write(json.dumps({"signature": str(value.signature), "slot": slot, "logs": value.logs}) + "\n")
+
+        events = self.decoder.decode_logs(value.logs)
+        if events:
+            self._dispatch(events, value.signature, slot)
+        elif self._fetch_queue is not None and any(line.startswith(PROGRAM_INVOKE) for line in value.logs):
+            self._queue_fetch(value.signature, slot)
+
+    def _queue_fetch(self, signature: Signature, slot: int) -> None:
+        # A signature seen again, e.g. after a reconnect, is fetched once.
+        if signature in self._queued:
+            return
+        try:
+            self._fetch_queue.put_nowait((signature, slot))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1:
+                print("Event fetch queue full, dropping transactions")
+            return
+        self._queued.add(signature)
+
+    async def _fetch_worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            signature, slot = await queue.get()
+            try:
+                await self._fetch(signature, slot)
+            finally:
+                self._queued.discard(signature)
+
+    async def _fetch(self, signature: Signature, slot: int) -> None:
+        try:
+            resp = await self.client.get_transaction(signature, "json", Confirmed, 0)
+            self.fetches += 1
+            if resp.value is not None:
+                self._dispatch(self.decoder.decode_transaction(resp.value), signature, slot)
+        except Exception as e:
+            print("Event transaction fetch failed:", e)
+
+    def _dispatch(self, events: List[Any], signature: Signature, slot: int) -> None:
+        for event in events:
+            self.events += 1
+            for callback in self._callbacks:
+                try:
+                    result = callback(event, signature, slot)
+                    if asyncio.iscoroutine(result):
+                        asyncio.ensure_future(result)
+                except Exception as e:
+                    print("Event callback error:", e)
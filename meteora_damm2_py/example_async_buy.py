@@ -0,0 +1,34 @@
+import asyncio
+
+from solders.keypair import Keypair  # type: ignore
+
+from async_common_utils import close_async_clients, get_async_client
+from async_meteora_damm2 import buy
+from async_pool_utils import fetch_pool_from_rpc
+
+# Configuration
+priv_key = "base58_priv_str_here"
+rpc = "rpc_url_here"
+mint_strs = ["meteora_damm2_address"]
+sol_in = 0.01
+unit_budget = 100_000
+unit_price = 1_000_000
+
+async def buy_mint(client, payer_keypair, mint_str):
+    pool_str = await fetch_pool_from_rpc(client, mint_str)
+    if not pool_str:
+        print("No pair address found for", mint_str)
+        return False
+    return await buy(client, payer_keypair, pool_str, sol_in, unit_budget, unit_price, base_mint=mint_str)
+
+async def main():
+    client = await get_async_client(rpc)
+    payer_keypair = Keypair.from_base58_string(priv_key)
+    try:
+        # Every buy shares the same pooled HTTP session.
+        results = await asyncio.gather(*(buy_mint(client, payer_keypair, m) for m in mint_strs))
+        print("Results:", results)
+    finally:
+        await close_async_clients()
+
+asyncio.run(main())
@@ -0,0 +1,22 @@
+from solana.rpc.api import Client
+from solders.keypair import Keypair  # type: ignore
+
+from position_fees import claim_position_fees, scan_positions
+
+# Configuration
+priv_key = "base58_priv_str_here"
+rpc = "rpc_url_here"
+unit_price = 1_000_000
+
+# Initialize client and keypair
+client = Client(rpc)
+payer_keypair = Keypair.from_base58_string(priv_key)
+
+# Unclaimed fees are computed locally from the pool's fee per liquidity
+for position in scan_positions(client, payer_keypair.pubkey()):
+    print(f"{position.position}: fee_a {position.fee_a}, fee_b {position.fee_b}")
+
+# Claims are packed into as few transactions as fit and sent in parallel
+results = claim_position_fees(client, payer_keypair, unit_price)
+for result in results:
+    print(result.signature, result.status)
@@ -0,0 +1,43 @@
+from solana.rpc.api import Client
+from solders.keypair import Keypair  # type: ignore
+
+from nonce_pool import NoncePool
+from pool_utils import fetch_pool_from_rpc
+from presigned_trades import PresignedTrader
+from trade_context import build_trade_context
+
+# Configuration
+priv_key = "base58_priv_str_here"
+rpc = "rpc_url_here"
+mint_str = "meteora_damm2_address"
+buy_sizes = [0.01, 0.05]
+sell_percentages = [50, 100]
+unit_budget = 100_000
+unit_price = 1_000_000
+
+# Initialize client and keypair
+client = Client(rpc)
+payer_keypair = Keypair.from_base58_string(priv_key)
+
+pool_str = fetch_pool_from_rpc(client, mint_str)
+
+if pool_str:
+    ctx = build_trade_context(client, payer_keypair, pool_str, unit_budget=unit_budget, unit_price=unit_price)
+    trader = PresignedTrader(ctx, NoncePool(client, payer_keypair), buy_sizes, sell_percentages)
+    # Creates any missing nonce accounts, then signs every planned trade
+    while trader.tick():
+        pass
+    # Keeps the transactions signed against fresh prices from here on
+    trader.start()
+
+    # At trigger time the send is a pure network write
+    result = trader.fire_buy(buy_sizes[0])
+    if result:
+        print("Transaction Signature:", result.signature)
+        print("Transaction confirmed:", result.confirmed)
+        print(f"Decision to send: {result.build_ms:.3f} ms, send ack: {result.send_ms:.2f} ms")
+    print(trader.stats())
+    trader.stop()
+    ctx.close()
+else:
+    print("No pair address found...")
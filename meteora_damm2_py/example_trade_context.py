@@ -0,0 +1,30 @@
+from solana.rpc.api import Client
+from solders.keypair import Keypair  # type: ignore
+
+from pool_utils import fetch_pool_from_rpc
+from trade_context import build_trade_context, buy
+
+# Configuration
+priv_key = "base58_priv_str_here"
+rpc = "rpc_url_here"
+mint_str = "meteora_damm2_address"
+sol_in = 0.01
+unit_budget = 100_000
+unit_price = 1_000_000
+
+# Initialize client and keypair
+client = Client(rpc)
+payer_keypair = Keypair.from_base58_string(priv_key)
+
+# Resolve everything up front so the trade itself makes no RPC calls before sending
+pool_str = fetch_pool_from_rpc(client, mint_str)
+
+if pool_str:
+    ctx = build_trade_context(client, payer_keypair, pool_str, unit_budget=unit_budget, unit_price=unit_price)
+    result = buy(ctx, sol_in)
+    print("Transaction Signature:", result.signature)
+    print("Transaction confirmed:", result.confirmed)
+    print(f"Decision to send: {result.build_ms:.2f} ms, send ack: {result.send_ms:.2f} ms")
+    ctx.close()
+else:
+    print("No pair address found...")
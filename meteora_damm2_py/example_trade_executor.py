@@ -0,0 +1,27 @@
+from solders.keypair import Keypair  # type: ignore
+
+from trade_executor import TradeExecutor
+
+# Configuration
+priv_keys = ["base58_priv_str_here", "base58_priv_str_here"]
+rpcs = ["rpc_url_here"]
+pool_str = "meteora_damm2_address"
+sol_in = 0.01
+# Requests per second and calls in flight allowed on each endpoint
+rate = 10
+max_concurrency = 8
+
+keypairs = [Keypair.from_base58_string(k) for k in priv_keys]
+executor = TradeExecutor(rpcs, max_workers=16, rate=rate, max_concurrency=max_concurrency).start()
+
+# Each wallet's trades run one at a time; different wallets run in parallel
+futures = [executor.buy(keypair, pool_str, sol_in) for keypair in keypairs]
+for future in futures:
+    if future is None:
+        print("Rejected: executor queue is full")
+        continue
+    result = future.result()
+    print(result.wallet, "confirmed:", result.confirmed, f"queued {result.queue_ms:.0f} ms, ran {result.run_ms:.0f} ms")
+
+print(executor.metrics())
+executor.shutdown()
@@ -0,0 +1,218 @@
+import json
+import os
+import struct
+from typing import Any, Callable, Dict, List, Optional
+
+from solders.pubkey import Pubkey  # type: ignore
+
+IDL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "idl.json")
+
+PRIMITIVE_FORMATS = {
+    "u8": "B",
+    "i8": "b",
+    "bool": "?",
+    "u16": "H",
+    "i16": "h",
+    "u32": "I",
+    "i32": "i",
+    "u64": "Q",
+    "i64": "q",
+}
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE58_INDEX = {c: i for i, c in enumerate(BASE58_ALPHABET)}
+
+Decoder = Callable[[bytes, int], Any]
+
+
+def load_idl(path: str = IDL_PATH) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def b58decode(value: str) -> bytes:
+    # solders only decodes fixed-size keys, and instruction data has any length.
+    number = 0
+    for char in value:
+        number = number * 58 + BASE58_INDEX[char]
+    decoded = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    padding = len(value) - len(value.lstrip("1"))
+    return b"\x00" * padding + decoded
+
+
+def b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, digit = divmod(number, 58)
+        encoded = BASE58_ALPHABET[digit] + encoded
+    padding = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * padding + encoded
+
+
+class IdlRecord:
+    # Base for the generated record classes, which only add __slots__ and __init__.
+    __slots__ = ()
+    _fields: tuple = ()
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self._fields
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+def record_class(name: str, fields: List[str]) -> type:
+    fields = tuple(fields)
+    assignments = "".join(f"\n        self.{field} = {field}" for field in fields) or "\n        pass"
+    source = (
+        f"class {name}(IdlRecord):\n"
+        f"    __slots__ = {fields!r}\n"
+        f"    _fields = {fields!r}\n\n"
+        f"    def __init__(self, {', '.join(fields)}):{assignments}\n"
+    )
+    namespace = {"IdlRecord": IdlRecord}
+    exec(compile(source, f"<idl-record:{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def _defined_name(ty: dict) -> str:
+    defined = ty["defined"]
+    return defined["name"] if isinstance(defined, dict) else defined
+
+
+class _Codegen:
+    # Emits straight-line Python for one type: runs of fixed-size fields are
+    # merged into a single precompiled struct, and only options and vecs branch.
+    def __init__(self, compiler: "IdlCompiler"):
+        self.compiler = compiler
+        self.lines: List[str] = []
+        self.indent = 1
+        self.fmt: List[str] = []
+        self.targets: List[str] = []
+        self.dynamic = False
+        self.size = 0
+
+    def var(self) -> str:
+        self.compiler.var_count += 1
+        return f"v{self.compiler.var_count}"
+
+    def emit(self, line: str) -> None:
+        self.lines.append("    " * self.indent + line)
+
+    def leaf(self, fmt: str) -> str:
+        name = self.var()
+        self.fmt.append(fmt)
+        self.targets.append(name)
+        return name
+
+    def flush(self) -> None:
+        if not self.fmt:
+            return
+        compiled = struct.Struct("<" + "".join(self.fmt))
+        struct_name = f"S{len(self.compiler.structs)}"
+        self.compiler.structs[struct_name] = compiled
+        self.emit(f"{', '.join(self.targets)}, = {struct_name}.unpack_from(data, o)")
+        self.emit(f"o += {compiled.size}")
+        self.size += compiled.size
+        self.fmt, self.targets = [], []
+
+    def expr(self, ty) -> str:
+        if isinstance(ty, str):
+            if ty in PRIMITIVE_FORMATS:
+                return self.leaf(PRIMITIVE_FORMATS[ty])
+            if ty == "pubkey":
+                return f"Pubkey.from_bytes({self.leaf('32s')})"
+            if ty in ("u128", "i128"):
+                low = self.leaf("Q")
+                high = self.leaf("Q" if ty == "u128" else "q")
+                return f"({low} | {high} << 64)"
+            raise ValueError(f"Unsupported IDL type: {ty}")
+
+        if "array" in ty:
+            element, length = ty["array"]
+            if element == "u8":
+                return self.leaf(f"{length}s")
+            return "(" + "".join(f"{self.expr(element)}, " for _ in range(length)) + ")"
+
+        if "option" in ty:
+            self.dynamic = True
+            tag = self.leaf("B")
+            self.flush()
+            name = self.var()
+            self.emit(f"if {tag}:")
+            self.indent += 1
+            value = self.expr(ty["option"])
+            self.flush()
+            self.emit(f"{name} = {value}")
+            self.indent -= 1
+            self.emit("else:")
+            self.emit(f"    {name} = None")
+            return name
+
+        if "vec" in ty:
+            self.dynamic = True
+            length = self.leaf("I")
+            self.flush()
+            name = self.var()
+            self.emit(f"{name} = []")
+            self.emit(f"for _ in range({length}):")
+            self.indent += 1
+            value = self.expr(ty["vec"])
+            self.flush()
+            self.emit(f"{name}.append({value})")
+            self.indent -= 1
+            return name
+
+        if "defined" in ty:
+            name = _defined_name(ty)
+            definition = self.compiler.types[name]["type"]
+            if definition["kind"] == "enum":
+                if any(v.get("fields") for v in definition["variants"]):
+                    raise ValueError(f"Enum {name} has data variants")
+                return self.leaf("B")
+            cls = self.compiler.record_class(name)
+            fields = [self.expr(field["type"]) for field in definition.get("fields", [])]
+            return f"{cls}({', '.join(fields)})"
+
+        raise ValueError(f"Unsupported IDL type: {ty}")
+
+
+class IdlCompiler:
+    def __init__(self, idl: Optional[dict] = None):
+        self.idl = idl or load_idl()
+        self.types: Dict[str, dict] = {t["name"]: t for t in self.idl["types"]}
+        self.classes: Dict[str, type] = {}
+        self.structs: Dict[str, struct.Struct] = {}
+        self.sources: Dict[str, str] = {}
+        self.fixed_sizes: Dict[str, Optional[int]] = {}
+        self.var_count = 0
+        self._decoders: Dict[str, Decoder] = {}
+
+    def record_class(self, name: str) -> str:
+        if name not in self.classes:
+            fields = [field["name"] for field in self.types[name]["type"].get("fields", [])]
+            self.classes[name] = record_class(name, fields)
+        return name
+
+    def decoder(self, name: str) -> Decoder:
+        if name in self._decoders:
+            return self._decoders[name]
+
+        gen = _Codegen(self)
+        value = gen.expr({"defined": {"name": name}})
+        gen.flush()
+        source = f"def decode_{name}(data, o=0):\n" + "\n".join(gen.lines) + f"\n    return {value}\n"
+
+        namespace = {"Pubkey": Pubkey, **self.structs, **self.classes}
+        exec(compile(source, f"<idl:{name}>", "exec"), namespace)
+        decode = namespace[f"decode_{name}"]
+        self.sources[name] = source
+        self.fixed_sizes[name] = None if gen.dynamic else gen.size
+        self._decoders[name] = decode
+        return decode
@@ -0,0 +1,282 @@
+import json
+import os
+import queue
+import struct
+import threading
+from typing import Dict, List, Optional, Set
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Finalized
+from solana.rpc.types import TxOpts
+from solders.address_lookup_table_account import (  # type: ignore
+    ID as LOOKUP_TABLE_PROGRAM,
+    LOOKUP_TABLE_MAX_ADDRESSES,
+    AddressLookupTable,
+    AddressLookupTableAccount,
+    derive_lookup_table_address,
+)
+from solders.compute_budget import set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import AccountMeta, Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.system_program import ID as SYSTEM_PROGRAM_ID  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from common_utils import confirm_txn
+from constants import *
+from pool_state import Pool
+
+# One file per payer, so managers for different wallets never share tables.
+DEFAULT_TABLES_PATH = "lookup_tables_{payer}.json"
+# A table's deactivation slot while it is active.
+ACTIVE_DEACTIVATION_SLOT = 2**64 - 1
+CREATE_LOOKUP_TABLE = 0
+EXTEND_LOOKUP_TABLE = 2
+# Addresses per extend transaction, keeping it well under the size limit.
+EXTEND_CHUNK = 20
+
+# Accounts every swap references besides the pool's own.
+CONSTANT_ADDRESSES = [
+    POOL_AUTHORITY,
+    EVENT_AUTH,
+    METEORA_DAMM2_PROGRAM,
+    TOKEN_PROGRAM_ID,
+    TOKEN_2022_PROGRAM_ID,
+    WSOL_MINT,
+]
+
+
+def pool_addresses(pool: Pool) -> List[Pubkey]:
+    return [pool.pool, pool.token_a_vault, pool.token_b_vault, pool.token_a_mint, pool.token_b_mint]
+
+
+def create_lookup_table_ix(authority: Pubkey, payer: Pubkey, recent_slot: int) -> Instruction:
+    table, bump = derive_lookup_table_address(authority, recent_slot)
+    accounts = [
+        AccountMeta(table, False, True),
+        AccountMeta(authority, True, False),
+        AccountMeta(payer, True, True),
+        AccountMeta(SYSTEM_PROGRAM_ID, False, False),
+    ]
+    data = struct.pack("<IQB", CREATE_LOOKUP_TABLE, recent_slot, bump)
+    return Instruction(LOOKUP_TABLE_PROGRAM, data, accounts)
+
+
+def extend_lookup_table_ix(table: Pubkey, authority: Pubkey, payer: Pubkey, addresses: List[Pubkey]) -> Instruction:
+    accounts = [
+        AccountMeta(table, False, True),
+        AccountMeta(authority, True, False),
+        AccountMeta(payer, True, True),
+        AccountMeta(SYSTEM_PROGRAM_ID, False, False),
+    ]
+    data = struct.pack("<IQ", EXTEND_LOOKUP_TABLE, len(addresses)) + b"".join(bytes(a) for a in addresses)
+    return Instruction(LOOKUP_TABLE_PROGRAM, data, accounts)
+
+
+class LookupTableManager:
+    def __init__(
+        self,
+        client: Client,
+        payer_keypair: Keypair,
+        path: Optional[str] = DEFAULT_TABLES_PATH,
+        min_trades: int = 3,
+        unit_price: int = 100_000,
+    ):
+        self.client = client
+        self.payer_keypair = payer_keypair
+        self.path = path.format(payer=payer_keypair.pubkey()) if path else None
+        # Pools get their accounts added once they have been traded this often.
+        self.min_trades = min_trades
+        self.unit_price = unit_price
+        self.tables: Dict[Pubkey, List[Pubkey]] = {}
+        self.trades: Dict[Pubkey, int] = {}
+        self._index: Dict[Pubkey, Pubkey] = {}
+        self._accounts: Dict[Pubkey, AddressLookupTableAccount] = {}
+        self.update_errors = 0
+        # Pools waiting for the background thread to add them; None stops it.
+        self._pending: "queue.Queue[Optional[Pool]]" = queue.Queue()
+        self._queued: Set[Pubkey] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    @property
+    def payer(self) -> Pubkey:
+        return self.payer_keypair.pubkey()
+
+    def load(self) -> None:
+        with open(self.path) as f:
+            saved = json.load(f)
+        for table, addresses in saved.items():
+            self._set(Pubkey.from_string(table), [Pubkey.from_string(a) for a in addresses])
+        self.validate()
+
+    def validate(self) -> List[Pubkey]:
+        # Takes every cached table from the chain and drops the ones that were
+        # closed, deactivated or belong to another authority. Returns those dropped.
+        tables = list(self.tables)
+        dropped = []
+        for i in range(0, len(tables), 100):
+            chunk = tables[i:i + 100]
+            for table, info in zip(chunk, self.client.get_multiple_accounts(chunk).value):
+                lookup = AddressLookupTable.deserialize(bytes(info.data)) if info is not None else None
+                if (
+                    lookup is None
+                    or lookup.meta.authority != self.payer
+                    or lookup.meta.deactivation_slot != ACTIVE_DEACTIVATION_SLOT
+                ):
+                    dropped.append(table)
+                else:
+                    self._set(table, list(lookup.addresses))
+        if dropped:
+            print(f"Dropped {len(dropped)} cached lookup tables that are closed, deactivated or not ours")
+            with self._lock:
+                for table in dropped:
+                    del self.tables[table]
+                    del self._accounts[table]
+                self._index = {}
+                for table, addresses in self.tables.items():
+                    for address in addresses:
+                        self._index.setdefault(address, table)
+        self.save()
+        return dropped
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            saved = {str(table): [str(a) for a in addresses] for table, addresses in self.tables.items()}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def fetch(self, table: Pubkey) -> List[Pubkey]:
+        # Replaces the cached contents with the table as it is on-chain.
+        data = self.client.get_account_info(table).value.data
+        addresses = list(AddressLookupTable.deserialize(bytes(data)).addresses)
+        self._set(table, addresses)
+        self.save()
+        return addresses
+
+    def _set(self, table: Pubkey, addresses: List[Pubkey]) -> None:
+        with self._lock:
+            self.tables[table] = addresses
+            self._accounts[table] = AddressLookupTableAccount(table, addresses)
+            for address in addresses:
+                self._index.setdefault(address, table)
+
+    def contains(self, address: Pubkey) -> bool:
+        return address in self._index
+
+    def tables_for(self, instructions: List[Instruction]) -> List[AddressLookupTableAccount]:
+        # Signers can never be looked up; pick the tables that cover the rest.
+        used = []
+        with self._lock:
+            for ix in instructions:
+                for meta in ix.accounts:
+                    table = self._index.get(meta.pubkey)
+                    if table is not None and not meta.is_signer and table not in used:
+                        used.append(table)
+            return [self._accounts[table] for table in used]
+
+    def compile(self, payer: Pubkey, instructions: List[Instruction], blockhash: Hash) -> MessageV0:
+        return MessageV0.try_compile(payer, instructions, self.tables_for(instructions), blockhash)
+
+    def missing(self, pool: Pool) -> List[Pubkey]:
+        return [a for a in dict.fromkeys(CONSTANT_ADDRESSES + pool_addresses(pool)) if not self.contains(a)]
+
+    def record_trade(self, pool: Pool) -> None:
+        # Called after a trade confirms. Creating or extending a table sends and
+        # confirms transactions, so that is left to the background thread.
+        with self._lock:
+            count = self.trades.get(pool.pool, 0) + 1
+            self.trades[pool.pool] = count
+            if count < self.min_trades or pool.pool in self._queued:
+                return
+        if not self.missing(pool):
+            return
+        with self._lock:
+            self._queued.add(pool.pool)
+        self.start()
+        self._pending.put(pool)
+
+    def add_pool(self, pool: Pool) -> bool:
+        missing = self.missing(pool)
+        if not missing:
+            return False
+        self.extend(missing)
+        return True
+
+    def start(self) -> "LookupTableManager":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="lookup-tables", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        # Pools already queued are added before the thread exits.
+        if self._thread is not None:
+            self._pending.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            pool = self._pending.get()
+            if pool is None:
+                return
+            try:
+                self.add_pool(pool)
+            except Exception as e:
+                # The pool is queued again by its next trade.
+                self.update_errors += 1
+                print("Lookup table update failed:", e)
+            finally:
+                with self._lock:
+                    self._queued.discard(pool.pool)
+
+    def create(self) -> Pubkey:
+        recent_slot = self.client.get_slot(Finalized).value
+        table, _ = derive_lookup_table_address(self.payer, recent_slot)
+        print("Creating lookup table:", table)
+        if not self._send(create_lookup_table_ix(self.payer, self.payer, recent_slot)):
+            raise RuntimeError(f"Lookup table {table} was not created")
+        self._set(table, [])
+        self.save()
+        return table
+
+    def extend(self, addresses: List[Pubkey]) -> None:
+        while addresses:
+            table = self._table_with_room() or self.create()
+            room = LOOKUP_TABLE_MAX_ADDRESSES - len(self.tables[table])
+            chunk, addresses = addresses[:min(room, EXTEND_CHUNK)], addresses[min(room, EXTEND_CHUNK):]
+            print(f"Extending lookup table {table} with {len(chunk)} addresses...")
+            if not self._send(extend_lookup_table_ix(table, self.payer, self.payer, chunk)):
+                raise RuntimeError(f"Lookup table {table} was not extended")
+            # New entries are usable from the slot after the extension, which
+            # has passed by the time the extension is confirmed.
+            self._set(table, self.tables[table] + chunk)
+            self.save()
+
+    def _table_with_room(self) -> Optional[Pubkey]:
+        for table, addresses in self.tables.items():
+            if len(addresses) < LOOKUP_TABLE_MAX_ADDRESSES:
+                return table
+        return None
+
+    def _send(self, ix: Instruction) -> bool:
+        latest_blockhash = self.client.get_latest_blockhash().value
+        message = MessageV0.try_compile(
+            self.payer,
+            [set_compute_unit_price(self.unit_price), ix],
+            [],
+            latest_blockhash.blockhash,
+        )
+        txn = VersionedTransaction(message, [self.payer_keypair])
+        sig = self.client.send_transaction(txn, TxOpts(skip_preflight=False)).value
+        return confirm_txn(self.client, sig, last_valid_block_height=latest_blockhash.last_valid_block_height)
@@ -1,6 +1,7 @@
 import base64
 import os
 import struct
+from typing import List, Optional, Tuple
 
 from solana.rpc.api import Client
 from solana.rpc.commitment import Processed
@@ -24,10 +25,95 @@ from solders.pubkey import Pubkey  # type: ignore
 from solders.system_program import CreateAccountWithSeedParams, create_account_with_seed  # type: ignore
 from solders.transaction import VersionedTransaction  # type: ignore
 
-from common_utils import confirm_txn, get_token_balance
+from blockhash_cache import BlockhashCache
+from common_utils import confirm_txn, get_token_balance, rebroadcast_txn
 from constants import *
+from cu_profile import CuProfiler, TradeShape
+from lookup_tables import LookupTableManager
+from pool_cache import PoolCache
 from pool_state import Pool
 from pool_utils import fetch_pool_state
+from priority_fees import PriorityFeeEstimator
+from swap_estimate import get_minimum_amount_out, get_pool_current_point, get_pool_swap_amount
+from wallet_state import WalletState
+from wsol_account import PersistentWsol
+
+SWAP_DISCRIMINATOR = bytes.fromhex("f8c69e91e17587c8")
+
+
+def create_swap_ix(
+    pool_state: Pool,
+    payer: Pubkey,
+    input_token_account: Pubkey,
+    output_token_account: Pubkey,
+    amount_in: int,
+    minimum_amount_out: int,
+) -> Instruction:
+    accounts = [
+        AccountMeta(POOL_AUTHORITY, False, False),
+        AccountMeta(pool_state.pool, False, True),
+        AccountMeta(input_token_account, False, True),
+        AccountMeta(output_token_account, False, True),
+        AccountMeta(pool_state.token_a_vault, False, True),
+        AccountMeta(pool_state.token_b_vault, False, True),
+        AccountMeta(pool_state.token_a_mint, False, False),
+        AccountMeta(pool_state.token_b_mint, False, False),
+        AccountMeta(payer, True, True),
+        AccountMeta(TOKEN_PROGRAM_ID, False, False),
+        AccountMeta(TOKEN_PROGRAM_ID, False, False),
+        AccountMeta(REFERRAL_TOKEN_ACC, False, False),
+        AccountMeta(EVENT_AUTH, False, False),
+        AccountMeta(METEORA_DAMM2_PROGRAM, False, False),
+    ]
+    data = bytearray(SWAP_DISCRIMINATOR)
+    data.extend(struct.pack("<Q", amount_in))
+    data.extend(struct.pack("<Q", minimum_amount_out))
+    return Instruction(METEORA_DAMM2_PROGRAM, bytes(data), accounts)
+
+
+def create_quote_token_account_ixs(
+    payer: Pubkey,
+    quote_mint: Pubkey,
+    lamports: int,
+) -> Tuple[Pubkey, List[Instruction], Instruction]:
+    seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
+    quote_token_account = Pubkey.create_with_seed(payer, seed, TOKEN_PROGRAM_ID)
+
+    create_quote_token_account_ix = create_account_with_seed(
+        CreateAccountWithSeedParams(
+            from_pubkey=payer,
+            to_pubkey=quote_token_account,
+            base=payer,
+            seed=seed,
+            lamports=int(lamports),
+            space=ACCOUNT_SPACE,
+            owner=TOKEN_PROGRAM_ID,
+        )
+    )
+
+    init_quote_token_account_ix = initialize_account(
+        InitializeAccountParams(
+            program_id=TOKEN_PROGRAM_ID,
+            account=quote_token_account,
+            mint=quote_mint,
+            owner=payer,
+        )
+    )
+
+    close_quote_token_account_ix = close_account(
+        CloseAccountParams(
+            program_id=TOKEN_PROGRAM_ID,
+            account=quote_token_account,
+            dest=payer,
+            owner=payer,
+        )
+    )
+
+    return (
+        quote_token_account,
+        [create_quote_token_account_ix, init_quote_token_account_ix],
+        close_quote_token_account_ix,
+    )
 
 
 def buy(
@@ -37,23 +123,56 @@ def buy(
     quote_in: float = 0.1,
     unit_budget: int = 100_000,
     unit_price: int = 1_000_000,
+    pool_cache: Optional[PoolCache] = None,
+    slippage_bps: int = 500,
+    skip_preflight: bool = False,
+    blockhash_cache: Optional[BlockhashCache] = None,
+    rebroadcast_ms: Optional[int] = None,
+    fee_estimator: Optional[PriorityFeeEstimator] = None,
+    cu_profiler: Optional[CuProfiler] = None,
+    wallet: Optional[WalletState] = None,
+    wsol: Optional[PersistentWsol] = None,
+    lookup_tables: Optional[LookupTableManager] = None,
 ) -> bool:
     try:
         print(f"Starting buy transaction for pool: {pool_str}")
         quote_amount_in = int(quote_in * 10**9)
-        min_base_amount_out = 0
         
         print("Fetching pool state...")
-        pool_state: Pool = fetch_pool_state(client, pool_str)
+        if pool_cache is not None:
+            pool_state: Pool = pool_cache.get(pool_str)
+        else:
+            pool_state: Pool = fetch_pool_state(client, pool_str)
+        if fee_estimator:
+            unit_price = fee_estimator.estimate(pool_state, default=unit_price)
+            print("Priority fee (micro-lamports/CU):", unit_price)
 
-        print("Checking for existing base token account...")
-        base_account_check = client.get_token_accounts_by_owner(
-            payer_keypair.pubkey(),
-            TokenAccountOpts(pool_state.token_a_mint),
-            Processed,
+        print("Quoting swap locally...")
+        current_slot = pool_cache.latest_slot if pool_cache is not None else None
+        if blockhash_cache and blockhash_cache.latest:
+            current_slot = max(current_slot or 0, blockhash_cache.latest.slot)
+        quote = get_pool_swap_amount(
+            pool_state,
+            quote_amount_in,
+            False,
+            get_pool_current_point(pool_state, current_slot),
         )
-        if base_account_check.value:
-            base_token_account = base_account_check.value[0].pubkey
+        min_base_amount_out = get_minimum_amount_out(quote.amount_out, slippage_bps)
+        print(f"Expected base out: {quote.amount_out}, minimum: {min_base_amount_out}")
+
+        print("Checking for existing base token account...")
+        if wallet:
+            holding = wallet.get(pool_state.token_a_mint)
+            existing_account = holding.account if holding else None
+        else:
+            base_account_check = client.get_token_accounts_by_owner(
+                payer_keypair.pubkey(),
+                TokenAccountOpts(pool_state.token_a_mint),
+                Processed,
+            )
+            existing_account = base_account_check.value[0].pubkey if base_account_check.value else None
+        if existing_account:
+            base_token_account = existing_account
             base_account_ix = None
             print("Existing base token account found:", base_token_account)
         else:
@@ -68,96 +187,83 @@ def buy(
             )
             print("Will create base token ATA:", base_token_account)
 
-        print("Generating seed for quote token account...")
-        seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
-        quote_token_account = Pubkey.create_with_seed(
-            payer_keypair.pubkey(),
-            seed,
-            TOKEN_PROGRAM_ID,
-        )
-        quote_rent = Token.get_min_balance_rent_for_exempt_for_account(client)
-
-        print("Creating and initializing quote token account...")
-        create_quote_token_account_ix = create_account_with_seed(
-            CreateAccountWithSeedParams(
-                from_pubkey=payer_keypair.pubkey(),
-                to_pubkey=quote_token_account,
-                base=payer_keypair.pubkey(),
-                seed=seed,
-                lamports=int(quote_rent + quote_amount_in),
-                space=ACCOUNT_SPACE,
-                owner=TOKEN_PROGRAM_ID,
+        if wsol:
+            print("Using persistent WSOL account...")
+            quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+                wsol.refresh().quote_account_ixs(quote_amount_in)
             )
-        )
-        
-        init_quote_token_account_ix = initialize_account(
-            InitializeAccountParams(
-                program_id=TOKEN_PROGRAM_ID,
-                account=quote_token_account,
-                mint=pool_state.token_b_mint,
-                owner=payer_keypair.pubkey(),
+            quote_mode = wsol.quote_mode(quote_account_ixs)
+        else:
+            quote_rent = Token.get_min_balance_rent_for_exempt_for_account(client)
+
+            print("Creating and initializing quote token account...")
+            quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+                create_quote_token_account_ixs(
+                    payer_keypair.pubkey(),
+                    pool_state.token_b_mint,
+                    quote_rent + quote_amount_in,
+                )
             )
-        )
+            quote_mode = "temp"
 
         print("Creating swap instruction...")
-        accounts = [
-            AccountMeta(POOL_AUTHORITY, False, False),
-            AccountMeta(pool_state.pool, False, True),
-            AccountMeta(quote_token_account, False, True),
-            AccountMeta(base_token_account, False, True),
-            AccountMeta(pool_state.token_a_vault, False, True),
-            AccountMeta(pool_state.token_b_vault, False, True),
-            AccountMeta(pool_state.token_a_mint, False, False),
-            AccountMeta(pool_state.token_b_mint, False, False),
-            AccountMeta(payer_keypair.pubkey(), True, True),
-            AccountMeta(TOKEN_PROGRAM_ID, False, False),
-            AccountMeta(TOKEN_PROGRAM_ID, False, False),
-            AccountMeta(REFERRAL_TOKEN_ACC, False, False),
-            AccountMeta(EVENT_AUTH, False, False),
-            AccountMeta(METEORA_DAMM2_PROGRAM, False, False),
-        ]
-        data = bytearray.fromhex("f8c69e91e17587c8")
-        data.extend(struct.pack("<Q", quote_amount_in))
-        data.extend(struct.pack("<Q", min_base_amount_out))
-        swap_instr = Instruction(METEORA_DAMM2_PROGRAM, bytes(data), accounts)
-
-        print("Preparing to close quote token account after swap...")
-        close_quote_token_account_ix = close_account(
-            CloseAccountParams(
-                program_id=TOKEN_PROGRAM_ID,
-                account=quote_token_account,
-                dest=payer_keypair.pubkey(),
-                owner=payer_keypair.pubkey(),
-            )
+        swap_instr = create_swap_ix(
+            pool_state,
+            payer_keypair.pubkey(),
+            quote_token_account,
+            base_token_account,
+            quote_amount_in,
+            min_base_amount_out,
         )
 
         instructions = [
             set_compute_unit_limit(unit_budget),
             set_compute_unit_price(unit_price),
-            create_quote_token_account_ix,
-            init_quote_token_account_ix,
+            *quote_account_ixs,
         ]
         if base_account_ix:
             instructions.append(base_account_ix)
-        instructions.extend([swap_instr, close_quote_token_account_ix])
+        instructions.append(swap_instr)
+        if close_quote_token_account_ix:
+            instructions.append(close_quote_token_account_ix)
 
         print("Compiling transaction message...")
-        compiled_message = MessageV0.try_compile(
-            payer_keypair.pubkey(),
-            instructions,
-            [],
-            client.get_latest_blockhash().value.blockhash,
-        )
+        if blockhash_cache:
+            latest_blockhash = blockhash_cache.get()
+        else:
+            latest_blockhash = client.get_latest_blockhash().value
+        if cu_profiler:
+            shape = TradeShape(pool_state.pool, False, base_account_ix is not None, quote_mode)
+            instructions = cu_profiler.apply(shape, instructions, payer_keypair, latest_blockhash.blockhash)
+        if lookup_tables:
+            compiled_message = lookup_tables.compile(payer_keypair.pubkey(), instructions, latest_blockhash.blockhash)
+        else:
+            compiled_message = MessageV0.try_compile(
+                payer_keypair.pubkey(),
+                instructions,
+                [],
+                latest_blockhash.blockhash,
+            )
         print("Sending transaction...")
+        txn = VersionedTransaction(compiled_message, [payer_keypair])
         txn_sig = client.send_transaction(
-            txn=VersionedTransaction(compiled_message, [payer_keypair]),
-            opts=TxOpts(skip_preflight=False),
+            txn=txn,
+            opts=TxOpts(skip_preflight=skip_preflight),
         ).value
         print("Transaction Signature:", txn_sig)
 
         print("Confirming transaction...")
-        confirmed = confirm_txn(client, txn_sig)
+        if rebroadcast_ms:
+            confirmed = rebroadcast_txn(client, txn, latest_blockhash.last_valid_block_height, rebroadcast_ms)
+        else:
+            confirmed = confirm_txn(client, txn_sig, last_valid_block_height=latest_blockhash.last_valid_block_height)
         print("Transaction confirmed:", confirmed)
+        if confirmed and wallet and not wallet.live:
+            wallet.apply_transaction(txn_sig)
+        if wsol:
+            wsol.after_trade(confirmed, quote_amount_in)
+        if confirmed and lookup_tables:
+            lookup_tables.record_trade(pool_state)
         return confirmed
 
     except Exception as e:
@@ -172,6 +278,16 @@ def sell(
     percentage: int = 100,
     unit_budget: int = 100_000,
     unit_price: int = 1_000_000,
+    pool_cache: Optional[PoolCache] = None,
+    slippage_bps: int = 500,
+    skip_preflight: bool = False,
+    blockhash_cache: Optional[BlockhashCache] = None,
+    rebroadcast_ms: Optional[int] = None,
+    fee_estimator: Optional[PriorityFeeEstimator] = None,
+    cu_profiler: Optional[CuProfiler] = None,
+    wallet: Optional[WalletState] = None,
+    wsol: Optional[PersistentWsol] = None,
+    lookup_tables: Optional[LookupTableManager] = None,
 ) -> bool:
     try:
         print(f"Starting sell transaction for pool: {pool_str}")
@@ -181,93 +297,82 @@ def sell(
             return False
 
         print("Fetching pool state...")
-        pool_state = fetch_pool_state(client, pool_str)
+        if pool_cache is not None:
+            pool_state = pool_cache.get(pool_str)
+        else:
+            pool_state = fetch_pool_state(client, pool_str)
+        if fee_estimator:
+            unit_price = fee_estimator.estimate(pool_state, default=unit_price)
+            print("Priority fee (micro-lamports/CU):", unit_price)
 
         print("Retrieving base token balance...")
-        base_balance = get_token_balance(
-            client, payer_keypair.pubkey(), pool_state.token_a_mint
-        )
+        if wallet:
+            base_balance = wallet.balance(pool_state.token_a_mint)
+        else:
+            base_balance = get_token_balance(
+                client, payer_keypair.pubkey(), pool_state.token_a_mint
+            )
         if not base_balance:
             print("Base token balance is zero. Nothing to sell.")
             return False
 
         base_amount_in = int(base_balance * (percentage / 100))
-        min_quote_amount_out = 0
+
+        print("Quoting swap locally...")
+        current_slot = pool_cache.latest_slot if pool_cache is not None else None
+        if blockhash_cache and blockhash_cache.latest:
+            current_slot = max(current_slot or 0, blockhash_cache.latest.slot)
+        quote = get_pool_swap_amount(
+            pool_state,
+            base_amount_in,
+            True,
+            get_pool_current_point(pool_state, current_slot),
+        )
+        min_quote_amount_out = get_minimum_amount_out(quote.amount_out, slippage_bps)
+        print(f"Expected quote out: {quote.amount_out}, minimum: {min_quote_amount_out}")
 
         print("Getting associated base token account address...")
         base_token_account = get_associated_token_address(
             payer_keypair.pubkey(), pool_state.token_a_mint
         )
 
-        print("Generating seed for quote token account...")
-        seed = base64.urlsafe_b64encode(os.urandom(24)).decode("utf-8")
-        quote_token_account = Pubkey.create_with_seed(
-            payer_keypair.pubkey(), seed, TOKEN_PROGRAM_ID
-        )
-        quote_rent = Token.get_min_balance_rent_for_exempt_for_account(client)
-
-        print("Creating and initializing quote token account...")
-        create_quote_token_account_ix = create_account_with_seed(
-            CreateAccountWithSeedParams(
-                from_pubkey=payer_keypair.pubkey(),
-                to_pubkey=quote_token_account,
-                base=payer_keypair.pubkey(),
-                seed=seed,
-                lamports=int(quote_rent),
-                space=ACCOUNT_SPACE,
-                owner=TOKEN_PROGRAM_ID,
+        if wsol:
+            print("Using persistent WSOL account...")
+            quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+                wsol.refresh().quote_account_ixs()
             )
-        )
-        
-        init_quote_token_account_ix = initialize_account(
-            InitializeAccountParams(
-                program_id=TOKEN_PROGRAM_ID,
-                account=quote_token_account,
-                mint=pool_state.token_b_mint,
-                owner=payer_keypair.pubkey(),
+            quote_mode = wsol.quote_mode(quote_account_ixs)
+        else:
+            quote_rent = Token.get_min_balance_rent_for_exempt_for_account(client)
+
+            print("Creating and initializing quote token account...")
+            quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+                create_quote_token_account_ixs(
+                    payer_keypair.pubkey(),
+                    pool_state.token_b_mint,
+                    quote_rent,
+                )
             )
-        )
+            quote_mode = "temp"
 
         print("Creating swap instruction...")
-        accounts = [
-            AccountMeta(POOL_AUTHORITY, False, False),
-            AccountMeta(pool_state.pool, False, True),
-            AccountMeta(base_token_account, False, True),
-            AccountMeta(quote_token_account, False, True),
-            AccountMeta(pool_state.token_a_vault, False, True),
-            AccountMeta(pool_state.token_b_vault, False, True),
-            AccountMeta(pool_state.token_a_mint, False, False),
-            AccountMeta(pool_state.token_b_mint, False, False),
-            AccountMeta(payer_keypair.pubkey(), True, True),
-            AccountMeta(TOKEN_PROGRAM_ID, False, False),
-            AccountMeta(TOKEN_PROGRAM_ID, False, False),
-            AccountMeta(REFERRAL_TOKEN_ACC, False, False),
-            AccountMeta(EVENT_AUTH, False, False),
-            AccountMeta(METEORA_DAMM2_PROGRAM, False, False),
-        ]
-        data = bytearray.fromhex("f8c69e91e17587c8")
-        data.extend(struct.pack("<Q", base_amount_in))
-        data.extend(struct.pack("<Q", min_quote_amount_out))
-        swap_ix = Instruction(METEORA_DAMM2_PROGRAM, bytes(data), accounts)
-
-        print("Preparing to close quote token account after swap...")
-        close_quote_token_account_ix = close_account(
-            CloseAccountParams(
-                program_id=TOKEN_PROGRAM_ID,
-                account=quote_token_account,
-                dest=payer_keypair.pubkey(),
-                owner=payer_keypair.pubkey(),
-            )
+        swap_ix = create_swap_ix(
+            pool_state,
+            payer_keypair.pubkey(),
+            base_token_account,
+            quote_token_account,
+            base_amount_in,
+            min_quote_amount_out,
         )
 
         instructions = [
             set_compute_unit_limit(unit_budget),
             set_compute_unit_price(unit_price),
-            create_quote_token_account_ix,
-            init_quote_token_account_ix,
+            *quote_account_ixs,
             swap_ix,
-            close_quote_token_account_ix,
         ]
+        if close_quote_token_account_ix:
+            instructions.append(close_quote_token_account_ix)
 
         if percentage == 100:
             print("Preparing to close base token account (100% sell)...")
@@ -282,23 +387,46 @@ def sell(
             instructions.append(close_base_token_account_ix)
 
         print("Compiling transaction message...")
-        blockhash = client.get_latest_blockhash().value.blockhash
-        compiled_msg = MessageV0.try_compile(
-            payer_keypair.pubkey(),
-            instructions,
-            [],
-            blockhash,
-        )
+        if blockhash_cache:
+            latest_blockhash = blockhash_cache.get()
+        else:
+            latest_blockhash = client.get_latest_blockhash().value
+        if cu_profiler:
+            shape = TradeShape(pool_state.pool, True, percentage == 100, quote_mode)
+            instructions = cu_profiler.apply(shape, instructions, payer_keypair, latest_blockhash.blockhash)
+        if lookup_tables:
+            compiled_msg = lookup_tables.compile(payer_keypair.pubkey(), instructions, latest_blockhash.blockhash)
+        else:
+            compiled_msg = MessageV0.try_compile(
+                payer_keypair.pubkey(),
+                instructions,
+                [],
+                latest_blockhash.blockhash,
+            )
         print("Sending transaction...")
+        txn = VersionedTransaction(compiled_msg, [payer_keypair])
         sig = client.send_transaction(
-            txn=VersionedTransaction(compiled_msg, [payer_keypair]),
-            opts=TxOpts(skip_preflight=False),
+            txn=txn,
+            opts=TxOpts(skip_preflight=skip_preflight),
         ).value
         print("Transaction Signature:", sig)
 
         print("Confirming transaction...")
-        confirmed = confirm_txn(client, sig)
+        if rebroadcast_ms:
+            confirmed = rebroadcast_txn(client, txn, latest_blockhash.last_valid_block_height, rebroadcast_ms)
+        else:
+            confirmed = confirm_txn(client, sig, last_valid_block_height=latest_blockhash.last_valid_block_height)
         print("Transaction confirmed:", confirmed)
+        if confirmed and wallet:
+            if percentage == 100:
+                # A subscription never reports the close, so drop the account here.
+                wallet.remove_account(base_token_account)
+            elif not wallet.live:
+                wallet.apply_transaction(sig)
+        if wsol:
+            wsol.after_trade(confirmed)
+        if confirmed and lookup_tables:
+            lookup_tables.record_trade(pool_state)
         return confirmed
 
     except Exception as e:
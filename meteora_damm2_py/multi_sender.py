@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solana.rpc.types import TxOpts
+from solders.signature import Signature  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+
+@dataclass
+class EndpointStats:
+    endpoint: str
+    sent: int = 0
+    accepted: int = 0
+    failed: int = 0
+    wins: int = 0
+    ewma_ms: Optional[float] = None
+    last_error: Optional[str] = None
+
+    def record(self, latency_ms: float, alpha: float) -> None:
+        self.accepted += 1
+        if self.ewma_ms is None:
+            self.ewma_ms = latency_ms
+        else:
+            self.ewma_ms = alpha * latency_ms + (1 - alpha) * self.ewma_ms
+
+
+class SendResult(NamedTuple):
+    signature: Signature
+    endpoint: str
+    latency_ms: float
+
+
+class MultiSender:
+    def __init__(
+        self,
+        endpoints: List[str],
+        timeout: float = 5,
+        max_fanout: Optional[int] = None,
+        alpha: float = 0.2,
+        failure_penalty_ms: float = 1_000,
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.timeout = timeout
+        self.max_fanout = max_fanout
+        self.alpha = alpha
+        self.failure_penalty_ms = failure_penalty_ms
+        self.clients: Dict[str, Client] = {e: Client(e, timeout=timeout) for e in endpoints}
+        self.stats: Dict[str, EndpointStats] = {e: EndpointStats(e) for e in endpoints}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(endpoints) * 4,
+            thread_name_prefix="multi-sender",
+        )
+
+    def ranked_endpoints(self) -> List[str]:
+        # Untried endpoints sort first so every node gets sampled; endpoints
+        # that have only ever failed sort by the failure penalty alone.
+        def score(stats: EndpointStats) -> float:
+            if stats.ewma_ms is None:
+                return self.failure_penalty_ms if stats.sent else -1.0
+            attempts = max(stats.sent, 1)
+            return stats.ewma_ms + self.failure_penalty_ms * stats.failed / attempts
+
+        with self._lock:
+            ranked = sorted(self.stats.values(), key=score)
+        return [s.endpoint for s in ranked]
+
+    def send(self, txn: VersionedTransaction, opts: Optional[TxOpts] = None) -> SendResult:
+        opts = opts or TxOpts(skip_preflight=True)
+        raw = bytes(txn)
+        targets = self.ranked_endpoints()
+        if self.max_fanout:
+            targets = targets[:self.max_fanout]
+
+        pending = {self._executor.submit(self._send_one, e, raw, opts) for e in targets}
+        errors = []
+        deadline = time.monotonic() + self.timeout
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(0.0, deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for fut in done:
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    continue
+                with self._lock:
+                    self.stats[result.endpoint].wins += 1
+                # Slower sends keep running and still record their latency.
+                return result
+
+        raise RuntimeError(f"No endpoint accepted the transaction: {errors or 'timed out'}")
+
+    def _send_one(self, endpoint: str, raw: bytes, opts: TxOpts) -> SendResult:
+        stats = self.stats[endpoint]
+        with self._lock:
+            stats.sent += 1
+        started = time.perf_counter()
+        try:
+            sig = self.clients[endpoint].send_raw_transaction(raw, opts).value
+        except Exception as e:
+            # solana-py wraps transport errors such as timeouts with an empty message.
+            cause = e.__cause__ or e
+            error = str(cause) or type(cause).__name__
+            with self._lock:
+                stats.failed += 1
+                stats.last_error = error
+            raise RuntimeError(f"{endpoint}: {error}") from e
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats.record(latency_ms, self.alpha)
+        return SendResult(sig, endpoint, latency_ms)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        for client in self.clients.values():
+            client._provider.session.close()
@@ -0,0 +1,225 @@
+import struct
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Confirmed
+from solana.rpc.types import TxOpts
+from solders.compute_budget import set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.system_program import (  # type: ignore
+    ID as SYSTEM_PROGRAM_ID,
+    AdvanceNonceAccountParams,
+    advance_nonce_account,
+    create_nonce_account_with_seed,
+)
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from common_utils import confirm_txn
+
+NONCE_ACCOUNT_SIZE = 80
+# Version, state, authority, durable nonce, lamports per signature.
+NONCE_ACCOUNT_STRUCT = struct.Struct("<II32s32sQ")
+NONCE_INITIALIZED = 1
+NONCE_SEED_PREFIX = "damm2-nonce-"
+# Nonce accounts created per transaction.
+CREATE_CHUNK = 4
+
+
+class NonceAccount(NamedTuple):
+    address: Pubkey
+    # The durable nonce a transaction is signed against, used as its blockhash.
+    nonce: Hash
+
+
+def nonce_seed(index: int) -> str:
+    return f"{NONCE_SEED_PREFIX}{index}"
+
+
+def nonce_address(authority: Pubkey, index: int) -> Pubkey:
+    # Seed-derived from the wallet, so the pool is found again without a state file.
+    return Pubkey.create_with_seed(authority, nonce_seed(index), SYSTEM_PROGRAM_ID)
+
+
+def parse_nonce_account(data: bytes) -> Optional[Tuple[Pubkey, Hash]]:
+    if len(data) < NONCE_ACCOUNT_SIZE:
+        return None
+    _, state, authority, nonce, _ = NONCE_ACCOUNT_STRUCT.unpack_from(data)
+    if state != NONCE_INITIALIZED:
+        return None
+    return Pubkey.from_bytes(authority), Hash.from_bytes(nonce)
+
+
+def advance_nonce_ix(address: Pubkey, authority: Pubkey) -> Instruction:
+    return advance_nonce_account(AdvanceNonceAccountParams(nonce_pubkey=address, authorized_pubkey=authority))
+
+
+class NoncePool:
+    def __init__(
+        self,
+        client: Client,
+        payer_keypair: Keypair,
+        max_size: int = 16,
+        settle_timeout: float = 120.0,
+        unit_price: int = 100_000,
+    ):
+        self.client = client
+        self.payer_keypair = payer_keypair
+        self.max_size = max_size
+        # A sent transaction whose nonce has not moved after this long is voided,
+        # so it must outlast the wait for the transaction to confirm.
+        self.settle_timeout = settle_timeout
+        self.unit_price = unit_price
+        self.addresses = [nonce_address(self.payer, i) for i in range(max_size)]
+        # Last on-chain value of every initialized nonce account.
+        self.values: Dict[Pubkey, Hash] = {}
+        # Not backing any signed transaction.
+        self.free: List[Pubkey] = []
+        # Backing a pre-signed transaction that has not been sent.
+        self.reserved: Dict[Pubkey, Hash] = {}
+        # Used by a sent transaction: unusable until the nonce moves on.
+        self.pending: Dict[Pubkey, Tuple[Hash, float]] = {}
+        # Indexes with no account on chain at the last refresh, so never created or closed since.
+        self.vacant: List[int] = []
+        self.collisions = 0
+        self.voided = 0
+        self._lock = threading.Lock()
+
+    @property
+    def payer(self) -> Pubkey:
+        return self.payer_keypair.pubkey()
+
+    def usable(self) -> int:
+        return len(self.free) + len(self.reserved)
+
+    def acquire(self) -> Optional[NonceAccount]:
+        with self._lock:
+            if not self.free:
+                return None
+            address = self.free.pop(0)
+            account = NonceAccount(address, self.values[address])
+            self.reserved[address] = account.nonce
+            return account
+
+    def release(self, account: NonceAccount) -> None:
+        # The transaction signed against it was never sent, so it can back another.
+        with self._lock:
+            if self.reserved.pop(account.address, None) is not None:
+                self.free.append(account.address)
+
+    def mark_sent(self, account: NonceAccount) -> None:
+        with self._lock:
+            self.reserved.pop(account.address, None)
+            self.pending[account.address] = (account.nonce, time.monotonic())
+
+    def refresh(self) -> List[NonceAccount]:
+        # Returns the reservations whose nonce moved under them; the
+        # transactions signed against those can never land.
+        infos = self.client.get_multiple_accounts(self.addresses, Confirmed).value
+        collided = []
+        stuck = []
+        now = time.monotonic()
+        with self._lock:
+            vacant = []
+            for index, (address, info) in enumerate(zip(self.addresses, infos)):
+                if info is None:
+                    vacant.append(index)
+                parsed = parse_nonce_account(bytes(info.data)) if info else None
+                if parsed is None or parsed[0] != self.payer:
+                    self.values.pop(address, None)
+                    self.reserved.pop(address, None)
+                    self.pending.pop(address, None)
+                    if address in self.free:
+                        self.free.remove(address)
+                    continue
+                nonce = parsed[1]
+                self.values[address] = nonce
+                if address in self.pending:
+                    sent_nonce, sent_at = self.pending[address]
+                    if nonce != sent_nonce:
+                        del self.pending[address]
+                        self.free.append(address)
+                    elif now - sent_at > self.settle_timeout:
+                        self.pending[address] = (sent_nonce, now)
+                        stuck.append(address)
+                elif address in self.reserved:
+                    if nonce != self.reserved[address]:
+                        collided.append(NonceAccount(address, self.reserved.pop(address)))
+                        self.free.append(address)
+                        self.collisions += 1
+                elif address not in self.free:
+                    self.free.append(address)
+            self.vacant = vacant
+        for address in stuck:
+            self.void(address)
+        return collided
+
+    def void(self, address: Pubkey) -> None:
+        # Advancing the nonce ourselves makes a dropped transaction unable to land later.
+        print("Voiding unsettled nonce:", address)
+        self.voided += 1
+        try:
+            self._send([advance_nonce_ix(address, self.payer)], confirm=False)
+        except Exception as e:
+            print("Nonce void failed:", e)
+
+    def refill(self, target: int) -> int:
+        missing = min(target - self.usable() - len(self.pending), len(self.vacant))
+        if missing <= 0:
+            return 0
+        return self.create(missing)
+
+    def create(self, count: int) -> int:
+        # Fills the vacant indexes refresh found, lowest first, so a closed
+        # account is recreated at its own seed.
+        rent = self.client.get_minimum_balance_for_rent_exemption(NONCE_ACCOUNT_SIZE).value
+        indexes = self.vacant[:count]
+        for start in range(0, len(indexes), CREATE_CHUNK):
+            chunk = indexes[start:start + CREATE_CHUNK]
+            instructions = []
+            for index in chunk:
+                instructions.extend(
+                    create_nonce_account_with_seed(
+                        self.payer,
+                        self.addresses[index],
+                        self.payer,
+                        nonce_seed(index),
+                        self.payer,
+                        rent,
+                    )
+                )
+            print(f"Creating {len(chunk)} nonce accounts...")
+            if not self._send(instructions):
+                raise RuntimeError("Nonce accounts were not created")
+            with self._lock:
+                self.vacant = [index for index in self.vacant if index not in chunk]
+        return len(indexes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "free": len(self.free),
+                "reserved": len(self.reserved),
+                "pending": len(self.pending),
+                "collisions": self.collisions,
+                "voided": self.voided,
+            }
+
+    def _send(self, instructions: List[Instruction], confirm: bool = True) -> bool:
+        latest_blockhash = self.client.get_latest_blockhash().value
+        message = MessageV0.try_compile(
+            self.payer,
+            [set_compute_unit_price(self.unit_price), *instructions],
+            [],
+            latest_blockhash.blockhash,
+        )
+        txn = VersionedTransaction(message, [self.payer_keypair])
+        sig = self.client.send_transaction(txn, TxOpts(skip_preflight=False)).value
+        if not confirm:
+            return True
+        return confirm_txn(self.client, sig, last_valid_block_height=latest_blockhash.last_valid_block_height)
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Processed
+from solana.rpc.types import DataSliceOpts
+from solders.pubkey import Pubkey  # type: ignore
+
+from pool_state import CREATOR_OFFSET, POOL_ACCOUNT_SIZE, POOL_FEES_OFFSET, Pool, decode_pool
+
+# The fields trading reads that a swap writes: the dynamic fee's
+# last_update_timestamp and volatility, liquidity through pool_type,
+# fee_a/b_per_liquidity, permanent_lock_liquidity and metrics. The fee
+# config, creator and reward infos are read once and pinned. The mints and
+# vaults sit inside the range; a second request to skip their 192 bytes
+# would cost more than it saves.
+DYNAMIC_SLICE_OFFSET = POOL_FEES_OFFSET + 72
+DYNAMIC_SLICE_LENGTH = CREATOR_OFFSET - DYNAMIC_SLICE_OFFSET
+
+
+@dataclass
+class CachedPool:
+    pool: Pool
+    data: bytes
+    slot: int
+    fetched_at: float
+
+
+class PoolCache:
+    def __init__(
+        self,
+        client: Client,
+        max_entries: int = 256,
+        max_staleness_slots: Optional[int] = 2,
+        max_staleness_ms: Optional[float] = 400,
+    ):
+        self.client = client
+        self.max_entries = max_entries
+        self.max_staleness_slots = max_staleness_slots
+        self.max_staleness_ms = max_staleness_ms
+        self.latest_slot = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Pubkey, CachedPool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, pool_str: str) -> bool:
+        return Pubkey.from_string(pool_str) in self._entries
+
+    def is_fresh(self, entry: CachedPool, current_slot: Optional[int] = None) -> bool:
+        if self.max_staleness_ms is not None:
+            if (time.monotonic() - entry.fetched_at) * 1000 > self.max_staleness_ms:
+                return False
+        if self.max_staleness_slots is not None:
+            slot = max(current_slot or 0, self.latest_slot)
+            if slot - entry.slot > self.max_staleness_slots:
+                return False
+        return True
+
+    def peek(self, pool_str: str) -> Optional[CachedPool]:
+        with self._lock:
+            return self._entries.get(Pubkey.from_string(pool_str))
+
+    def get(self, pool_str: str, current_slot: Optional[int] = None) -> Pool:
+        pool_pubkey = Pubkey.from_string(pool_str)
+        with self._lock:
+            entry = self._entries.get(pool_pubkey)
+            if entry is not None:
+                self._entries.move_to_end(pool_pubkey)
+                if self.is_fresh(entry, current_slot):
+                    self.hits += 1
+                    return entry.pool
+            self.misses += 1
+        if entry is None:
+            return self.load(pool_str)
+        return self.refresh(pool_str)
+
+    def load(self, pool_str: str) -> Pool:
+        pool_pubkey = Pubkey.from_string(pool_str)
+        resp = self.client.get_account_info(pool_pubkey, commitment=Processed)
+        return self.put(pool_pubkey, resp.value.data, resp.context.slot)
+
+    def refresh(self, pool_str: str) -> Pool:
+        pool_pubkey = Pubkey.from_string(pool_str)
+        with self._lock:
+            entry = self._entries.get(pool_pubkey)
+        if entry is None:
+            return self.load(pool_str)
+
+        resp = self.client.get_account_info(
+            pool_pubkey,
+            commitment=Processed,
+            data_slice=DataSliceOpts(offset=DYNAMIC_SLICE_OFFSET, length=DYNAMIC_SLICE_LENGTH),
+        )
+        data = bytearray(entry.data)
+        data[DYNAMIC_SLICE_OFFSET:DYNAMIC_SLICE_OFFSET + DYNAMIC_SLICE_LENGTH] = resp.value.data
+        return self.put(pool_pubkey, data, resp.context.slot)
+
+    def put(self, pool_pubkey: Pubkey, data: bytes, slot: int) -> Pool:
+        if len(data) < POOL_ACCOUNT_SIZE:
+            raise ValueError(f"Pool account data too short: {len(data)} bytes")
+        data = bytes(data)
+        pool = decode_pool(pool_pubkey, data)
+        with self._lock:
+            current = self._entries.get(pool_pubkey)
+            # Never let an older read overwrite a newer one.
+            if current is not None and current.slot > slot:
+                self._entries.move_to_end(pool_pubkey)
+                return current.pool
+            self._entries[pool_pubkey] = CachedPool(pool, data, slot, time.monotonic())
+            self._entries.move_to_end(pool_pubkey)
+            self.latest_slot = max(self.latest_slot, slot)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pool
+
+    def touch(self, pool_pubkey: Pubkey, slot: int) -> bool:
+        # Marks an entry current at slot when its data is known to be unchanged.
+        with self._lock:
+            entry = self._entries.get(pool_pubkey)
+            if entry is None:
+                return False
+            if slot >= entry.slot:
+                self._entries[pool_pubkey] = CachedPool(entry.pool, entry.data, slot, time.monotonic())
+                self.latest_slot = max(self.latest_slot, slot)
+            self._entries.move_to_end(pool_pubkey)
+            return True
+
+    def invalidate(self, pool_str: str) -> None:
+        with self._lock:
+            self._entries.pop(Pubkey.from_string(pool_str), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -1,3 +1,4 @@
+import struct
 from dataclasses import dataclass
 from typing import List
 from construct import Container, Struct, Int8ul, Int16ul, Int32ul, Int64ul, Array, Bytes, Padding
@@ -178,7 +179,7 @@ class RewardInfo:
     cumulative_seconds_with_empty_liquidity_reward: int
 
 @dataclass
-class Pool:
+class ParsedPool:
     pool: Pubkey
     pool_fees: PoolFeesStruct
     token_a_mint: Pubkey
@@ -212,8 +213,8 @@ class Pool:
     _padding_1: List[int]
     reward_infos: List[RewardInfo]
 
-def parse_pool(pool_pubkey: Pubkey, c: Container) -> Pool:
-    return Pool(
+def parse_pool(pool_pubkey: Pubkey, c: Container) -> ParsedPool:
+    return ParsedPool(
         pool=pool_pubkey,
         pool_fees=PoolFeesStruct(
             base_fee=BaseFeeStruct(
@@ -303,3 +304,191 @@ def parse_pool(pool_pubkey: Pubkey, c: Container) -> Pool:
             for ri in c.reward_infos
         ],
     )
+
+# Fixed offsets into the 1112-byte Pool account (8-byte discriminator first).
+POOL_ACCOUNT_SIZE = 1112
+POOL_FEES_OFFSET = 8
+POOL_HOT_OFFSET = 168
+POOL_PADDING_0_OFFSET = 486
+FEE_A_PER_LIQUIDITY_OFFSET = 488
+FEE_B_PER_LIQUIDITY_OFFSET = 520
+PERMANENT_LOCK_LIQUIDITY_OFFSET = 552
+METRICS_OFFSET = 568
+CREATOR_OFFSET = 648
+POOL_PADDING_1_OFFSET = 680
+REWARD_INFOS_OFFSET = 728
+REWARD_INFO_SIZE = 192
+
+# u128 fields are unpacked as (lo, hi) u64 pairs.
+POOL_HOT_STRUCT = struct.Struct("<32s32s32s32s32s32sQQQQQQQQQQQQQQQBBBBBB")
+POOL_FEES_STRUCT = struct.Struct("<QB5BHQQQBBB5BB7BIIHHHHQQQQQQQQQ2Q")
+POOL_METRICS_STRUCT = struct.Struct("<QQQQQQQQQQ")
+REWARD_INFO_STRUCT = struct.Struct("<BB6B8B32s32s32sQQQQ32sQQ")
+U128_STRUCT = struct.Struct("<QQ")
+PADDING_0_STRUCT = struct.Struct("<2B")
+PADDING_1_STRUCT = struct.Struct("<6Q")
+
+def _decode_pool_fees(buf: memoryview) -> PoolFeesStruct:
+    v = POOL_FEES_STRUCT.unpack_from(buf, POOL_FEES_OFFSET)
+    return PoolFeesStruct(
+        base_fee=BaseFeeStruct(
+            cliff_fee_numerator=v[0],
+            fee_scheduler_mode=v[1],
+            padding_0=list(v[2:7]),
+            number_of_period=v[7],
+            period_frequency=v[8],
+            reduction_factor=v[9],
+            padding_1=v[10],
+        ),
+        protocol_fee_percent=v[11],
+        partner_fee_percent=v[12],
+        referral_fee_percent=v[13],
+        padding_0=list(v[14:19]),
+        dynamic_fee=DynamicFeeStruct(
+            initialized=v[19],
+            padding=list(v[20:27]),
+            max_volatility_accumulator=v[27],
+            variable_fee_control=v[28],
+            bin_step=v[29],
+            filter_period=v[30],
+            decay_period=v[31],
+            reduction_factor=v[32],
+            last_update_timestamp=v[33],
+            bin_step_u128=v[34] | (v[35] << 64),
+            sqrt_price_reference=v[36] | (v[37] << 64),
+            volatility_accumulator=v[38] | (v[39] << 64),
+            volatility_reference=v[40] | (v[41] << 64),
+        ),
+        padding_1=list(v[42:44]),
+    )
+
+def _decode_metrics(buf: memoryview) -> PoolMetrics:
+    v = POOL_METRICS_STRUCT.unpack_from(buf, METRICS_OFFSET)
+    return PoolMetrics(
+        total_lp_a_fee=v[0] | (v[1] << 64),
+        total_lp_b_fee=v[2] | (v[3] << 64),
+        total_protocol_a_fee=v[4],
+        total_protocol_b_fee=v[5],
+        total_partner_a_fee=v[6],
+        total_partner_b_fee=v[7],
+        total_position=v[8],
+        padding=v[9],
+    )
+
+def _decode_reward_infos(buf: memoryview) -> List[RewardInfo]:
+    reward_infos = []
+    for i in range(2):
+        v = REWARD_INFO_STRUCT.unpack_from(buf, REWARD_INFOS_OFFSET + i * REWARD_INFO_SIZE)
+        reward_infos.append(
+            RewardInfo(
+                initialized=v[0],
+                reward_token_flag=v[1],
+                _padding_0=list(v[2:8]),
+                _padding_1=list(v[8:16]),
+                mint=Pubkey.from_bytes(v[16]),
+                vault=Pubkey.from_bytes(v[17]),
+                funder=Pubkey.from_bytes(v[18]),
+                reward_duration=v[19],
+                reward_duration_end=v[20],
+                reward_rate=v[21] | (v[22] << 64),
+                reward_per_token_stored=v[23],
+                last_update_time=v[24],
+                cumulative_seconds_with_empty_liquidity_reward=v[25],
+            )
+        )
+    return reward_infos
+
+def _decode_permanent_lock_liquidity(buf: memoryview) -> int:
+    lo, hi = U128_STRUCT.unpack_from(buf, PERMANENT_LOCK_LIQUIDITY_OFFSET)
+    return lo | (hi << 64)
+
+_LAZY_DECODERS = {
+    "pool_fees": _decode_pool_fees,
+    "_padding_0": lambda buf: list(PADDING_0_STRUCT.unpack_from(buf, POOL_PADDING_0_OFFSET)),
+    "fee_a_per_liquidity": lambda buf: bytes(buf[FEE_A_PER_LIQUIDITY_OFFSET:FEE_A_PER_LIQUIDITY_OFFSET + 32]),
+    "fee_b_per_liquidity": lambda buf: bytes(buf[FEE_B_PER_LIQUIDITY_OFFSET:FEE_B_PER_LIQUIDITY_OFFSET + 32]),
+    "permanent_lock_liquidity": _decode_permanent_lock_liquidity,
+    "metrics": _decode_metrics,
+    "creator": lambda buf: Pubkey.from_bytes(bytes(buf[CREATOR_OFFSET:CREATOR_OFFSET + 32])),
+    "_padding_1": lambda buf: list(PADDING_1_STRUCT.unpack_from(buf, POOL_PADDING_1_OFFSET)),
+    "reward_infos": _decode_reward_infos,
+}
+
+# Fields used on the swap path are unpacked up front; the rest are decoded
+# from the retained buffer on first access and then cached in their slot.
+class Pool:
+    __slots__ = (
+        "pool",
+        "_buf",
+        "token_a_mint",
+        "token_b_mint",
+        "token_a_vault",
+        "token_b_vault",
+        "whitelisted_vault",
+        "partner",
+        "liquidity",
+        "_padding",
+        "protocol_a_fee",
+        "protocol_b_fee",
+        "partner_a_fee",
+        "partner_b_fee",
+        "sqrt_min_price",
+        "sqrt_max_price",
+        "sqrt_price",
+        "activation_point",
+        "activation_type",
+        "pool_status",
+        "token_a_flag",
+        "token_b_flag",
+        "collect_fee_mode",
+        "pool_type",
+    ) + tuple(_LAZY_DECODERS)
+
+    def __init__(self, pool_pubkey: Pubkey, data: bytes):
+        buf = memoryview(data)
+        if len(buf) < POOL_ACCOUNT_SIZE:
+            raise ValueError(f"Pool account data too short: {len(buf)} bytes")
+        v = POOL_HOT_STRUCT.unpack_from(buf, POOL_HOT_OFFSET)
+        self.pool = pool_pubkey
+        self._buf = buf
+        self.token_a_mint = Pubkey.from_bytes(v[0])
+        self.token_b_mint = Pubkey.from_bytes(v[1])
+        self.token_a_vault = Pubkey.from_bytes(v[2])
+        self.token_b_vault = Pubkey.from_bytes(v[3])
+        self.whitelisted_vault = Pubkey.from_bytes(v[4])
+        self.partner = Pubkey.from_bytes(v[5])
+        self.liquidity = v[6] | (v[7] << 64)
+        self._padding = v[8] | (v[9] << 64)
+        self.protocol_a_fee = v[10]
+        self.protocol_b_fee = v[11]
+        self.partner_a_fee = v[12]
+        self.partner_b_fee = v[13]
+        self.sqrt_min_price = v[14] | (v[15] << 64)
+        self.sqrt_max_price = v[16] | (v[17] << 64)
+        self.sqrt_price = v[18] | (v[19] << 64)
+        self.activation_point = v[20]
+        self.activation_type = v[21]
+        self.pool_status = v[22]
+        self.token_a_flag = v[23]
+        self.token_b_flag = v[24]
+        self.collect_fee_mode = v[25]
+        self.pool_type = v[26]
+
+    def __getattr__(self, name):
+        # Only reached when a slot has not been filled yet.
+        decoder = _LAZY_DECODERS.get(name)
+        if decoder is None:
+            raise AttributeError(name)
+        value = decoder(self._buf)
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self) -> str:
+        return (
+            f"Pool(pool={self.pool}, token_a_mint={self.token_a_mint}, "
+            f"token_b_mint={self.token_b_mint}, liquidity={self.liquidity}, "
+            f"sqrt_price={self.sqrt_price})"
+        )
+
+def decode_pool(pool_pubkey: Pubkey, data: bytes) -> Pool:
+    return Pool(pool_pubkey, data)
@@ -0,0 +1,149 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Set
+
+from solana.rpc.commitment import Commitment, Processed
+from solana.rpc.websocket_api import SolanaWsClientProtocol, connect
+from solders.errors import SerdeJSONError  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.responses import AccountNotification, SubscriptionResult  # type: ignore
+
+from pool_cache import PoolCache
+from pool_state import Pool, decode_pool
+
+PoolCallback = Callable[[Pool, int], None]
+
+
+class PoolStream:
+    def __init__(
+        self,
+        ws_url: str,
+        pool_cache: Optional[PoolCache] = None,
+        commitment: Commitment = Processed,
+        reconnect_delay: float = 0.25,
+        max_reconnect_delay: float = 10.0,
+    ):
+        self.ws_url = ws_url
+        self.pool_cache = pool_cache
+        self.commitment = commitment
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.pools: Dict[Pubkey, Pool] = {}
+        self.slots: Dict[Pubkey, int] = {}
+        self.reconnects = 0
+        self.updates = 0
+        self._raw: Dict[Pubkey, bytes] = {}
+        self._watched: Set[Pubkey] = set()
+        self._subscription_ids: Dict[Pubkey, int] = {}
+        self._callbacks: List[PoolCallback] = []
+        self._ws: Optional[SolanaWsClientProtocol] = None
+        self._running = False
+
+    def get(self, pool_str: str) -> Optional[Pool]:
+        return self.pools.get(Pubkey.from_string(pool_str))
+
+    def slot(self, pool_str: str) -> Optional[int]:
+        return self.slots.get(Pubkey.from_string(pool_str))
+
+    def on_change(self, callback: PoolCallback) -> None:
+        self._callbacks.append(callback)
+
+    async def subscribe(self, pool_str: str) -> None:
+        pool_pubkey = Pubkey.from_string(pool_str)
+        self._watched.add(pool_pubkey)
+        if self._ws is not None:
+            await self._ws.account_subscribe(pool_pubkey, self.commitment, "base64")
+
+    async def unsubscribe(self, pool_str: str) -> None:
+        pool_pubkey = Pubkey.from_string(pool_str)
+        self._watched.discard(pool_pubkey)
+        self.pools.pop(pool_pubkey, None)
+        self.slots.pop(pool_pubkey, None)
+        self._raw.pop(pool_pubkey, None)
+        subscription_id = self._subscription_ids.pop(pool_pubkey, None)
+        if self._ws is not None and subscription_id is not None:
+            await self._ws.account_unsubscribe(subscription_id)
+
+    async def run(self) -> None:
+        self._running = True
+        delay = self.reconnect_delay
+        while self._running:
+            try:
+                async with connect(self.ws_url) as ws:
+                    self._ws = ws
+                    self._subscription_ids.clear()
+                    for pool_pubkey in list(self._watched):
+                        await ws.account_subscribe(pool_pubkey, self.commitment, "base64")
+                    delay = self.reconnect_delay
+                    while self._running:
+                        try:
+                            messages = await ws.recv()
+                        except SerdeJSONError:
+                            # solana-py cannot parse the boolean reply to an
+                            # unsubscribe; it carries nothing, so skip it.
+                            continue
+                        for msg in messages:
+                            try:
+                                self._handle(ws, msg)
+                            except Exception as e:
+                                # One bad notification should not drop the connection.
+                                print("Pool stream message error:", e)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self._running:
+                    break
+                print("Pool stream disconnected:", e)
+            finally:
+                self._ws = None
+            if self._running:
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+
+    def _handle(self, ws: SolanaWsClientProtocol, msg) -> None:
+        if isinstance(msg, SubscriptionResult):
+            request = ws.subscriptions.get(msg.result)
+            if request is not None:
+                self._subscription_ids[request.account] = msg.result
+            return
+        if not isinstance(msg, AccountNotification):
+            return
+
+        request = ws.subscriptions.get(msg.subscription)
+        if request is None:
+            return
+        pool_pubkey = request.account
+        if pool_pubkey not in self._watched:
+            return
+
+        slot = msg.result.context.slot
+        data = bytes(msg.result.value.data)
+        if slot < self.slots.get(pool_pubkey, 0):
+            return
+        if self._raw.get(pool_pubkey) == data:
+            self.slots[pool_pubkey] = slot
+            # Still live, so keep the cached copy fresh without decoding again.
+            if self.pool_cache is not None and not self.pool_cache.touch(pool_pubkey, slot):
+                self.pool_cache.put(pool_pubkey, data, slot)
+            return
+
+        pool = decode_pool(pool_pubkey, data)
+        self.pools[pool_pubkey] = pool
+        self.slots[pool_pubkey] = slot
+        self._raw[pool_pubkey] = data
+        self.updates += 1
+        if self.pool_cache is not None:
+            self.pool_cache.put(pool_pubkey, data, slot)
+
+        for callback in self._callbacks:
+            try:
+                result = callback(pool, slot)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                print("Pool stream callback error:", e)
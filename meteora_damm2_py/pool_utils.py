@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, NamedTuple, Optional
 from solana.rpc.api import Client
 from solders.pubkey import Pubkey  # type: ignore
 
@@ -6,15 +6,81 @@ from solana.rpc.commitment import Processed
 from solana.rpc.types import MemcmpOpts
 
 from constants import METEORA_DAMM2_PROGRAM
-from pool_state import POOL_LAYOUT, parse_pool
+from pool_state import POOL_ACCOUNT_SIZE, Pool, decode_pool
 
+MULTIPLE_ACCOUNTS_CHUNK = 100
 
-def fetch_pool_state(client: Client, pool_str: str):
+
+class PoolCandidate(NamedTuple):
+    pool: Pubkey
+    liquidity: int
+    sqrt_price: int
+    cliff_fee_numerator: int
+    state: Pool
+
+
+def rank_pool_candidates(states: List[Pool]) -> List[PoolCandidate]:
+    candidates = [
+        PoolCandidate(
+            pool=s.pool,
+            liquidity=s.liquidity,
+            sqrt_price=s.sqrt_price,
+            cliff_fee_numerator=s.pool_fees.base_fee.cliff_fee_numerator,
+            state=s,
+        )
+        for s in states
+    ]
+    candidates.sort(key=lambda c: c.liquidity, reverse=True)
+    return candidates
+
+
+def fetch_pool_state(client: Client, pool_str: str) -> Pool:
     pool_pubkey = Pubkey.from_string(pool_str)
     info = client.get_account_info_json_parsed(pool_pubkey)
     raw_data = info.value.data
-    decoded = POOL_LAYOUT.parse(raw_data)
-    return parse_pool(pool_pubkey, decoded)
+    return decode_pool(pool_pubkey, raw_data)
+
+
+def fetch_pool_states(client: Client, pool_pubkeys: List[Pubkey]) -> List[Optional[Pool]]:
+    states: List[Optional[Pool]] = []
+    for i in range(0, len(pool_pubkeys), MULTIPLE_ACCOUNTS_CHUNK):
+        chunk = pool_pubkeys[i:i + MULTIPLE_ACCOUNTS_CHUNK]
+        resp = client.get_multiple_accounts(chunk, commitment=Processed)
+        for pk, account in zip(chunk, resp.value):
+            if account is None:
+                states.append(None)
+            else:
+                states.append(decode_pool(pk, account.data))
+    return states
+
+
+def fetch_pool_candidates(
+    client: Client,
+    base_mint: str,
+    quote_mint: str = "So11111111111111111111111111111111111111112",
+) -> List[PoolCandidate]:
+    f_base = MemcmpOpts(offset=168, bytes=base_mint)
+    f_quote = MemcmpOpts(offset=200, bytes=quote_mint)
+
+    resp = client.get_program_accounts(
+        METEORA_DAMM2_PROGRAM,
+        commitment=Processed,
+        filters=[POOL_ACCOUNT_SIZE, f_base, f_quote],
+    )
+
+    states: List[Pool] = []
+    missing: List[Pubkey] = []
+    for acct in resp.value:
+        data = acct.account.data
+        if isinstance(data, bytes) and len(data) >= POOL_ACCOUNT_SIZE:
+            states.append(decode_pool(acct.pubkey, data))
+        else:
+            missing.append(acct.pubkey)
+
+    if missing:
+        states.extend(s for s in fetch_pool_states(client, missing) if s is not None)
+
+    return rank_pool_candidates(states)
 
 
 def fetch_pool_from_rpc(
@@ -23,23 +89,9 @@ def fetch_pool_from_rpc(
     quote_mint: str = "So11111111111111111111111111111111111111112",
 ) -> Optional[str]:
     try:
-        f_base = MemcmpOpts(offset=168, bytes=base_mint)
-        f_quote = MemcmpOpts(offset=200, bytes=quote_mint)
-
-        resp = client.get_program_accounts(
-            METEORA_DAMM2_PROGRAM,
-            commitment=Processed,
-            filters=[f_base, f_quote],
-        )
-
-        best: Optional[str] = None
-        max_liq = -1
-        for acct in resp.value:
-            pk = acct.pubkey
-            state = fetch_pool_state(client, str(pk))
-            if state.liquidity > max_liq:
-                max_liq = state.liquidity
-                best = str(pk)
-        return best
+        candidates = fetch_pool_candidates(client, base_mint, quote_mint)
+        if not candidates:
+            return None
+        return str(candidates[0].pool)
     except:
         return None
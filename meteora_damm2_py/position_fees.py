@@ -0,0 +1,263 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Processed
+from solana.rpc.types import MemcmpOpts, TokenAccountOpts, TxOpts
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
+from spl.token.instructions import get_associated_token_address
+
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import AccountMeta, Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.system_program import ID as SYSTEM_PROGRAM_ID  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from account_decoder import AccountDecoder
+from confirmation import ConfirmationResult, wait_for_signature
+from constants import *
+from multi_sender import MultiSender
+from pool_state import Pool
+from pool_utils import MULTIPLE_ACCOUNTS_CHUNK, fetch_pool_states
+from wallet_state import TOKEN_ACCOUNT_STRUCT
+
+CLAIM_POSITION_FEE_DISCRIMINATOR = bytes([180, 38, 154, 17, 133, 33, 162, 211])
+POSITION_SEED = b"position"
+POSITION_POOL_OFFSET = 8
+# Fee per liquidity is stored as a U256 scaled by 2^128.
+LIQUIDITY_SCALE = 128
+MAX_COMPUTE_UNITS = 1_400_000
+
+
+class PositionFees(NamedTuple):
+    position: Pubkey
+    nft_account: Pubkey
+    state: Any
+    pool: Pool
+    fee_a: int
+    fee_b: int
+
+
+def derive_position(nft_mint: Pubkey) -> Pubkey:
+    return Pubkey.find_program_address([POSITION_SEED, bytes(nft_mint)], METEORA_DAMM2_PROGRAM)[0]
+
+
+def token_program(flag: int) -> Pubkey:
+    return TOKEN_2022_PROGRAM_ID if flag == 1 else TOKEN_PROGRAM_ID
+
+
+def pending_fee(liquidity: int, checkpoint: bytes, fee_per_liquidity: bytes, pending: int) -> int:
+    # Mirrors the program's update_fee: accrued since the checkpoint plus what is already pending.
+    delta = int.from_bytes(fee_per_liquidity, "little") - int.from_bytes(checkpoint, "little")
+    return pending + (liquidity * delta >> LIQUIDITY_SCALE)
+
+
+def position_fees(position: Pubkey, nft_account: Pubkey, state: Any, pool: Pool) -> PositionFees:
+    liquidity = state.unlocked_liquidity + state.vested_liquidity + state.permanent_locked_liquidity
+    fee_a = pending_fee(liquidity, state.fee_a_per_token_checkpoint, pool.fee_a_per_liquidity, state.fee_a_pending)
+    fee_b = pending_fee(liquidity, state.fee_b_per_token_checkpoint, pool.fee_b_per_liquidity, state.fee_b_pending)
+    return PositionFees(position, nft_account, state, pool, fee_a, fee_b)
+
+
+def fetch_position_nfts(client: Client, owner: Pubkey) -> Dict[Pubkey, Pubkey]:
+    # Positions are owned through a Token-2022 NFT, so the owner's NFTs lead to them.
+    resp = client.get_token_accounts_by_owner(
+        owner,
+        TokenAccountOpts(program_id=TOKEN_2022_PROGRAM_ID, encoding="base64"),
+        Processed,
+    )
+    nfts = {}
+    for keyed in resp.value:
+        mint, _, amount = TOKEN_ACCOUNT_STRUCT.unpack_from(bytes(keyed.account.data))
+        if amount == 1:
+            nfts[derive_position(Pubkey.from_bytes(mint))] = keyed.pubkey
+    return nfts
+
+
+def _with_pools(client: Client, states: List[Tuple[Pubkey, Pubkey, Any]]) -> List[PositionFees]:
+    pool_keys = list({state.pool for _, _, state in states})
+    pools = dict(zip(pool_keys, fetch_pool_states(client, pool_keys)))
+    return [
+        position_fees(position, nft_account, state, pools[state.pool])
+        for position, nft_account, state in states
+        if pools[state.pool] is not None
+    ]
+
+
+def scan_positions(client: Client, owner: Pubkey, decoder: Optional[AccountDecoder] = None) -> List[PositionFees]:
+    decoder = decoder or AccountDecoder()
+    nfts = fetch_position_nfts(client, owner)
+    positions = list(nfts)
+    states = []
+    for i in range(0, len(positions), MULTIPLE_ACCOUNTS_CHUNK):
+        chunk = positions[i:i + MULTIPLE_ACCOUNTS_CHUNK]
+        resp = client.get_multiple_accounts(chunk, commitment=Processed)
+        for position, account in zip(chunk, resp.value):
+            # Token-2022 accounts that are not position NFTs derive to empty addresses.
+            if account is None or account.owner != METEORA_DAMM2_PROGRAM:
+                continue
+            states.append((position, nfts[position], decoder.decode("Position", bytes(account.data))))
+    return _with_pools(client, states)
+
+
+def scan_pool_positions(
+    client: Client,
+    owner: Pubkey,
+    pool: Pubkey,
+    decoder: Optional[AccountDecoder] = None,
+) -> List[PositionFees]:
+    # One filtered getProgramAccounts returns every position in the pool.
+    decoder = decoder or AccountDecoder()
+    nfts = fetch_position_nfts(client, owner)
+    resp = client.get_program_accounts(
+        METEORA_DAMM2_PROGRAM,
+        Processed,
+        "base64",
+        filters=decoder.filters("Position") + [MemcmpOpts(POSITION_POOL_OFFSET, str(pool))],
+    )
+    states = [
+        (keyed.pubkey, nfts[keyed.pubkey], decoder.decode("Position", bytes(keyed.account.data)))
+        for keyed in resp.value
+        if keyed.pubkey in nfts
+    ]
+    return _with_pools(client, states)
+
+
+def create_ata_idempotent_ix(payer: Pubkey, owner: Pubkey, mint: Pubkey, program_id: Pubkey) -> Instruction:
+    accounts = [
+        AccountMeta(payer, True, True),
+        AccountMeta(get_associated_token_address(owner, mint, program_id), False, True),
+        AccountMeta(owner, False, False),
+        AccountMeta(mint, False, False),
+        AccountMeta(SYSTEM_PROGRAM_ID, False, False),
+        AccountMeta(program_id, False, False),
+    ]
+    return Instruction(ASSOCIATED_TOKEN_PROGRAM_ID, bytes([1]), accounts)
+
+
+def create_claim_position_fee_ix(position: PositionFees, owner: Pubkey) -> Instruction:
+    pool = position.pool
+    token_a_program = token_program(pool.token_a_flag)
+    token_b_program = token_program(pool.token_b_flag)
+    accounts = [
+        AccountMeta(POOL_AUTHORITY, False, False),
+        AccountMeta(pool.pool, False, False),
+        AccountMeta(position.position, False, True),
+        AccountMeta(get_associated_token_address(owner, pool.token_a_mint, token_a_program), False, True),
+        AccountMeta(get_associated_token_address(owner, pool.token_b_mint, token_b_program), False, True),
+        AccountMeta(pool.token_a_vault, False, True),
+        AccountMeta(pool.token_b_vault, False, True),
+        AccountMeta(pool.token_a_mint, False, False),
+        AccountMeta(pool.token_b_mint, False, False),
+        AccountMeta(position.nft_account, False, False),
+        AccountMeta(owner, True, False),
+        AccountMeta(token_a_program, False, False),
+        AccountMeta(token_b_program, False, False),
+        AccountMeta(EVENT_AUTH, False, False),
+        AccountMeta(METEORA_DAMM2_PROGRAM, False, False),
+    ]
+    return Instruction(METEORA_DAMM2_PROGRAM, CLAIM_POSITION_FEE_DISCRIMINATOR, accounts)
+
+
+def pack_claim_transactions(
+    positions: List[PositionFees],
+    payer_keypair: Keypair,
+    blockhash: Hash,
+    unit_price: int = 1_000_000,
+    units_per_claim: int = 60_000,
+    units_per_ata: int = 25_000,
+    max_units: int = MAX_COMPUTE_UNITS,
+    max_size: int = MAX_TRANSACTION_SIZE,
+) -> List[Tuple[VersionedTransaction, List[PositionFees]]]:
+    payer = payer_keypair.pubkey()
+    # Positions in the same pool share most accounts, so keep them together.
+    ordered = sorted(positions, key=lambda p: bytes(p.pool.pool))
+    packed = []
+    batch: List[PositionFees] = []
+    txn = None
+
+    def build(candidate: List[PositionFees]) -> Optional[VersionedTransaction]:
+        # The fee token accounts must exist; create them idempotently once per mint.
+        mints = {}
+        for p in candidate:
+            mints[p.pool.token_a_mint] = token_program(p.pool.token_a_flag)
+            mints[p.pool.token_b_mint] = token_program(p.pool.token_b_flag)
+        units = units_per_claim * len(candidate) + units_per_ata * len(mints)
+        if units > max_units:
+            return None
+        instructions = [set_compute_unit_limit(units), set_compute_unit_price(unit_price)]
+        instructions += [create_ata_idempotent_ix(payer, payer, mint, program) for mint, program in mints.items()]
+        instructions += [create_claim_position_fee_ix(p, payer) for p in candidate]
+        message = MessageV0.try_compile(payer, instructions, [], blockhash)
+        signed = VersionedTransaction(message, [payer_keypair])
+        if len(bytes(signed)) > max_size:
+            return None
+        return signed
+
+    for position in ordered:
+        candidate = build(batch + [position])
+        if candidate is None:
+            if not batch:
+                raise ValueError(f"Claim for {position.position} does not fit in one transaction")
+            packed.append((txn, batch))
+            batch = [position]
+            txn = build(batch)
+            if txn is None:
+                raise ValueError(f"Claim for {position.position} does not fit in one transaction")
+        else:
+            batch.append(position)
+            txn = candidate
+    if batch:
+        packed.append((txn, batch))
+    return packed
+
+
+def send_claim_transactions(
+    client: Client,
+    txns: List[VersionedTransaction],
+    last_valid_block_height: Optional[int] = None,
+    sender: Optional[MultiSender] = None,
+    max_workers: int = 8,
+) -> List[ConfirmationResult]:
+    opts = TxOpts(skip_preflight=True)
+
+    def send_and_confirm(txn: VersionedTransaction) -> ConfirmationResult:
+        sent_at = time.perf_counter()
+        if sender is not None:
+            signature = sender.send(txn, opts).signature
+        else:
+            signature = client.send_transaction(txn, opts).value
+        return wait_for_signature(client, signature, last_valid_block_height, sent_at=sent_at)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="claim-fees") as executor:
+        return list(executor.map(send_and_confirm, txns))
+
+
+def claim_position_fees(
+    client: Client,
+    payer_keypair: Keypair,
+    unit_price: int = 1_000_000,
+    min_fee_a: int = 1,
+    min_fee_b: int = 1,
+    sender: Optional[MultiSender] = None,
+) -> List[ConfirmationResult]:
+    positions = [
+        p for p in scan_positions(client, payer_keypair.pubkey())
+        if p.fee_a >= min_fee_a or p.fee_b >= min_fee_b
+    ]
+    if not positions:
+        print("No position fees to claim.")
+        return []
+    latest = client.get_latest_blockhash().value
+    packed = pack_claim_transactions(positions, payer_keypair, latest.blockhash, unit_price)
+    print(f"Claiming {len(positions)} positions in {len(packed)} transactions...")
+    return send_claim_transactions(
+        client,
+        [txn for txn, _ in packed],
+        latest.last_valid_block_height,
+        sender,
+    )
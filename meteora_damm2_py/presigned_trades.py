@@ -0,0 +1,256 @@
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from solana.rpc.types import TxOpts
+from solders.message import MessageV0  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from common_utils import report_confirmation
+from confirmation import wait_for_signature
+from nonce_pool import NonceAccount, NoncePool, advance_nonce_ix
+from trade_context import (
+    SwapPlan,
+    TradeContext,
+    TradeResult,
+    after_buy,
+    after_sell,
+    build_buy,
+    build_sell,
+)
+
+
+class PresignedTrade(NamedTuple):
+    side: str
+    # Lamports in for a buy, percentage of the balance for a sell.
+    size: int
+    nonce: NonceAccount
+    plan: SwapPlan
+    txn: VersionedTransaction
+    raw: bytes
+    signed_at: float
+
+
+class PresignedTrader:
+    def __init__(
+        self,
+        ctx: TradeContext,
+        nonces: NoncePool,
+        buy_sizes: Sequence[float] = (),
+        sell_percentages: Sequence[int] = (),
+        spare_nonces: int = 2,
+        refresh_interval: float = 1.0,
+        max_age: float = 30.0,
+        resign_bps: int = 50,
+        confirm_timeout: float = 90,
+    ):
+        self.ctx = ctx
+        self.nonces = nonces
+        self.planned: List[Tuple[str, int]] = [("buy", int(s * 10**9)) for s in buy_sizes]
+        self.planned += [("sell", p) for p in sell_percentages]
+        # Extra nonces kept ready so a fired trade is replaced before its own settles.
+        self.spare_nonces = spare_nonces
+        self.refresh_interval = refresh_interval
+        # Re-sign once a quote is this old or the price has moved this far.
+        self.max_age = max_age
+        self.resign_bps = resign_bps
+        self.confirm_timeout = confirm_timeout
+        # Voiding a nonce while its trade is still being confirmed would cancel a trade that could still land.
+        nonces.settle_timeout = max(nonces.settle_timeout, confirm_timeout)
+        self.trades: Dict[Tuple[str, int], PresignedTrade] = {}
+        self.signed = 0
+        self.fired = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _depends_on_wallet(self, side: str) -> bool:
+        # Sells size off the balance; buys may create the base ATA or spend WSOL.
+        return side == "sell" or self.ctx.wsol is not None or not self.ctx.base_account_exists
+
+    def _stale(self, trade: PresignedTrade, sqrt_price: int) -> bool:
+        if time.monotonic() - trade.signed_at > self.max_age:
+            return True
+        signed_price = trade.plan.pool_state.sqrt_price ** 2
+        return abs(sqrt_price ** 2 - signed_price) * 10_000 > self.resign_bps * signed_price
+
+    def sign(self, side: str, size: int, nonce: NonceAccount) -> Optional[PresignedTrade]:
+        ctx = self.ctx
+        if side == "sell":
+            if not ctx.base_balance:
+                return None
+            plan = build_sell(ctx, size)
+        else:
+            plan = build_buy(ctx, size)
+        instructions = plan.instructions
+        if ctx.cu_profiler:
+            # The simulation needs a real blockhash; the nonce is only valid with its advance.
+            instructions = ctx.cu_profiler.apply(
+                plan.shape, instructions, ctx.payer_keypair, ctx.blockhash_cache.get().blockhash
+            )
+        instructions = [advance_nonce_ix(nonce.address, ctx.payer), *instructions]
+        if ctx.lookup_tables:
+            message = ctx.lookup_tables.compile(ctx.payer, instructions, nonce.nonce)
+        else:
+            message = MessageV0.try_compile(ctx.payer, instructions, [], nonce.nonce)
+        txn = VersionedTransaction(message, [ctx.payer_keypair])
+        return PresignedTrade(side, size, nonce, plan, txn, bytes(txn), time.monotonic())
+
+    def prepare(self) -> int:
+        self.ctx.sync_wallet()
+        sqrt_price = self.ctx.current_pool().sqrt_price
+        signed = 0
+        for key in self.planned:
+            if self._in_flight and self._depends_on_wallet(key[0]):
+                # Wait for the fired trade to settle the wallet state first.
+                continue
+            with self._lock:
+                trade = self.trades.get(key)
+            if trade is not None and not self._stale(trade, sqrt_price):
+                continue
+            # An unsent transaction never left this process, so its nonce can be reused.
+            nonce = trade.nonce if trade is not None else self.nonces.acquire()
+            if nonce is None:
+                break
+            replacement = self.sign(*key, nonce)
+            with self._lock:
+                if self.trades.get(key) is not trade:
+                    # Fired or dropped while signing; that path owns the nonce.
+                    continue
+                if replacement is None:
+                    self.trades.pop(key, None)
+                else:
+                    self.trades[key] = replacement
+                    signed += 1
+            if replacement is None:
+                self.nonces.release(nonce)
+        self.signed += signed
+        return signed
+
+    def invalidate(self, dependents_only: bool = False) -> int:
+        with self._lock:
+            dropped = [
+                key for key in self.trades
+                if not dependents_only or self._depends_on_wallet(key[0])
+            ]
+            trades = [self.trades.pop(key) for key in dropped]
+        for trade in trades:
+            self.nonces.release(trade.nonce)
+        return len(trades)
+
+    def _drop_collided(self, collided: List[NonceAccount]) -> None:
+        if not collided:
+            return
+        with self._lock:
+            for key, trade in list(self.trades.items()):
+                if trade.nonce in collided:
+                    del self.trades[key]
+        print(f"Dropped {len(collided)} pre-signed trades whose nonce moved")
+
+    def fire(self, side: str, size: int, confirm: bool = True) -> Optional[TradeResult]:
+        started = time.perf_counter()
+        with self._lock:
+            trade = self.trades.pop((side, size), None)
+            if trade is not None:
+                self._in_flight += 1
+        if trade is None:
+            self.misses += 1
+            print(f"No pre-signed {side} of size {size}.")
+            return None
+        ctx = self.ctx
+        opts = TxOpts(skip_preflight=ctx.skip_preflight)
+        sending = time.perf_counter()
+        try:
+            if ctx.sender:
+                sig = ctx.sender.send(trade.txn, opts).signature
+            else:
+                sig = ctx.client.send_raw_transaction(trade.raw, opts).value
+        except Exception as e:
+            print("Pre-signed send failed:", e)
+            sig = None
+        sent = time.perf_counter()
+        # Even a rejected send may have reached a leader, so the nonce waits to settle.
+        self.nonces.mark_sent(trade.nonce)
+        self.fired += 1
+        self.invalidate(dependents_only=True)
+
+        confirmed = False if sig is None else None
+        status = "failed" if sig is None else None
+        if confirm and sig is not None:
+            # Durable-nonce transactions never expire, so only the timeout ends the wait.
+            outcome = wait_for_signature(ctx.client, sig, timeout=self.confirm_timeout, sent_at=sending)
+            status = outcome.status
+            confirmed = report_confirmation(outcome)
+        result = TradeResult(
+            signature=sig,
+            confirmed=confirmed,
+            amount_in=trade.plan.amount_in,
+            minimum_amount_out=trade.plan.minimum_amount_out,
+            build_ms=(sending - started) * 1000,
+            send_ms=(sent - sending) * 1000,
+            status=status,
+        )
+        try:
+            if side == "buy":
+                after_buy(ctx, trade.plan, result, None)
+            else:
+                after_sell(ctx, trade.plan, result)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._wake.set()
+        return result
+
+    def fire_buy(self, quote_in: float, confirm: bool = True) -> Optional[TradeResult]:
+        return self.fire("buy", int(quote_in * 10**9), confirm)
+
+    def fire_sell(self, percentage: int = 100, confirm: bool = True) -> Optional[TradeResult]:
+        return self.fire("sell", percentage, confirm)
+
+    def stats(self) -> dict:
+        return {
+            "ready": len(self.trades),
+            "planned": len(self.planned),
+            "signed": self.signed,
+            "fired": self.fired,
+            "misses": self.misses,
+            **self.nonces.stats(),
+        }
+
+    def tick(self) -> int:
+        self._drop_collided(self.nonces.refresh())
+        created = self.nonces.refill(len(self.planned) + self.spare_nonces)
+        self.prepare()
+        return created
+
+    def start(self) -> "PresignedTrader":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="presigned-trades", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            created = 0
+            try:
+                created = self.tick()
+            except Exception as e:
+                self.refresh_errors += 1
+                print("Pre-signed refresh failed:", e)
+            if created:
+                # Pick the new accounts up straight away.
+                continue
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
@@ -0,0 +1,147 @@
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from solana.rpc.api import Client
+from solders.pubkey import Pubkey  # type: ignore
+
+from common_utils import percentile, rpc_request
+from pool_state import Pool
+
+PERCENTILES = (50, 75, 90)
+
+
+class FeeEstimate(NamedTuple):
+    p50: int
+    p75: int
+    p90: int
+    samples: int
+    max_slot: int
+    fetched_at: float
+
+    def age_ms(self) -> float:
+        return (time.monotonic() - self.fetched_at) * 1000
+
+    def get(self, pct: int) -> int:
+        return getattr(self, f"p{pct}")
+
+
+def fee_accounts(pool_state: Pool) -> List[Pubkey]:
+    # The writable accounts every swap on the pool locks.
+    return [pool_state.pool, pool_state.token_a_vault, pool_state.token_b_vault]
+
+
+def get_recent_prioritization_fees(client: Client, accounts: List[Pubkey]) -> List[Tuple[int, int]]:
+    result = rpc_request(client, "getRecentPrioritizationFees", [[str(account) for account in accounts]])
+    return [(fee["slot"], fee["prioritizationFee"]) for fee in result]
+
+
+def to_fee_estimate(fees: List[Tuple[int, int]]) -> FeeEstimate:
+    values = [fee for _, fee in fees]
+    p50, p75, p90 = (int(percentile(values, pct) or 0) for pct in PERCENTILES)
+    return FeeEstimate(
+        p50=p50,
+        p75=p75,
+        p90=p90,
+        samples=len(values),
+        max_slot=max((slot for slot, _ in fees), default=0),
+        fetched_at=time.monotonic(),
+    )
+
+
+class PriorityFeeEstimator:
+    def __init__(
+        self,
+        client: Client,
+        fee_percentile: int = 75,
+        cap: int = 5_000_000,
+        floor: int = 0,
+        ttl_ms: float = 10_000,
+        refresh_interval: float = 2.0,
+    ):
+        if fee_percentile not in PERCENTILES:
+            raise ValueError(f"fee_percentile must be one of {PERCENTILES}")
+        self.client = client
+        self.fee_percentile = fee_percentile
+        self.cap = cap
+        self.floor = floor
+        self.ttl_ms = ttl_ms
+        self.refresh_interval = refresh_interval
+        self.refresh_errors = 0
+        self._pools: Dict[Pubkey, List[Pubkey]] = {}
+        self._estimates: Dict[Pubkey, FeeEstimate] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, pool_state: Pool) -> None:
+        with self._lock:
+            if pool_state.pool in self._pools:
+                return
+            self._pools[pool_state.pool] = fee_accounts(pool_state)
+        # Started on first use, so estimate() never queues a pool nobody refreshes.
+        self.start()
+        self._wake.set()
+
+    def untrack(self, pool_state: Pool) -> None:
+        with self._lock:
+            self._pools.pop(pool_state.pool, None)
+            self._estimates.pop(pool_state.pool, None)
+
+    def peek(self, pool_state: Pool) -> Optional[FeeEstimate]:
+        return self._estimates.get(pool_state.pool)
+
+    def estimate(
+        self,
+        pool_state: Pool,
+        pct: Optional[int] = None,
+        default: int = 1_000_000,
+    ) -> int:
+        # Never fetch here: an unknown or stale pool gets the default and is
+        # queued for the background thread.
+        entry = self._estimates.get(pool_state.pool)
+        if entry is None or entry.age_ms() > self.ttl_ms:
+            self.track(pool_state)
+            return default
+        value = entry.get(pct or self.fee_percentile)
+        return min(max(value, self.floor), self.cap)
+
+    def refresh(self, pool_state: Pool) -> FeeEstimate:
+        self.track(pool_state)
+        return self._refresh(pool_state.pool, fee_accounts(pool_state))
+
+    def _refresh(self, pool: Pubkey, accounts: List[Pubkey]) -> FeeEstimate:
+        entry = to_fee_estimate(get_recent_prioritization_fees(self.client, accounts))
+        with self._lock:
+            if pool in self._pools:
+                self._estimates[pool] = entry
+        return entry
+
+    def start(self) -> "PriorityFeeEstimator":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="priority-fees", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                pools = list(self._pools.items())
+            for pool, accounts in pools:
+                try:
+                    self._refresh(pool, accounts)
+                except Exception as e:
+                    self.refresh_errors += 1
+                    print("Priority fee refresh failed:", e)
+            # A newly tracked pool wakes the thread early.
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
@@ -0,0 +1,13 @@
+from solana.rpc.api import Client
+
+from cu_profile import DEFAULT_PROFILE_PATH, CuProfiler
+
+# Configuration
+rpc = "rpc_url_here"
+profile_path = DEFAULT_PROFILE_PATH
+unit_budget = 100_000
+unit_price = 1_000_000
+
+# Load the saved profile and compare it with the flat limit
+profiler = CuProfiler(Client(rpc), profile_path)
+profiler.print_report(unit_budget, unit_price)
@@ -0,0 +1,434 @@
+import math
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Processed
+from solana.rpc.types import TokenAccountOpts, TxOpts
+
+from spl.token.client import Token
+from spl.token.instructions import (
+    CloseAccountParams,
+    close_account,
+    create_associated_token_account,
+    get_associated_token_address,
+)
+
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.hash import Hash  # type: ignore
+from solders.instruction import Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from blockhash_cache import BlockhashCache
+from common_utils import confirm_txn, get_token_balance
+from constants import *
+from lookup_tables import LookupTableManager
+from meteora_damm2 import create_quote_token_account_ixs, create_swap_ix
+from pool_state import Pool
+from pool_utils import fetch_pool_candidates
+from swap_estimate import (
+    FEE_DENOMINATOR,
+    SCALE_OFFSET,
+    SwapResult,
+    get_minimum_amount_out,
+    get_pool_current_point,
+    get_pool_fee_numerator,
+    get_pool_swap_amount,
+)
+
+Q64 = float(1 << SCALE_OFFSET)
+
+
+class RouteLeg(NamedTuple):
+    pool: Pool
+    amount_in: int
+    quote: SwapResult
+
+
+class Route(NamedTuple):
+    a_to_b: bool
+    amount_in: int
+    amount_out: int
+    legs: List[RouteLeg]
+
+
+class _Curve(NamedTuple):
+    # Input into one pool moves it along amount_in = l * (sqrt(g) * t - x), where
+    # t is shared by all pools once their marginal prices are equal.
+    pool: Pool
+    current_point: int
+    l: float
+    x: float
+    root_g: float
+    t_max: float
+
+    def threshold(self) -> float:
+        return self.x / self.root_g
+
+
+def fetch_pair_pools(client: Client, base_mint: str, quote_mint: str = str(WSOL_MINT)) -> List[Pool]:
+    # One getProgramAccounts scan returns every pool for the pair.
+    return [c.state for c in fetch_pool_candidates(client, base_mint, quote_mint)]
+
+
+def _curve(pool: Pool, a_to_b: bool, current_slot: Optional[int]) -> Optional[_Curve]:
+    if pool.liquidity == 0 or pool.sqrt_price == 0 or pool.pool_status != 0:
+        return None
+    current_point = get_pool_current_point(pool, current_slot)
+    if current_point < pool.activation_point:
+        return None
+    fee = get_pool_fee_numerator(pool, current_point)
+    root_g = math.sqrt(1 - fee / FEE_DENOMINATOR)
+    l = pool.liquidity / Q64
+    p = pool.sqrt_price / Q64
+    if a_to_b:
+        # Selling base lowers the price: the marginal output is g * p'^2.
+        x, x_max = 1 / p, Q64 / pool.sqrt_min_price if pool.sqrt_min_price else math.inf
+    else:
+        # Buying base raises the price: the marginal output is g / p'^2.
+        x, x_max = p, pool.sqrt_max_price / Q64
+    if x_max <= x:
+        return None
+    return _Curve(pool, current_point, l, x, root_g, x_max / root_g)
+
+
+def _equalize(curves: List[_Curve], amount_in: float) -> List[float]:
+    # Adds pools in order of their starting marginal price until the common
+    # level t no longer reaches the next one. Pools that would run past their
+    # price range are pinned at it and the rest is solved again.
+    amounts = [0.0] * len(curves)
+    remaining = amount_in
+    free = sorted(range(len(curves)), key=lambda i: curves[i].threshold())
+    while free and remaining > 0:
+        weight = base = 0.0
+        active = []
+        t = 0.0
+        for i in free:
+            c = curves[i]
+            if active and t <= c.threshold():
+                break
+            active.append(i)
+            weight += c.l * c.root_g
+            base += c.l * c.x
+            t = (remaining + base) / weight
+        capped = [i for i in active if t > curves[i].t_max]
+        if not capped:
+            for i in active:
+                c = curves[i]
+                amounts[i] = c.l * (c.root_g * t - c.x)
+            break
+        for i in capped:
+            c = curves[i]
+            amounts[i] = c.l * (c.root_g * c.t_max - c.x)
+            remaining -= amounts[i]
+            free.remove(i)
+    return amounts
+
+
+def split_route(
+    pools: List[Pool],
+    amount_in: int,
+    a_to_b: bool,
+    current_slot: Optional[int] = None,
+    max_legs: int = 4,
+    min_leg_bps: int = 50,
+) -> Optional[Route]:
+    curves = [c for c in (_curve(pool, a_to_b, current_slot) for pool in pools) if c is not None]
+    if not curves or amount_in <= 0:
+        return None
+
+    amounts = _equalize(curves, float(amount_in))
+    # Each extra leg costs a swap's CU and accounts, so drop the smallest ones.
+    ranked = sorted(range(len(curves)), key=lambda i: amounts[i], reverse=True)
+    keep = [i for i in ranked[:max_legs] if amounts[i] * 10_000 >= amount_in * min_leg_bps] or ranked[:1]
+    if len(keep) < len(curves):
+        curves = [curves[i] for i in keep]
+        amounts = _equalize(curves, float(amount_in))
+
+    shares = [int(a) for a in amounts]
+    shares[max(range(len(shares)), key=lambda i: shares[i])] += amount_in - sum(shares)
+    legs = [
+        RouteLeg(c.pool, share, get_pool_swap_amount(c.pool, share, a_to_b, c.current_point))
+        for c, share in zip(curves, shares)
+        if share > 0
+    ]
+    return Route(a_to_b, amount_in, sum(leg.quote.amount_out for leg in legs), legs)
+
+
+def best_single_route(
+    pools: List[Pool],
+    amount_in: int,
+    a_to_b: bool,
+    current_slot: Optional[int] = None,
+) -> Optional[Route]:
+    routes = [split_route([pool], amount_in, a_to_b, current_slot, max_legs=1) for pool in pools]
+    routes = [r for r in routes if r is not None]
+    return max(routes, key=lambda r: r.amount_out, default=None)
+
+
+def create_route_swap_ixs(
+    route: Route,
+    payer: Pubkey,
+    input_token_account: Pubkey,
+    output_token_account: Pubkey,
+    slippage_bps: int,
+) -> List[Instruction]:
+    # Each leg carries its own minimum, so a moved pool fails the whole transaction.
+    return [
+        create_swap_ix(
+            leg.pool,
+            payer,
+            input_token_account,
+            output_token_account,
+            leg.amount_in,
+            get_minimum_amount_out(leg.quote.amount_out, slippage_bps),
+        )
+        for leg in route.legs
+    ]
+
+
+def _fit_route(
+    payer_keypair: Keypair,
+    blockhash: Hash,
+    route: Route,
+    build: Callable[[Route], List[Instruction]],
+    reroute: Callable[[int], Route],
+    lookup_tables: Optional[LookupTableManager] = None,
+) -> Tuple[VersionedTransaction, Route]:
+    # Every leg adds the pool's accounts that are not in a lookup table, so drop legs until it fits.
+    # Looked-up accounts save bytes but still count toward the account lock limit.
+    while True:
+        if lookup_tables:
+            message = lookup_tables.compile(payer_keypair.pubkey(), build(route), blockhash)
+        else:
+            message = MessageV0.try_compile(payer_keypair.pubkey(), build(route), [], blockhash)
+        accounts = len(message.account_keys) + sum(
+            len(lookup.writable_indexes) + len(lookup.readonly_indexes)
+            for lookup in message.address_table_lookups
+        )
+        txn = VersionedTransaction(message, [payer_keypair])
+        size = len(bytes(txn))
+        if size <= MAX_TRANSACTION_SIZE and accounts <= MAX_TRANSACTION_ACCOUNTS:
+            return txn, route
+        if len(route.legs) == 1:
+            raise ValueError(
+                f"A single leg does not fit: {size} bytes (max {MAX_TRANSACTION_SIZE}), "
+                f"{accounts} accounts (max {MAX_TRANSACTION_ACCOUNTS})"
+            )
+        route = reroute(len(route.legs) - 1)
+
+
+def _send_route(
+    client: Client,
+    payer_keypair: Keypair,
+    route: Route,
+    build: Callable[[Route], List[Instruction]],
+    reroute: Callable[[int], Route],
+    skip_preflight: bool,
+    blockhash_cache: Optional[BlockhashCache],
+    lookup_tables: Optional[LookupTableManager],
+) -> bool:
+    print("Compiling transaction message...")
+    if blockhash_cache:
+        latest_blockhash = blockhash_cache.get()
+    else:
+        latest_blockhash = client.get_latest_blockhash().value
+    txn, route = _fit_route(payer_keypair, latest_blockhash.blockhash, route, build, reroute, lookup_tables)
+    print(f"Sending {len(route.legs)}-leg route, expected out: {route.amount_out}")
+    _print_route(route)
+    txn_sig = client.send_transaction(
+        txn=txn,
+        opts=TxOpts(skip_preflight=skip_preflight),
+    ).value
+    print("Transaction Signature:", txn_sig)
+
+    print("Confirming transaction...")
+    confirmed = confirm_txn(client, txn_sig, last_valid_block_height=latest_blockhash.last_valid_block_height)
+    print("Transaction confirmed:", confirmed)
+    if confirmed and lookup_tables:
+        for leg in route.legs:
+            lookup_tables.record_trade(leg.pool)
+    return confirmed
+
+
+def _print_route(route: Route) -> None:
+    for leg in route.legs:
+        print(f"  {leg.pool.pool}: in {leg.amount_in}, out {leg.quote.amount_out}")
+
+
+def buy_split(
+    client: Client,
+    payer_keypair: Keypair,
+    base_mint: str,
+    quote_in: float = 0.1,
+    unit_budget: int = 100_000,
+    unit_price: int = 1_000_000,
+    slippage_bps: int = 500,
+    max_legs: int = 4,
+    skip_preflight: bool = False,
+    blockhash_cache: Optional[BlockhashCache] = None,
+    lookup_tables: Optional[LookupTableManager] = None,
+) -> bool:
+    try:
+        print(f"Starting split buy for mint: {base_mint}")
+        quote_amount_in = int(quote_in * 10**9)
+
+        print("Fetching pools for pair...")
+        pools = fetch_pair_pools(client, base_mint)
+        current_slot = blockhash_cache.latest.slot if blockhash_cache and blockhash_cache.latest else None
+        started = time.perf_counter()
+        route = split_route(pools, quote_amount_in, False, current_slot, max_legs)
+        if route is None:
+            print("No tradable pool found...")
+            return False
+        print(f"Routed across {len(route.legs)} of {len(pools)} pools in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+        print("Checking for existing base token account...")
+        base_mint_pubkey = Pubkey.from_string(base_mint)
+        base_account_check = client.get_token_accounts_by_owner(
+            payer_keypair.pubkey(),
+            TokenAccountOpts(base_mint_pubkey),
+            Processed,
+        )
+        base_account_ix = None
+        if base_account_check.value:
+            base_token_account = base_account_check.value[0].pubkey
+        else:
+            base_token_account = get_associated_token_address(payer_keypair.pubkey(), base_mint_pubkey)
+            base_account_ix = create_associated_token_account(
+                payer_keypair.pubkey(),
+                payer_keypair.pubkey(),
+                base_mint_pubkey,
+            )
+
+        quote_rent = Token.get_min_balance_rent_for_exempt_for_account(client)
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            create_quote_token_account_ixs(
+                payer_keypair.pubkey(),
+                WSOL_MINT,
+                quote_rent + quote_amount_in,
+            )
+        )
+
+        def build(route: Route) -> List[Instruction]:
+            instructions = [
+                set_compute_unit_limit(unit_budget * len(route.legs)),
+                set_compute_unit_price(unit_price),
+                *quote_account_ixs,
+            ]
+            if base_account_ix:
+                instructions.append(base_account_ix)
+            instructions += create_route_swap_ixs(
+                route,
+                payer_keypair.pubkey(),
+                quote_token_account,
+                base_token_account,
+                slippage_bps,
+            )
+            instructions.append(close_quote_token_account_ix)
+            return instructions
+
+        return _send_route(
+            client,
+            payer_keypair,
+            route,
+            build,
+            lambda legs: split_route(pools, quote_amount_in, False, current_slot, legs),
+            skip_preflight,
+            blockhash_cache,
+            lookup_tables,
+        )
+
+    except Exception as e:
+        print("Error occurred during transaction:", e)
+        return False
+
+
+def sell_split(
+    client: Client,
+    payer_keypair: Keypair,
+    base_mint: str,
+    percentage: int = 100,
+    unit_budget: int = 100_000,
+    unit_price: int = 1_000_000,
+    slippage_bps: int = 500,
+    max_legs: int = 4,
+    skip_preflight: bool = False,
+    blockhash_cache: Optional[BlockhashCache] = None,
+    lookup_tables: Optional[LookupTableManager] = None,
+) -> bool:
+    try:
+        print(f"Starting split sell for mint: {base_mint}")
+
+        if not (1 <= percentage <= 100):
+            print("Percentage must be between 1 and 100.")
+            return False
+
+        base_mint_pubkey = Pubkey.from_string(base_mint)
+        print("Retrieving base token balance...")
+        base_balance = get_token_balance(client, payer_keypair.pubkey(), base_mint_pubkey)
+        if not base_balance:
+            print("Base token balance is zero. Nothing to sell.")
+            return False
+        base_amount_in = int(base_balance * (percentage / 100))
+
+        print("Fetching pools for pair...")
+        pools = fetch_pair_pools(client, base_mint)
+        current_slot = blockhash_cache.latest.slot if blockhash_cache and blockhash_cache.latest else None
+        started = time.perf_counter()
+        route = split_route(pools, base_amount_in, True, current_slot, max_legs)
+        if route is None:
+            print("No tradable pool found...")
+            return False
+        print(f"Routed across {len(route.legs)} of {len(pools)} pools in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+        base_token_account = get_associated_token_address(payer_keypair.pubkey(), base_mint_pubkey)
+        quote_rent = Token.get_min_balance_rent_for_exempt_for_account(client)
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            create_quote_token_account_ixs(payer_keypair.pubkey(), WSOL_MINT, quote_rent)
+        )
+
+        def build(route: Route) -> List[Instruction]:
+            instructions = [
+                set_compute_unit_limit(unit_budget * len(route.legs)),
+                set_compute_unit_price(unit_price),
+                *quote_account_ixs,
+                *create_route_swap_ixs(
+                    route,
+                    payer_keypair.pubkey(),
+                    base_token_account,
+                    quote_token_account,
+                    slippage_bps,
+                ),
+                close_quote_token_account_ix,
+            ]
+            if percentage == 100:
+                instructions.append(
+                    close_account(
+                        CloseAccountParams(
+                            program_id=TOKEN_PROGRAM_ID,
+                            account=base_token_account,
+                            dest=payer_keypair.pubkey(),
+                            owner=payer_keypair.pubkey(),
+                        )
+                    )
+                )
+            return instructions
+
+        return _send_route(
+            client,
+            payer_keypair,
+            route,
+            build,
+            lambda legs: split_route(pools, base_amount_in, True, current_slot, legs),
+            skip_preflight,
+            blockhash_cache,
+            lookup_tables,
+        )
+
+    except Exception as e:
+        print("Error occurred during transaction:", e)
+        return False
@@ -0,0 +1,176 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment, Confirmed
+from solders.signature import Signature  # type: ignore
+
+from common_utils import percentile
+from confirmation import COMMITMENT_LEVEL, ConfirmationProgress, ConfirmationResult
+
+MAX_SIGNATURES_PER_CALL = 256
+
+ConfirmationCallback = Callable[[ConfirmationResult], None]
+
+
+@dataclass
+class TrackedSignature:
+    signature: Signature
+    progress: ConfirmationProgress
+    last_valid_block_height: Optional[int]
+    deadline: float
+    future: Future
+    callback: Optional[ConfirmationCallback]
+    past_expiry: bool = False
+
+
+class SignatureTracker:
+    def __init__(
+        self,
+        client: Client,
+        poll_interval: float = 0.4,
+        timeout: float = 90,
+        latency_window: int = 1000,
+    ):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.rpc_calls = 0
+        self.resolved = 0
+        self._pending: Dict[Signature, TrackedSignature] = {}
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        signature: Signature,
+        last_valid_block_height: Optional[int] = None,
+        commitment: Commitment = Confirmed,
+        callback: Optional[ConfirmationCallback] = None,
+        sent_at: Optional[float] = None,
+    ) -> Future:
+        tracked = TrackedSignature(
+            signature=signature,
+            progress=ConfirmationProgress(sent_at or time.perf_counter(), COMMITMENT_LEVEL[commitment]),
+            last_valid_block_height=last_valid_block_height,
+            deadline=time.monotonic() + self.timeout,
+            future=Future(),
+            callback=callback,
+        )
+        with self._lock:
+            existing = self._pending.get(signature)
+            if existing is not None:
+                return existing.future
+            self._pending[signature] = tracked
+        # Started on first use, so a tracker nobody started cannot leave the future hanging.
+        self.start()
+        self._wake.set()
+        return tracked.future
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def latency_percentiles(self, pcts=(50, 90, 99)) -> Dict[int, Optional[float]]:
+        latencies = list(self._latencies)
+        return {pct: percentile(latencies, pct) for pct in pcts}
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "resolved": self.resolved,
+            "rpc_calls": self.rpc_calls,
+            "confirm_ms": self.latency_percentiles(),
+        }
+
+    def start(self) -> "SignatureTracker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="signature-tracker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> None:
+        with self._lock:
+            tracked = list(self._pending.values())
+        if not tracked:
+            return
+
+        try:
+            self._poll_statuses(tracked)
+        finally:
+            # Deadlines are enforced even while the RPC is failing.
+            now = time.monotonic()
+            for t in tracked:
+                if not t.future.done() and now > t.deadline:
+                    landed = any(v is not None for v in t.progress.times)
+                    self._resolve(t, t.progress.result(t.signature, None if landed else "timeout"))
+
+    def _poll_statuses(self, tracked: List[TrackedSignature]) -> None:
+        unseen: List[TrackedSignature] = []
+        for i in range(0, len(tracked), MAX_SIGNATURES_PER_CALL):
+            chunk = tracked[i:i + MAX_SIGNATURES_PER_CALL]
+            statuses = self.client.get_signature_statuses([t.signature for t in chunk]).value
+            self.rpc_calls += 1
+            for t, status in zip(chunk, statuses):
+                if status is None:
+                    unseen.append(t)
+                    continue
+                t.progress.mark_status(status)
+                if t.progress.done():
+                    self._resolve(t, t.progress.result(t.signature))
+
+        # A signature is only expired once it is still unseen on the poll after
+        # the block height passed its limit, so a late landing is not missed.
+        for t in unseen:
+            if t.past_expiry:
+                self._resolve(t, t.progress.result(t.signature, "expired"))
+        waiting = [t for t in unseen if t.last_valid_block_height is not None and not t.past_expiry]
+        if waiting:
+            # One block height read covers every signature still waiting to land.
+            block_height = self.client.get_block_height(Confirmed).value
+            self.rpc_calls += 1
+            for t in waiting:
+                if block_height > t.last_valid_block_height:
+                    t.past_expiry = True
+
+    def _resolve(self, tracked: TrackedSignature, result: ConfirmationResult) -> None:
+        with self._lock:
+            self._pending.pop(tracked.signature, None)
+        self.resolved += 1
+        if result.confirmed_ms is not None:
+            self._latencies.append(result.confirmed_ms)
+        tracked.future.set_result(result)
+        if tracked.callback is not None:
+            try:
+                tracked.callback(result)
+            except Exception as e:
+                print("Signature callback error:", e)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self._pending:
+                self._wake.wait()
+                self._wake.clear()
+                # Give a fresh send time to reach the leader before the first poll.
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                self.poll()
+            except Exception as e:
+                print("Signature tracker poll failed:", e)
+            self._stop.wait(self.poll_interval)
@@ -0,0 +1,169 @@
+import asyncio
+import base64
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import websockets
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from constants import METEORA_DAMM2_PROGRAM
+
+# Local stand-ins for RPC endpoints, used by the bench scripts.
+
+
+class StandInSender:
+    # sendTransaction only. delay, error (a TransactionError name such as
+    # "BlockhashNotFound") and status can be changed between sends to make the
+    # endpoint slow, reject transactions or fail at the HTTP level.
+    def __init__(self, delay: float = 0.0, error: Optional[str] = None, status: int = 200):
+        self.delay = delay
+        self.error = error
+        self.status = status
+        self.requests = 0
+        self.answered = 0
+        self._lock = threading.Lock()
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with outer._lock:
+                    outer.requests += 1
+                time.sleep(outer.delay)
+                try:
+                    if outer.status != 200:
+                        self.send_response(outer.status)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                    else:
+                        data = json.dumps(outer.answer(body)).encode()
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/json")
+                        self.send_header("Content-Length", str(len(data)))
+                        self.end_headers()
+                        self.wfile.write(data)
+                except ConnectionError:
+                    # The client gave up on a delayed answer.
+                    pass
+                finally:
+                    with outer._lock:
+                        outer.answered += 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def answer(self, body: dict) -> dict:
+        if body["method"] != "sendTransaction":
+            return {"jsonrpc": "2.0", "error": {"code": -32601, "message": "Method not found"}, "id": body["id"]}
+        if self.error is not None:
+            # Shaped like a preflight failure; solders cannot parse a -32002 without its data.
+            data = {
+                "err": self.error,
+                "logs": [],
+                "accounts": None,
+                "unitsConsumed": 0,
+                "returnData": None,
+                "innerInstructions": None,
+                "replacementBlockhash": None,
+                "loadedAccountsDataSize": None,
+            }
+            message = f"Transaction simulation failed: {self.error}"
+            return {"jsonrpc": "2.0", "error": {"code": -32002, "message": message, "data": data}, "id": body["id"]}
+        txn = VersionedTransaction.from_bytes(base64.b64decode(body["params"][0]))
+        return {"jsonrpc": "2.0", "result": str(txn.signatures[0]), "id": body["id"]}
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StandInWs:
+    # accountSubscribe/accountUnsubscribe only; updates are pushed by the script.
+    def __init__(self):
+        self.url = ""
+        self.connections = 0
+        self.subscribe_requests = 0
+        self.notifications = 0
+        self._ids = itertools.count(1)
+        # Subscription id -> (connection, account).
+        self._subscriptions: Dict[int, Tuple[object, str]] = {}
+        self._open: List[object] = []
+        self._server = None
+
+    async def start(self) -> "StandInWs":
+        self._server = await websockets.serve(self._handler, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def stop(self) -> None:
+        await self.drop()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def subscribers(self, account: str) -> int:
+        return sum(1 for _, a in self._subscriptions.values() if a == account)
+
+    async def drop(self) -> None:
+        # Closes every connection, as a node restart or load balancer would.
+        for ws in list(self._open):
+            await ws.close()
+
+    async def update(self, account: str, slot: int, data: bytes) -> None:
+        value = {
+            "lamports": 1,
+            "data": [base64.b64encode(data).decode(), "base64"],
+            "owner": str(METEORA_DAMM2_PROGRAM),
+            "executable": False,
+            "rentEpoch": 0,
+            "space": len(data),
+        }
+        for sub_id, (ws, subscribed) in list(self._subscriptions.items()):
+            if subscribed != account:
+                continue
+            message = {
+                "jsonrpc": "2.0",
+                "method": "accountNotification",
+                "params": {"result": {"context": {"slot": slot}, "value": value}, "subscription": sub_id},
+            }
+            try:
+                await ws.send(json.dumps(message))
+                self.notifications += 1
+            except websockets.ConnectionClosed:
+                pass
+
+    async def _handler(self, ws, *args) -> None:
+        self.connections += 1
+        self._open.append(ws)
+        try:
+            async for raw in ws:
+                requests = json.loads(raw)
+                for request in requests if isinstance(requests, list) else [requests]:
+                    await ws.send(json.dumps(self._answer(ws, request)))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._open.remove(ws)
+            for sub_id, (conn, _) in list(self._subscriptions.items()):
+                if conn is ws:
+                    del self._subscriptions[sub_id]
+
+    def _answer(self, ws, request: dict) -> dict:
+        method = request["method"]
+        if method == "accountSubscribe":
+            self.subscribe_requests += 1
+            sub_id = next(self._ids)
+            self._subscriptions[sub_id] = (ws, request["params"][0])
+            return {"jsonrpc": "2.0", "result": sub_id, "id": request["id"]}
+        if method == "accountUnsubscribe":
+            removed = self._subscriptions.pop(request["params"][0], None) is not None
+            return {"jsonrpc": "2.0", "result": removed, "id": request["id"]}
+        return {"jsonrpc": "2.0", "error": {"code": -32601, "message": "Method not found"}, "id": request["id"]}
@@ -1,18 +1,22 @@
+import time
 from enum import Enum
-from decimal import Decimal, getcontext
-from typing import NamedTuple, Optional
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 
-getcontext().prec = 50
+from pool_state import Pool
 
 BASIS_POINT_MAX                    = 10_000      # e.g. 10000 bps = 100%
 FEE_DENOMINATOR                    = 1_000_000_000  # if your fees are out of 1e9
 MAX_FEE_NUMERATOR                  = 500_000_000  # or whatever your protocol max is
 SCALE_OFFSET                       = 64          # Q64.64 fixed-point
+ONE_Q64                            = 1 << SCALE_OFFSET
+U128_MAX                           = (1 << 128) - 1
+MAX_EXPONENTIAL                    = 0x80000     # pow() rejects exponents from 2^19
 
+# As the program stores base_fee.fee_scheduler_mode; the IDL only types it as a u8.
 class FeeSchedulerMode(Enum):
-    Constant    = 0
-    Linear      = 1
-    Exponential = 2
+    Linear      = 0
+    Exponential = 1
 
 class Rounding(Enum):
     Down = 0
@@ -86,6 +90,30 @@ def get_next_sqrt_price_from_output(
         num        = liquidity * sqrt_price
         return num // denom
 
+def pow_q64(base: int, exp: int) -> Optional[int]:
+    # Same squaring steps and truncation as the program's u128 pow; None where it errors.
+    invert = exp < 0
+    if exp == 0:
+        return ONE_Q64
+    exp = abs(exp)
+    if exp >= MAX_EXPONENTIAL:
+        return None
+    squared_base = base
+    result = ONE_Q64
+    if squared_base >= result:
+        squared_base = U128_MAX // squared_base
+        invert = not invert
+    while exp:
+        if exp & 1:
+            result = (result * squared_base) >> SCALE_OFFSET
+        squared_base = (squared_base * squared_base) >> SCALE_OFFSET
+        exp >>= 1
+    if result == 0:
+        return None
+    if invert:
+        result = U128_MAX // result
+    return result
+
 def get_base_fee_numerator(
     mode: FeeSchedulerMode,
     cliff: int,
@@ -95,10 +123,30 @@ def get_base_fee_numerator(
     if mode == FeeSchedulerMode.Linear:
         return max(0, cliff - period * reduction)
     else:
-        # exponential: cliff * (1 - reduction/BASIS_POINT_MAX)^period
-        bps = Decimal(1) - Decimal(reduction) / BASIS_POINT_MAX
-        factor = bps ** period
-        return int((Decimal(cliff) * factor).to_integral_value(rounding="ROUND_FLOOR"))
+        # exponential: cliff * (1 - reduction/BASIS_POINT_MAX)^period in Q64.64
+        if period == 0:
+            return cliff
+        base = ONE_Q64 - (reduction << SCALE_OFFSET) // BASIS_POINT_MAX
+        factor = pow_q64(base, period)
+        if factor is None:
+            raise OverflowError(f"Fee scheduler pow overflows at period {period}")
+        fee = factor * cliff
+        if fee > U128_MAX:
+            raise OverflowError("Fee scheduler numerator overflows u128")
+        return fee >> SCALE_OFFSET
+
+@lru_cache(maxsize=256)
+def get_base_fee_table(
+    mode: FeeSchedulerMode,
+    cliff: int,
+    number_of_period: int,
+    reduction: int
+) -> Tuple[int, ...]:
+    # Base fee numerator for every period, shared by pools with the same schedule.
+    return tuple(
+        get_base_fee_numerator(mode, cliff, period, reduction)
+        for period in range(number_of_period + 1)
+    )
 
 def get_dynamic_fee_numerator(
     volatility_acc: int,
@@ -129,7 +177,7 @@ def get_fee_numerator(
         number_of_period,
         (current_point - activation_point) // period_freq
     )
-    fee_num = get_base_fee_numerator(mode, cliff_fee, period, reduction)
+    fee_num = get_base_fee_table(mode, cliff_fee, number_of_period, reduction)[period]
     if dynamic_params:
         df = get_dynamic_fee_numerator(
             dynamic_params["volatility_accumulator"],
@@ -183,3 +231,91 @@ def get_swap_amount(
         next_sqrt_price = next_sp,
     )
 
+def get_swap_amounts(
+    in_amounts: Iterable[int],
+    sqrt_price: int,
+    liquidity: int,
+    trade_fee_numerator: int,
+    a_to_b: bool,
+    collect_fee_mode: int
+) -> List[SwapResult]:
+    # Same math as get_swap_amount, with the per-pool terms hoisted out of the loop.
+    fee_on_input = get_fee_mode(collect_fee_mode, not a_to_b).fee_on_input
+    fee_round    = FEE_DENOMINATOR - 1
+    shift        = SCALE_OFFSET * 2
+    liq_sp       = liquidity * sqrt_price
+    results      = []
+    append       = results.append
+
+    for in_amount in in_amounts:
+        total_fee = 0
+        actual_in = in_amount
+        if fee_on_input:
+            total_fee = (in_amount * trade_fee_numerator + fee_round) // FEE_DENOMINATOR
+            actual_in = in_amount - total_fee
+
+        if a_to_b:
+            denominator = liquidity + actual_in * sqrt_price
+            next_sp     = (liq_sp + (denominator - 1)) // denominator
+            out_amount  = (liquidity * (sqrt_price - next_sp)) >> shift
+        else:
+            next_sp     = sqrt_price + (actual_in << shift) // liquidity
+            out_amount  = (liquidity * (next_sp - sqrt_price)) // (sqrt_price * next_sp)
+
+        if not fee_on_input:
+            total_fee  = (out_amount * trade_fee_numerator + fee_round) // FEE_DENOMINATOR
+            out_amount = out_amount - total_fee
+
+        append(SwapResult(out_amount, total_fee, next_sp))
+
+    return results
+
+def get_pool_current_point(pool: Pool, current_slot: Optional[int] = None) -> int:
+    if pool.activation_type == 1:
+        return int(time.time())
+    # Without a known slot, fall back to the cliff fee, which is the highest
+    # base fee the scheduler can charge and so gives a conservative quote.
+    if current_slot is None:
+        return pool.activation_point
+    return current_slot
+
+def get_pool_fee_numerator(pool: Pool, current_point: int) -> int:
+    base_fee    = pool.pool_fees.base_fee
+    dynamic_fee = pool.pool_fees.dynamic_fee
+    dynamic_params = None
+    if dynamic_fee.initialized:
+        dynamic_params = {
+            "volatility_accumulator": dynamic_fee.volatility_accumulator,
+            "bin_step":               dynamic_fee.bin_step,
+            "variable_fee_control":   dynamic_fee.variable_fee_control,
+        }
+    return get_fee_numerator(
+        current_point,
+        pool.activation_point,
+        base_fee.number_of_period,
+        base_fee.period_frequency,
+        FeeSchedulerMode(base_fee.fee_scheduler_mode),
+        base_fee.cliff_fee_numerator,
+        base_fee.reduction_factor,
+        dynamic_params,
+    )
+
+def get_pool_swap_amount(
+    pool: Pool,
+    in_amount: int,
+    a_to_b: bool,
+    current_point: int
+) -> SwapResult:
+    return get_swap_amount(
+        in_amount,
+        pool.sqrt_price,
+        pool.liquidity,
+        get_pool_fee_numerator(pool, current_point),
+        a_to_b,
+        pool.collect_fee_mode,
+    )
+
+def get_minimum_amount_out(amount_out: int, slippage_bps: int) -> int:
+    if not (0 <= slippage_bps <= BASIS_POINT_MAX):
+        raise ValueError("slippage_bps must be between 0 and 10000")
+    return amount_out * (BASIS_POINT_MAX - slippage_bps) // BASIS_POINT_MAX
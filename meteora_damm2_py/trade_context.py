@@ -0,0 +1,518 @@
+import struct
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import List, NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Processed
+from solana.rpc.types import TokenAccountOpts, TxOpts
+
+from spl.token.client import Token
+from spl.token.instructions import (
+    CloseAccountParams,
+    close_account,
+    create_idempotent_associated_token_account,
+    get_associated_token_address,
+)
+
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price  # type: ignore
+from solders.instruction import AccountMeta, Instruction  # type: ignore
+from solders.keypair import Keypair  # type: ignore
+from solders.message import MessageV0  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.transaction import VersionedTransaction  # type: ignore
+
+from blockhash_cache import BlockhashCache
+from common_utils import confirm_txn, get_token_balance, report_confirmation
+from confirmation import REBROADCAST_OPTS, ConfirmationResult, rebroadcast_until_expiry
+from constants import *
+from cu_profile import CuProfiler, TradeShape
+from lookup_tables import LookupTableManager
+from meteora_damm2 import SWAP_DISCRIMINATOR, create_quote_token_account_ixs
+from multi_sender import MultiSender
+from pool_cache import PoolCache
+from pool_state import Pool
+from pool_utils import fetch_pool_state
+from priority_fees import PriorityFeeEstimator
+from signature_tracker import SignatureTracker
+from swap_estimate import get_minimum_amount_out, get_pool_current_point, get_pool_swap_amount
+from wallet_state import WalletState
+from wsol_account import PersistentWsol
+
+SWAP_AMOUNTS = struct.Struct("<QQ")
+TRACKER_RESULT_MARGIN = 5.0
+INPUT_ACCOUNT_INDEX = 2
+OUTPUT_ACCOUNT_INDEX = 3
+
+
+class TradeResult(NamedTuple):
+    signature: Optional[Signature]
+    confirmed: Optional[bool]
+    amount_in: int
+    minimum_amount_out: int
+    build_ms: float
+    send_ms: float
+    # Confirmation status when known, e.g. "expired" means re-quote and retry.
+    status: Optional[str] = None
+
+
+class SwapPlan(NamedTuple):
+    instructions: List[Instruction]
+    shape: TradeShape
+    pool_state: Pool
+    amount_in: int
+    minimum_amount_out: int
+
+
+@dataclass
+class TradeContext:
+    client: Client
+    payer_keypair: Keypair
+    pool_state: Pool
+    base_token_account: Pubkey
+    base_account_exists: bool
+    base_balance: int
+    quote_rent: int
+    blockhash_cache: BlockhashCache
+    pool_cache: Optional[PoolCache] = None
+    unit_budget: int = 100_000
+    unit_price: int = 1_000_000
+    slippage_bps: int = 500
+    skip_preflight: bool = True
+    signature_tracker: Optional[SignatureTracker] = None
+    sender: Optional[MultiSender] = None
+    rebroadcast_ms: Optional[int] = None
+    fee_estimator: Optional[PriorityFeeEstimator] = None
+    cu_profiler: Optional[CuProfiler] = None
+    wallet: Optional[WalletState] = None
+    wsol: Optional[PersistentWsol] = None
+    lookup_tables: Optional[LookupTableManager] = None
+    swap_accounts: List[AccountMeta] = field(default_factory=list)
+    # Set when build_trade_context started the blockhash cache, so close() stops it.
+    owns_blockhash_cache: bool = False
+
+    def __post_init__(self):
+        if not self.swap_accounts:
+            self.swap_accounts = build_swap_accounts(self.pool_state, self.payer_keypair.pubkey())
+
+    @property
+    def payer(self) -> Pubkey:
+        return self.payer_keypair.pubkey()
+
+    def current_pool(self) -> Pool:
+        # Never fetch here: a PoolStream or earlier trade keeps the cache warm.
+        if self.pool_cache is not None:
+            entry = self.pool_cache.peek(str(self.pool_state.pool))
+            if entry is not None:
+                return entry.pool
+        return self.pool_state
+
+    def current_slot(self) -> Optional[int]:
+        slot = self.pool_cache.latest_slot if self.pool_cache is not None else None
+        if self.blockhash_cache.latest:
+            slot = max(slot or 0, self.blockhash_cache.latest.slot)
+        return slot
+
+    def priority_fee(self, pool_state: Pool) -> int:
+        if self.fee_estimator:
+            return self.fee_estimator.estimate(pool_state, default=self.unit_price)
+        return self.unit_price
+
+    def sync_wallet(self) -> None:
+        if not self.wallet:
+            return
+        holding = self.wallet.get(self.pool_state.token_a_mint)
+        if holding:
+            self.base_token_account = holding.account
+            self.base_account_exists = True
+            self.base_balance = holding.amount
+        else:
+            self.base_account_exists = False
+            self.base_balance = 0
+
+    def close(self) -> None:
+        if self.owns_blockhash_cache:
+            self.blockhash_cache.stop()
+
+    def refresh(self) -> None:
+        if self.pool_cache is not None:
+            self.pool_state = self.pool_cache.get(str(self.pool_state.pool))
+        else:
+            self.pool_state = fetch_pool_state(self.client, str(self.pool_state.pool))
+        if self.wallet:
+            self.sync_wallet()
+            return
+        balance = get_token_balance(self.client, self.payer, self.pool_state.token_a_mint)
+        self.base_balance = balance or 0
+        self.base_account_exists = balance is not None or self.base_account_exists
+
+
+def build_swap_accounts(pool_state: Pool, payer: Pubkey) -> List[AccountMeta]:
+    # Slots 2 and 3 hold the input/output token accounts and are patched per trade.
+    return [
+        AccountMeta(POOL_AUTHORITY, False, False),
+        AccountMeta(pool_state.pool, False, True),
+        AccountMeta(payer, False, True),
+        AccountMeta(payer, False, True),
+        AccountMeta(pool_state.token_a_vault, False, True),
+        AccountMeta(pool_state.token_b_vault, False, True),
+        AccountMeta(pool_state.token_a_mint, False, False),
+        AccountMeta(pool_state.token_b_mint, False, False),
+        AccountMeta(payer, True, True),
+        AccountMeta(TOKEN_PROGRAM_ID, False, False),
+        AccountMeta(TOKEN_PROGRAM_ID, False, False),
+        AccountMeta(REFERRAL_TOKEN_ACC, False, False),
+        AccountMeta(EVENT_AUTH, False, False),
+        AccountMeta(METEORA_DAMM2_PROGRAM, False, False),
+    ]
+
+
+def build_trade_context(
+    client: Client,
+    payer_keypair: Keypair,
+    pool_str: str,
+    blockhash_cache: Optional[BlockhashCache] = None,
+    pool_cache: Optional[PoolCache] = None,
+    unit_budget: int = 100_000,
+    unit_price: int = 1_000_000,
+    slippage_bps: int = 500,
+    skip_preflight: bool = True,
+    signature_tracker: Optional[SignatureTracker] = None,
+    sender: Optional[MultiSender] = None,
+    rebroadcast_ms: Optional[int] = None,
+    fee_estimator: Optional[PriorityFeeEstimator] = None,
+    cu_profiler: Optional[CuProfiler] = None,
+    wallet: Optional[WalletState] = None,
+    wsol: Optional[PersistentWsol] = None,
+    lookup_tables: Optional[LookupTableManager] = None,
+) -> TradeContext:
+    payer = payer_keypair.pubkey()
+    if pool_cache is not None:
+        pool_state = pool_cache.get(pool_str)
+    else:
+        pool_state = fetch_pool_state(client, pool_str)
+
+    if wallet:
+        # Filled in from the wallet snapshot by sync_wallet below.
+        base_token_account = get_associated_token_address(payer, pool_state.token_a_mint)
+        base_account_exists = False
+        base_balance = 0
+    else:
+        base_account_check = client.get_token_accounts_by_owner_json_parsed(
+            payer,
+            TokenAccountOpts(mint=pool_state.token_a_mint),
+            Processed,
+        )
+        if base_account_check.value:
+            account = base_account_check.value[0]
+            base_token_account = account.pubkey
+            base_account_exists = True
+            base_balance = int(account.account.data.parsed['info']['tokenAmount']['amount'])
+        else:
+            base_token_account = get_associated_token_address(payer, pool_state.token_a_mint)
+            base_account_exists = False
+            base_balance = 0
+
+    owns_blockhash_cache = blockhash_cache is None
+    if owns_blockhash_cache:
+        blockhash_cache = BlockhashCache(client).start()
+    blockhash_cache.get()
+    if fee_estimator:
+        fee_estimator.track(pool_state)
+
+    ctx = TradeContext(
+        client=client,
+        payer_keypair=payer_keypair,
+        pool_state=pool_state,
+        base_token_account=base_token_account,
+        base_account_exists=base_account_exists,
+        base_balance=base_balance,
+        quote_rent=Token.get_min_balance_rent_for_exempt_for_account(client),
+        blockhash_cache=blockhash_cache,
+        pool_cache=pool_cache,
+        unit_budget=unit_budget,
+        unit_price=unit_price,
+        slippage_bps=slippage_bps,
+        skip_preflight=skip_preflight,
+        signature_tracker=signature_tracker,
+        sender=sender,
+        rebroadcast_ms=rebroadcast_ms,
+        fee_estimator=fee_estimator,
+        cu_profiler=cu_profiler,
+        wallet=wallet,
+        wsol=wsol.refresh() if wsol else None,
+        lookup_tables=lookup_tables,
+        owns_blockhash_cache=owns_blockhash_cache,
+    )
+    ctx.sync_wallet()
+    return ctx
+
+
+def _send(
+    ctx: TradeContext,
+    instructions: List[Instruction],
+    shape: TradeShape,
+    started: float,
+    amount_in: int,
+    minimum_amount_out: int,
+    confirm: bool,
+) -> TradeResult:
+    latest_blockhash = ctx.blockhash_cache.get()
+    if ctx.cu_profiler:
+        # Only the first trade of each shape pays for a simulation.
+        instructions = ctx.cu_profiler.apply(
+            shape, instructions, ctx.payer_keypair, latest_blockhash.blockhash
+        )
+    if ctx.lookup_tables:
+        compiled_message = ctx.lookup_tables.compile(ctx.payer, instructions, latest_blockhash.blockhash)
+    else:
+        compiled_message = MessageV0.try_compile(
+            ctx.payer,
+            instructions,
+            [],
+            latest_blockhash.blockhash,
+        )
+    txn = VersionedTransaction(compiled_message, [ctx.payer_keypair])
+    sending = time.perf_counter()
+    if ctx.sender:
+        sig = ctx.sender.send(txn, TxOpts(skip_preflight=ctx.skip_preflight)).signature
+    else:
+        sig = ctx.client.send_transaction(
+            txn=txn,
+            opts=TxOpts(skip_preflight=ctx.skip_preflight),
+        ).value
+    sent = time.perf_counter()
+
+    confirmed = None
+    status = None
+    if confirm and ctx.rebroadcast_ms:
+        resend = None
+        if ctx.sender:
+            resend = lambda raw: ctx.sender.send(txn, REBROADCAST_OPTS)
+        outcome = rebroadcast_until_expiry(
+            ctx.client,
+            txn,
+            latest_blockhash.last_valid_block_height,
+            ctx.rebroadcast_ms,
+            sent_at=sending,
+            send=resend,
+        )
+        status = outcome.status
+        confirmed = report_confirmation(outcome)
+    elif confirm and ctx.signature_tracker:
+        future = ctx.signature_tracker.register(
+            sig, latest_blockhash.last_valid_block_height, sent_at=sending
+        )
+        try:
+            # The tracker resolves at its own deadline; the margin covers its last poll.
+            outcome = future.result(timeout=ctx.signature_tracker.timeout + TRACKER_RESULT_MARGIN)
+        except FutureTimeoutError:
+            outcome = ConfirmationResult(sig, "timeout", None, None, None, None)
+        status = outcome.status
+        confirmed = report_confirmation(outcome)
+    elif confirm:
+        confirmed = confirm_txn(ctx.client, sig, last_valid_block_height=latest_blockhash.last_valid_block_height)
+    return TradeResult(
+        signature=sig,
+        confirmed=confirmed,
+        amount_in=amount_in,
+        minimum_amount_out=minimum_amount_out,
+        build_ms=(sending - started) * 1000,
+        send_ms=(sent - sending) * 1000,
+        status=status,
+    )
+
+
+def build_buy(ctx: TradeContext, quote_amount_in: int) -> SwapPlan:
+    pool_state = ctx.current_pool()
+    quote = get_pool_swap_amount(
+        pool_state,
+        quote_amount_in,
+        False,
+        get_pool_current_point(pool_state, ctx.current_slot()),
+    )
+    min_base_amount_out = get_minimum_amount_out(quote.amount_out, ctx.slippage_bps)
+
+    if ctx.wsol:
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            ctx.wsol.quote_account_ixs(quote_amount_in)
+        )
+        quote_mode = ctx.wsol.quote_mode(quote_account_ixs)
+    else:
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            create_quote_token_account_ixs(
+                ctx.payer,
+                pool_state.token_b_mint,
+                ctx.quote_rent + quote_amount_in,
+            )
+        )
+        quote_mode = "temp"
+    accounts = list(ctx.swap_accounts)
+    accounts[INPUT_ACCOUNT_INDEX] = AccountMeta(quote_token_account, False, True)
+    accounts[OUTPUT_ACCOUNT_INDEX] = AccountMeta(ctx.base_token_account, False, True)
+    data = SWAP_DISCRIMINATOR + SWAP_AMOUNTS.pack(quote_amount_in, min_base_amount_out)
+
+    instructions = [
+        set_compute_unit_limit(ctx.unit_budget),
+        set_compute_unit_price(ctx.priority_fee(pool_state)),
+        *quote_account_ixs,
+    ]
+    if not ctx.base_account_exists:
+        # Idempotent: an earlier unconfirmed buy may already have created it.
+        instructions.append(
+            create_idempotent_associated_token_account(ctx.payer, ctx.payer, pool_state.token_a_mint)
+        )
+    instructions.append(Instruction(METEORA_DAMM2_PROGRAM, data, accounts))
+    if close_quote_token_account_ix:
+        instructions.append(close_quote_token_account_ix)
+
+    shape = TradeShape(pool_state.pool, False, not ctx.base_account_exists, quote_mode)
+    return SwapPlan(instructions, shape, pool_state, quote_amount_in, min_base_amount_out)
+
+
+def after_buy(ctx: TradeContext, plan: SwapPlan, result: TradeResult, wsol_spent: Optional[int]) -> None:
+    # wsol_spent=None re-reads the WSOL balance instead of tracking it.
+    if result.confirmed and ctx.wallet:
+        if not ctx.wallet.live:
+            ctx.wallet.apply_transaction(result.signature)
+        ctx.sync_wallet()
+    elif result.confirmed:
+        ctx.base_account_exists = True
+        ctx.base_balance = get_token_balance(ctx.client, ctx.payer, plan.pool_state.token_a_mint) or 0
+    if ctx.wsol:
+        ctx.wsol.after_trade(result.confirmed, wsol_spent)
+    if result.confirmed and ctx.lookup_tables:
+        ctx.lookup_tables.record_trade(plan.pool_state)
+
+
+def _failed(ctx: TradeContext, started: float, amount_in: int) -> TradeResult:
+    if ctx.wsol:
+        # The transaction may have gone out before the error, so re-read WSOL next time.
+        ctx.wsol.after_trade(False)
+    return TradeResult(
+        signature=None,
+        confirmed=False,
+        amount_in=amount_in,
+        minimum_amount_out=0,
+        build_ms=(time.perf_counter() - started) * 1000,
+        send_ms=0.0,
+        status="failed",
+    )
+
+
+def buy(ctx: TradeContext, quote_in: float, confirm: bool = True) -> TradeResult:
+    # Errors are printed, not raised, as in meteora_damm2.buy; a trade that
+    # could not be sent comes back with confirmed False and status "failed".
+    started = time.perf_counter()
+    quote_amount_in = int(quote_in * 10**9)
+    try:
+        ctx.sync_wallet()
+        plan = build_buy(ctx, quote_amount_in)
+        result = _send(ctx, plan.instructions, plan.shape, started, plan.amount_in, plan.minimum_amount_out, confirm)
+    except Exception as e:
+        print("Error occurred during transaction:", e)
+        return _failed(ctx, started, quote_amount_in)
+    try:
+        after_buy(ctx, plan, result, quote_amount_in)
+    except Exception as e:
+        print("Post-trade update failed:", e)
+    return result
+
+
+def build_sell(ctx: TradeContext, percentage: int) -> SwapPlan:
+    base_amount_in = int(ctx.base_balance * (percentage / 100))
+    pool_state = ctx.current_pool()
+    quote = get_pool_swap_amount(
+        pool_state,
+        base_amount_in,
+        True,
+        get_pool_current_point(pool_state, ctx.current_slot()),
+    )
+    min_quote_amount_out = get_minimum_amount_out(quote.amount_out, ctx.slippage_bps)
+
+    if ctx.wsol:
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            ctx.wsol.quote_account_ixs()
+        )
+        quote_mode = ctx.wsol.quote_mode(quote_account_ixs)
+    else:
+        quote_token_account, quote_account_ixs, close_quote_token_account_ix = (
+            create_quote_token_account_ixs(
+                ctx.payer,
+                pool_state.token_b_mint,
+                ctx.quote_rent,
+            )
+        )
+        quote_mode = "temp"
+    accounts = list(ctx.swap_accounts)
+    accounts[INPUT_ACCOUNT_INDEX] = AccountMeta(ctx.base_token_account, False, True)
+    accounts[OUTPUT_ACCOUNT_INDEX] = AccountMeta(quote_token_account, False, True)
+    data = SWAP_DISCRIMINATOR + SWAP_AMOUNTS.pack(base_amount_in, min_quote_amount_out)
+
+    instructions = [
+        set_compute_unit_limit(ctx.unit_budget),
+        set_compute_unit_price(ctx.priority_fee(pool_state)),
+        *quote_account_ixs,
+        Instruction(METEORA_DAMM2_PROGRAM, data, accounts),
+    ]
+    if close_quote_token_account_ix:
+        instructions.append(close_quote_token_account_ix)
+    if percentage == 100:
+        instructions.append(
+            close_account(
+                CloseAccountParams(
+                    program_id=TOKEN_PROGRAM_ID,
+                    account=ctx.base_token_account,
+                    dest=ctx.payer,
+                    owner=ctx.payer,
+                )
+            )
+        )
+
+    shape = TradeShape(pool_state.pool, True, percentage == 100, quote_mode)
+    return SwapPlan(instructions, shape, pool_state, base_amount_in, min_quote_amount_out)
+
+
+def after_sell(ctx: TradeContext, plan: SwapPlan, result: TradeResult) -> None:
+    # shape.account_ix marks a 100% sell that closed the base account.
+    if result.confirmed and ctx.wallet:
+        if plan.shape.account_ix:
+            # A subscription never reports the close, so drop the account here.
+            ctx.wallet.remove_account(ctx.base_token_account)
+        elif not ctx.wallet.live:
+            ctx.wallet.apply_transaction(result.signature)
+        ctx.sync_wallet()
+    elif result.confirmed:
+        ctx.base_balance -= plan.amount_in
+        if plan.shape.account_ix:
+            ctx.base_account_exists = False
+            ctx.base_balance = 0
+    if ctx.wsol:
+        ctx.wsol.after_trade(result.confirmed)
+    if result.confirmed and ctx.lookup_tables:
+        ctx.lookup_tables.record_trade(plan.pool_state)
+
+
+def sell(ctx: TradeContext, percentage: int = 100, confirm: bool = True) -> Optional[TradeResult]:
+    started = time.perf_counter()
+    if not (1 <= percentage <= 100):
+        print("Percentage must be between 1 and 100.")
+        return None
+    ctx.sync_wallet()
+    if not ctx.base_balance:
+        print("Base token balance is zero. Nothing to sell.")
+        return None
+
+    try:
+        plan = build_sell(ctx, percentage)
+        result = _send(ctx, plan.instructions, plan.shape, started, plan.amount_in, plan.minimum_amount_out, confirm)
+    except Exception as e:
+        print("Error occurred during transaction:", e)
+        return _failed(ctx, started, 0)
+    try:
+        after_sell(ctx, plan, result)
+    except Exception as e:
+        print("Post-trade update failed:", e)
+    return result
@@ -0,0 +1,379 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from solana.rpc.api import Client
+from solders.keypair import Keypair  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+
+from blockhash_cache import BlockhashCache
+from meteora_damm2 import buy, sell
+from common_utils import percentile, rpc_request
+from pool_cache import PoolCache
+
+RATE_LIMITED_STATUS = 429
+# Every public Client method sends a request, except these two.
+RPC_METHODS = frozenset(
+    name for name in dir(Client) if not name.startswith("_")
+) - {"commitment", "parse_recent_blockhash"}
+
+
+def rate_limited_response(e: BaseException):
+    # solana-py wraps the httpx error, so look through the cause chain.
+    while e is not None:
+        response = getattr(e, "response", None)
+        if getattr(response, "status_code", None) == RATE_LIMITED_STATUS:
+            return response
+        e = e.__cause__
+    return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        # Set from a Retry-After so every caller backs off together.
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        # Returns the seconds waited, or None if no token came up within timeout.
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - started
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            if timeout is not None and now + wait - started > timeout:
+                return None
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+@dataclass
+class EndpointStats:
+    endpoint: str
+    calls: int = 0
+    throttled: int = 0
+    rejected: int = 0
+    retries: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    wait_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+
+class RateLimitedClient:
+    # Stands in for a Client: every RPC method waits for a token and a
+    # concurrency slot, and a 429 pauses the whole endpoint before a bounded retry.
+    def __init__(
+        self,
+        client: Client,
+        endpoint: str,
+        rate: float = 10.0,
+        burst: Optional[float] = None,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        acquire_timeout: float = 10.0,
+        backoff: float = 0.5,
+    ):
+        self.client = client
+        self.endpoint = endpoint
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.acquire_timeout = acquire_timeout
+        self.backoff = backoff
+        self.stats = EndpointStats(endpoint)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        if name not in RPC_METHODS:
+            return attr
+        return lambda *args, **kwargs: self._call(attr, *args, **kwargs)
+
+    def rpc_request(self, method: str, params: list) -> Any:
+        # For methods solana-py has no wrapper for, e.g. getRecentPrioritizationFees.
+        return self._call(rpc_request, self.client, method, params)
+
+    def _acquire(self) -> None:
+        started = time.monotonic()
+        waited = self.bucket.acquire(self.acquire_timeout)
+        remaining = self.acquire_timeout - (time.monotonic() - started)
+        if waited is None or not self._slots.acquire(timeout=max(remaining, 0)):
+            with self._lock:
+                self.stats.rejected += 1
+            raise RuntimeError(f"Rate limit wait exceeded {self.acquire_timeout}s for {self.endpoint}")
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.in_flight += 1
+            self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+            self.stats.wait_ms.append((time.monotonic() - started) * 1000)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.stats.in_flight -= 1
+        self._slots.release()
+
+    def _call(self, method, *args, **kwargs):
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                response = rate_limited_response(e)
+                if response is None:
+                    raise
+                with self._lock:
+                    self.stats.throttled += 1
+                if attempt >= self.max_retries:
+                    raise
+                retry_after = response.headers.get("retry-after")
+                self.bucket.pause(float(retry_after) if retry_after else self.backoff * 2**attempt)
+                attempt += 1
+                with self._lock:
+                    self.stats.retries += 1
+            finally:
+                self._release()
+
+
+class JobResult(NamedTuple):
+    wallet: Pubkey
+    side: str
+    pool_str: str
+    confirmed: bool
+    endpoint: str
+    queue_ms: float
+    run_ms: float
+    # buy and sell catch and print their own errors and return False, so this
+    # is only set when the call itself raised, e.g. on a bad argument.
+    error: Optional[str] = None
+
+
+@dataclass
+class TradeJob:
+    keypair: Keypair
+    pool_str: str
+    side: str
+    # SOL in for a buy, percentage of the balance for a sell.
+    amount: float
+    kwargs: Dict[str, Any]
+    submitted_at: float
+
+
+class TradeExecutor:
+    def __init__(
+        self,
+        endpoints: List[str],
+        max_workers: int = 16,
+        rate: float = 10.0,
+        burst: Optional[float] = None,
+        max_concurrency: int = 8,
+        max_queue: int = 1_000,
+        max_retries: int = 3,
+        acquire_timeout: float = 10.0,
+        timeout: float = 10,
+        latency_window: int = 10_000,
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        # rate, burst and max_concurrency apply to each endpoint separately.
+        self.clients: Dict[str, RateLimitedClient] = {
+            e: RateLimitedClient(
+                Client(e, timeout=timeout),
+                e,
+                rate=rate,
+                burst=burst,
+                max_concurrency=max_concurrency,
+                max_retries=max_retries,
+                acquire_timeout=acquire_timeout,
+            )
+            for e in endpoints
+        }
+        # Shared per endpoint, so wallets trading the same pool reuse one fetch.
+        self.blockhash_caches = {e: BlockhashCache(c) for e, c in self.clients.items()}
+        self.pool_caches = {e: PoolCache(c) for e, c in self.clients.items()}
+        self.max_queue = max_queue
+        self.submitted = 0
+        self.completed = 0
+        self.confirmed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Jobs submitted but not yet picked up by a worker; max_queue bounds these.
+        self.waiting = 0
+        # Jobs a worker is executing.
+        self.running = 0
+        self.started_at: Optional[float] = None
+        self._queue_ms: Deque[float] = deque(maxlen=latency_window)
+        self._run_ms: Deque[float] = deque(maxlen=latency_window)
+        self._assigned = {e: 0 for e in endpoints}
+        # A wallet is a key here while one of its jobs runs; the deque holds
+        # the jobs waiting behind it.
+        self._wallet_jobs: Dict[Pubkey, Deque[Tuple[TradeJob, Future]]] = {}
+        self._closed = False
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trade-executor")
+
+    def start(self) -> "TradeExecutor":
+        for cache in self.blockhash_caches.values():
+            cache.start()
+        return self
+
+    def shutdown(self, wait: bool = True) -> None:
+        # With wait, queued jobs run first; without, jobs not yet started are cancelled.
+        with self._lock:
+            self._closed = True
+            if wait:
+                self._idle.wait_for(lambda: not self._wallet_jobs)
+            else:
+                for jobs in self._wallet_jobs.values():
+                    while jobs:
+                        _, future = jobs.popleft()
+                        future.cancel()
+                        self.waiting -= 1
+        self._executor.shutdown(wait=wait)
+        for cache in self.blockhash_caches.values():
+            cache.stop()
+
+    def submit(self, keypair: Keypair, pool_str: str, side: str, amount: float, **kwargs) -> Optional[Future]:
+        # Returns None when the queue is full, so callers shed load instead of piling up.
+        if side not in ("buy", "sell"):
+            raise ValueError(f"Unknown side: {side}")
+        job = TradeJob(keypair, pool_str, side, amount, kwargs, time.monotonic())
+        future: Future = Future()
+        wallet = keypair.pubkey()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TradeExecutor has been shut down")
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                return None
+            self.waiting += 1
+            self.submitted += 1
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+            # One trade per wallet at a time: concurrent trades would race on its
+            # token accounts. Later jobs wait here rather than holding a worker.
+            jobs = self._wallet_jobs.get(wallet)
+            if jobs is not None:
+                jobs.append((job, future))
+                return future
+            self._wallet_jobs[wallet] = deque()
+        self._executor.submit(self._run, job, future)
+        return future
+
+    def buy(self, keypair: Keypair, pool_str: str, quote_in: float = 0.1, **kwargs) -> Optional[Future]:
+        return self.submit(keypair, pool_str, "buy", quote_in, **kwargs)
+
+    def sell(self, keypair: Keypair, pool_str: str, percentage: int = 100, **kwargs) -> Optional[Future]:
+        return self.submit(keypair, pool_str, "sell", percentage, **kwargs)
+
+    def _pick_endpoint(self) -> str:
+        with self._lock:
+            endpoint = min(self._assigned, key=self._assigned.get)
+            self._assigned[endpoint] += 1
+            return endpoint
+
+    def _run(self, job: TradeJob, future: Future) -> None:
+        try:
+            running = future.set_running_or_notify_cancel()
+            with self._lock:
+                self.waiting -= 1
+                if running:
+                    self.running += 1
+            if running:
+                try:
+                    future.set_result(self._execute(job))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            self._next(job.keypair.pubkey())
+
+    def _next(self, wallet: Pubkey) -> None:
+        # Hands the worker's slot to the wallet's next job, if it has one.
+        with self._lock:
+            jobs = self._wallet_jobs[wallet]
+            if not jobs:
+                del self._wallet_jobs[wallet]
+                if not self._wallet_jobs:
+                    self._idle.notify_all()
+                return
+            job, future = jobs.popleft()
+        self._executor.submit(self._run, job, future)
+
+    def _execute(self, job: TradeJob) -> JobResult:
+        wallet = job.keypair.pubkey()
+        started = time.monotonic()
+        queue_ms = (started - job.submitted_at) * 1000
+        endpoint = self._pick_endpoint()
+        client = self.clients[endpoint]
+        kwargs = dict(job.kwargs)
+        kwargs.setdefault("blockhash_cache", self.blockhash_caches[endpoint])
+        kwargs.setdefault("pool_cache", self.pool_caches[endpoint])
+        trade = buy if job.side == "buy" else sell
+        error = None
+        try:
+            confirmed = trade(client, job.keypair, job.pool_str, job.amount, **kwargs)
+        except Exception as e:
+            confirmed = False
+            error = str(e)
+        run_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._assigned[endpoint] -= 1
+            self.running -= 1
+            self.completed += 1
+            if confirmed:
+                self.confirmed += 1
+            else:
+                self.failed += 1
+            self._queue_ms.append(queue_ms)
+            self._run_ms.append(run_ms)
+        return JobResult(wallet, job.side, job.pool_str, bool(confirmed), endpoint, queue_ms, run_ms, error)
+
+    def metrics(self, pcts=(50, 90, 99)) -> dict:
+        with self._lock:
+            queue_ms = list(self._queue_ms)
+            run_ms = list(self._run_ms)
+            elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+            totals = {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "confirmed": self.confirmed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "waiting": self.waiting,
+                "running": self.running,
+            }
+        endpoints = {}
+        for endpoint, client in self.clients.items():
+            stats = client.stats
+            endpoints[endpoint] = {
+                "calls": stats.calls,
+                "throttled": stats.throttled,
+                "retries": stats.retries,
+                "rejected": stats.rejected,
+                "max_in_flight": stats.max_in_flight,
+                "wait_ms": {pct: percentile(list(stats.wait_ms), pct) for pct in pcts},
+            }
+        return {
+            **totals,
+            "trades_per_s": totals["completed"] / elapsed if elapsed else 0.0,
+            "queue_ms": {pct: percentile(queue_ms, pct) for pct in pcts},
+            "run_ms": {pct: percentile(run_ms, pct) for pct in pcts},
+            "endpoints": endpoints,
+        }
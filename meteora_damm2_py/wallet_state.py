@@ -0,0 +1,198 @@
+import asyncio
+import struct
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment, Confirmed, Processed
+from solana.rpc.types import MemcmpOpts, TokenAccountOpts
+from solana.rpc.websocket_api import SolanaWsClientProtocol, connect
+from spl.token.instructions import get_associated_token_address
+from solders.pubkey import Pubkey  # type: ignore
+from solders.rpc.responses import ProgramNotification  # type: ignore
+from solders.signature import Signature  # type: ignore
+from solders.transaction_status import UiTransactionStatusMeta  # type: ignore
+
+from constants import TOKEN_PROGRAM_ID
+
+TOKEN_ACCOUNT_SIZE = 165
+TOKEN_ACCOUNT_OWNER_OFFSET = 32
+# mint, owner, amount
+TOKEN_ACCOUNT_STRUCT = struct.Struct("<32s32sQ")
+
+
+class TokenHolding(NamedTuple):
+    account: Pubkey
+    mint: Pubkey
+    amount: int
+    slot: int
+
+
+class WalletState:
+    def __init__(
+        self,
+        client: Client,
+        owner: Pubkey,
+        commitment: Commitment = Processed,
+        reconnect_delay: float = 0.25,
+        max_reconnect_delay: float = 10.0,
+    ):
+        self.client = client
+        self.owner = owner
+        self.commitment = commitment
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.holdings: Dict[Pubkey, TokenHolding] = {}
+        self.live = False
+        self.reconnects = 0
+        self.updates = 0
+        # Every token account seen, including extra accounts for a held mint.
+        self._accounts: Dict[Pubkey, TokenHolding] = {}
+        self._lock = threading.Lock()
+        self._ws: Optional[SolanaWsClientProtocol] = None
+        self._running = False
+
+    def get(self, mint: Pubkey) -> Optional[TokenHolding]:
+        return self.holdings.get(mint)
+
+    def balance(self, mint: Pubkey) -> int:
+        holding = self.holdings.get(mint)
+        return holding.amount if holding else 0
+
+    def load(self) -> "WalletState":
+        # One call returns every SPL token account the owner holds.
+        resp = self.client.get_token_accounts_by_owner(
+            self.owner,
+            TokenAccountOpts(program_id=TOKEN_PROGRAM_ID, encoding="base64"),
+            self.commitment,
+        )
+        slot = resp.context.slot
+        # Update in place so readers never see a half-loaded wallet.
+        seen = set()
+        for keyed in resp.value:
+            self.put_account(keyed.pubkey, bytes(keyed.account.data), slot)
+            seen.add(keyed.pubkey)
+        for account in set(self._accounts) - seen:
+            self.remove_account(account)
+        return self
+
+    def put_account(self, account: Pubkey, data: bytes, slot: int) -> None:
+        mint, _, amount = TOKEN_ACCOUNT_STRUCT.unpack_from(data)
+        self._set(account, Pubkey.from_bytes(mint), amount, slot)
+
+    def remove_account(self, account: Pubkey) -> None:
+        with self._lock:
+            removed = self._accounts.pop(account, None)
+            if removed is None:
+                return
+            holding = self.holdings.get(removed.mint)
+            if holding is None or holding.account != account:
+                return
+            others = [h for h in self._accounts.values() if h.mint == removed.mint]
+            if others:
+                # Another account still holds the mint, so trade from the largest.
+                self.holdings[removed.mint] = max(others, key=lambda h: h.amount)
+            else:
+                del self.holdings[removed.mint]
+            self.updates += 1
+
+    def apply_token_balances(
+        self,
+        meta: UiTransactionStatusMeta,
+        account_keys: List[Pubkey],
+        slot: int,
+    ) -> None:
+        pre = {b.account_index for b in meta.pre_token_balances or [] if b.owner == self.owner}
+        post = [b for b in meta.post_token_balances or [] if b.owner == self.owner]
+        for balance in post:
+            self._set(
+                account_keys[balance.account_index],
+                balance.mint,
+                int(balance.ui_token_amount.amount),
+                slot,
+            )
+        # Accounts with a pre balance and no post balance were closed.
+        for index in pre - {b.account_index for b in post}:
+            self.remove_account(account_keys[index])
+
+    def apply_transaction(self, signature: Signature, commitment: Commitment = Confirmed) -> bool:
+        resp = self.client.get_transaction(signature, "base64", commitment, 0).value
+        if resp is None or resp.transaction.meta is None:
+            return False
+        meta = resp.transaction.meta
+        account_keys = list(resp.transaction.transaction.message.account_keys)
+        if meta.loaded_addresses is not None:
+            account_keys += meta.loaded_addresses.writable + meta.loaded_addresses.readonly
+        self.apply_token_balances(meta, account_keys, resp.slot)
+        return True
+
+    def _set(self, account: Pubkey, mint: Pubkey, amount: int, slot: int) -> None:
+        with self._lock:
+            known = self._accounts.get(account)
+            if known is not None and slot < known.slot:
+                return
+            entry = TokenHolding(account, mint, amount, slot)
+            self._accounts[account] = entry
+            holding = self.holdings.get(mint)
+            # With several accounts for one mint, the ATA is the one to trade from.
+            if (
+                holding is None
+                or holding.account == account
+                or account == get_associated_token_address(self.owner, mint)
+            ):
+                self.holdings[mint] = entry
+                self.updates += 1
+
+    async def run(self, ws_url: str) -> None:
+        # Closed accounts no longer match the owner filter, so closes are only
+        # seen through apply_transaction or remove_account.
+        self._running = True
+        delay = self.reconnect_delay
+        while self._running:
+            try:
+                async with connect(ws_url) as ws:
+                    self._ws = ws
+                    await ws.program_subscribe(
+                        TOKEN_PROGRAM_ID,
+                        self.commitment,
+                        "base64",
+                        filters=[
+                            TOKEN_ACCOUNT_SIZE,
+                            MemcmpOpts(TOKEN_ACCOUNT_OWNER_OFFSET, str(self.owner)),
+                        ],
+                    )
+                    # Changes made while disconnected are picked up by a reload.
+                    await asyncio.get_running_loop().run_in_executor(None, self.load)
+                    self.live = True
+                    delay = self.reconnect_delay
+                    while self._running:
+                        for msg in await ws.recv():
+                            self._handle(msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self._running:
+                    break
+                print("Wallet stream disconnected:", e)
+            finally:
+                self.live = False
+                self._ws = None
+            if self._running:
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._ws is not None:
+            await self._ws.close()
+
+    def _handle(self, msg) -> None:
+        if not isinstance(msg, ProgramNotification):
+            return
+        keyed = msg.result.value
+        data = bytes(keyed.account.data)
+        if len(data) != TOKEN_ACCOUNT_SIZE:
+            self.remove_account(keyed.pubkey)
+            return
+        self.put_account(keyed.pubkey, data, msg.result.context.slot)
@@ -0,0 +1,115 @@
+import threading
+from typing import List, Optional, Tuple
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Processed
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
+from spl.token.instructions import (
+    CloseAccountParams,
+    SyncNativeParams,
+    close_account,
+    create_idempotent_associated_token_account,
+    get_associated_token_address,
+    sync_native,
+)
+from solders.instruction import Instruction  # type: ignore
+from solders.pubkey import Pubkey  # type: ignore
+from solders.system_program import TransferParams, transfer  # type: ignore
+
+from constants import TOKEN_PROGRAM_ID, WSOL_MINT
+from wallet_state import TOKEN_ACCOUNT_STRUCT, WalletState
+
+
+class PersistentWsol:
+    def __init__(
+        self,
+        client: Client,
+        owner: Pubkey,
+        top_up_lamports: int = 0,
+        wallet: Optional[WalletState] = None,
+    ):
+        self.client = client
+        self.owner = owner
+        # Wrap at least this much per top-up so most buys need no transfer.
+        self.top_up_lamports = top_up_lamports
+        self.wallet = wallet
+        self.account = get_associated_token_address(owner, WSOL_MINT)
+        self.exists = False
+        # None until read, and again after a trade that may have moved it without confirming.
+        self.balance: Optional[int] = None
+        self.top_ups = 0
+        self._wrapped = 0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> "PersistentWsol":
+        if self.wallet:
+            holding = self.wallet.get(WSOL_MINT)
+            exists = holding is not None and holding.account == self.account
+            balance = holding.amount if exists else 0
+        else:
+            info = self.client.get_account_info(self.account, Processed).value
+            exists = info is not None
+            balance = TOKEN_ACCOUNT_STRUCT.unpack_from(bytes(info.data))[2] if info else 0
+        with self._lock:
+            self.exists = exists
+            self.balance = balance
+        return self
+
+    def prepare(self, amount_needed: int = 0) -> List[Instruction]:
+        if self.balance is None:
+            self.refresh()
+        instructions = []
+        with self._lock:
+            self._wrapped = 0
+            if not self.exists:
+                instructions.append(
+                    create_idempotent_associated_token_account(self.owner, self.owner, WSOL_MINT)
+                )
+            if self.balance < amount_needed:
+                lamports = max(amount_needed - self.balance, self.top_up_lamports)
+                instructions.extend([
+                    transfer(TransferParams(from_pubkey=self.owner, to_pubkey=self.account, lamports=lamports)),
+                    sync_native(SyncNativeParams(TOKEN_PROGRAM_ID, self.account)),
+                ])
+                self._wrapped = lamports
+                self.top_ups += 1
+        return instructions
+
+    def quote_account_ixs(self, amount_needed: int = 0) -> Tuple[Pubkey, List[Instruction], None]:
+        # Same shape as create_quote_token_account_ixs, with no close.
+        return self.account, self.prepare(amount_needed), None
+
+    @staticmethod
+    def quote_mode(quote_account_ixs: List[Instruction]) -> str:
+        # Creating the ATA and topping it up cost different CU, so each
+        # combination gets its own profile.
+        created = any(ix.program_id == ASSOCIATED_TOKEN_PROGRAM_ID for ix in quote_account_ixs)
+        topped_up = any(ix.program_id == TOKEN_PROGRAM_ID for ix in quote_account_ixs)
+        if created:
+            return "wsol_create_top_up" if topped_up else "wsol_create"
+        return "wsol_top_up" if topped_up else "wsol"
+
+    def after_trade(self, confirmed: Optional[bool], spent: Optional[int] = None) -> None:
+        if not confirmed:
+            # It may still land, or have landed unseen, so the next prepare re-reads.
+            with self._lock:
+                self.balance = None
+            return
+        with self._lock:
+            if spent is not None and not self.wallet and self.balance is not None:
+                # An exact-in buy spends exactly what it was given.
+                self.exists = True
+                self.balance += self._wrapped - spent
+                return
+        # Sell proceeds are only known on-chain, so re-read rather than guess.
+        self.refresh()
+
+    def unwrap_ix(self) -> Instruction:
+        return close_account(
+            CloseAccountParams(
+                program_id=TOKEN_PROGRAM_ID,
+                account=self.account,
+                dest=self.owner,
+                owner=self.owner,
+            )
+        )